@@ -1,5 +1,6 @@
 import os
-from flask import Flask, render_template, redirect, url_for, flash, session, request, jsonify, send_from_directory
+import time
+from flask import Flask, Response, render_template, redirect, url_for, flash, session, request, jsonify, send_from_directory
 from flask_login import LoginManager, login_required, current_user
 from dotenv import load_dotenv
 from werkzeug.utils import secure_filename
@@ -14,22 +15,50 @@ app = Flask(__name__, static_folder='static')
 CORS(app)  # Enable CORS for all routes
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
 app.config['UPLOAD_FOLDER'] = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max upload
+# Max upload size in bytes, 16MB by default; set MAX_CONTENT_LENGTH=0 to lift the limit
+app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_CONTENT_LENGTH', 16 * 1024 * 1024)) or None
 app.config['FRONTEND_FOLDER'] = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'frontend')
 
 # Ensure upload directory exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
+# Time every request; send X-Trace: 1 for a per-call Server-Timing breakdown
+from services import metrics
+if metrics.METRICS_ENABLED:
+    metrics.init_app(app)
+
+# Prepare the patent store and import any legacy patents.json
+from models.database import init_db
+from models.migrate import migrate_patents_json
+init_db()
+migrate_patents_json()
+
 # Initialize Flask-Login
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'auth.login'
 
+# Keep sessions server-side and cache the logged-in user in them
+from services import session_store
+session_store.init_app(app)
+
+# Seconds a user cached in the session is reused, while its record is unchanged
+SESSION_PRINCIPAL_TTL = float(os.getenv('SESSION_PRINCIPAL_TTL', 300))
+
 # User loader function
 @login_manager.user_loader
 def load_user(user_id):
     from models.user_model import User
-    return User.get_by_id(user_id)
+    principal = session.get('_principal')
+    if principal and principal['id'] == user_id and time.time() < principal['expires']:
+        # Only while the user's record is unchanged, e.g. no new email or wallet
+        if principal.get('stamp') and principal['stamp'] == User.get_stamp(user_id):
+            return User.from_principal(principal)
+    
+    user = User.get_by_id(user_id)
+    if user:
+        session['_principal'] = dict(user.to_principal(), expires=time.time() + SESSION_PRINCIPAL_TTL)
+    return user
 
 # Import and register blueprints
 from routes.auth_routes import auth_bp
@@ -40,6 +69,23 @@ app.register_blueprint(auth_bp)
 app.register_blueprint(ip_bp)
 app.register_blueprint(blockchain_bp)
 
+# Fork the signature recovery processes before any background thread starts
+from services import signature_service
+signature_service.start_pool()
+
+# Keep the local patent store in sync with contract events
+from services.event_indexer import INDEXER_ENABLED, start_indexer_thread
+if INDEXER_ENABLED:
+    start_indexer_thread()
+
+# Run background jobs such as patent registration, after clearing out
+# uploads left behind by registrations that never finished
+from services.job_queue import JOB_WORKERS, start_workers
+from services.registration_service import sweep_spool_files
+sweep_spool_files(app.config['UPLOAD_FOLDER'])
+if JOB_WORKERS:
+    start_workers(JOB_WORKERS)
+
 # Frontend routes
 @app.route('/')
 def serve_frontend_index():
@@ -60,6 +106,14 @@ def api_index():
     """API Homepage with live patent feed"""
     return jsonify({"message": "Welcome to the IP NFT DApp API"})
 
+# Prometheus scrape endpoint
+@app.route('/metrics')
+def metrics_endpoint():
+    """Expose request and service timings in the Prometheus text format"""
+    if not metrics.METRICS_ENABLED:
+        return page_not_found(None)
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
 # Error handlers
 @app.errorhandler(404)
 def page_not_found(e):
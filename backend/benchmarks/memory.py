@@ -0,0 +1,103 @@
+"""
+Memory benchmark for patent and user records
+
+Fills a throwaway database with --count patents, then measures with
+tracemalloc the bytes each loaded record keeps alive:
+    row_dict          plain dict per row, as returned by dict(sqlite3.Row)
+    patent_full       Patent with its description loaded
+    patent_lazy       Patent from a list finder, description not loaded yet
+    patent_summary    PatentSummary view returned by Patent.search
+    user              hydrated User
+
+Usage:
+    python benchmarks/memory.py [--count N] [--description-bytes N] [--json]
+"""
+import os
+import sys
+import gc
+import json
+import argparse
+import tempfile
+import tracemalloc
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def measure(build):
+    """Bytes per record still allocated after build() returns its list"""
+    gc.collect()
+    tracemalloc.start()
+    records = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return round(size / max(len(records), 1), 1)
+
+def populate(count, description_bytes):
+    from models.database import init_db, transaction
+    from models.patent_model import Patent
+
+    init_db()
+    description = ('lorem ipsum dolor sit amet ' * (description_bytes // 27 + 1))[:description_bytes]
+    with transaction() as conn:
+        for i in range(count):
+            Patent._upsert(conn, {
+                'id': f"{i:012d}", 'title': f"Patent {i}", 'description': description,
+                'category': 'software', 'owner_id': 'owner', 'token_id': i, 'cid': f"Qm{i:044d}",
+                'tx_hash': f"0x{i:064x}", 'duration': 10, 'created_at': '2024-01-01T00:00:00',
+                'for_sale': False, 'min_bid': 0, 'sale_tx_hash': None
+            })
+
+def run(args):
+    """Populate the database and measure each record type"""
+    from models.database import get_connection
+    from models.patent_model import Patent, PATENT_LIST_FIELDS
+    from models.user_model import User
+
+    populate(args.count, args.description_bytes)
+    conn = get_connection()
+    select_full = 'SELECT * FROM patents'
+    select_list = f"SELECT {', '.join(PATENT_LIST_FIELDS)} FROM patents"
+
+    report = {
+        'count': args.count,
+        'description_bytes': args.description_bytes,
+        'python': sys.version.split()[0],
+        'bytes_per_record': {
+            'row_dict': measure(lambda: [dict(row) for row in conn.execute(select_full)]),
+            'patent_full': measure(lambda: [Patent._from_row(row) for row in conn.execute(select_full)]),
+            'patent_lazy': measure(lambda: [Patent._from_row(row) for row in conn.execute(select_list)]),
+            'patent_summary': measure(lambda: Patent.search('lorem', limit=args.count)),
+            'user': measure(lambda: [
+                User(id=f"{i:012d}", name=f"User {i}", email=f"user{i}@example.com",
+                     wallet_address=f"0x{i:040x}", password_hash='pbkdf2:sha256$' + 'x' * 80,
+                     created_at='2024-01-01T00:00:00')
+                for i in range(args.count)
+            ])
+        }
+    }
+    conn.close()
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=100000, help='Patents to load')
+    parser.add_argument('--description-bytes', type=int, default=1000, help='Length of each description')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args()
+
+    # The database path is read when models.database is first imported
+    with tempfile.TemporaryDirectory() as data_dir:
+        os.environ['DATABASE_PATH'] = os.path.join(data_dir, 'bench.db')
+        sys.path.insert(0, BACKEND_DIR)
+        report = run(args)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{args.count} records, {args.description_bytes}-byte descriptions")
+    for name, size in report['bytes_per_record'].items():
+        print(f"{name:<16} {size:>10.1f} bytes/record")
+
+if __name__ == '__main__':
+    main()
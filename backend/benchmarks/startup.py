@@ -0,0 +1,97 @@
+"""
+Startup benchmark for the backend
+
+Each run starts a fresh interpreter and measures:
+    import_app        cold `import app` (blueprints, database setup, migrations)
+    first_request     first GET /api through the Flask test client
+    first_chain_use   building the Web3 connection and contract on first use (no RPC)
+    modules_loaded    whether web3, eth_account and requests were imported by startup
+
+Runs use a throwaway database and have the job workers and event indexer
+disabled, so the numbers cover startup alone.
+
+Usage:
+    python benchmarks/startup.py [--runs N] [--json]
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs inside the child interpreter and prints its timings as JSON
+PROBE = """
+import sys, json, time
+start = time.perf_counter()
+import app
+import_app = time.perf_counter() - start
+
+loaded = {name: name in sys.modules for name in ('web3', 'eth_account', 'requests')}
+
+client = app.app.test_client()
+start = time.perf_counter()
+client.get('/api')
+first_request = time.perf_counter() - start
+
+from services import blockchain_service
+start = time.perf_counter()
+blockchain_service.get_web3()
+first_chain_use = time.perf_counter() - start
+
+print(json.dumps({'import_app': import_app, 'first_request': first_request,
+                  'first_chain_use': first_chain_use, 'modules_loaded': loaded}))
+"""
+
+def run_once(data_dir):
+    env = dict(os.environ,
+               DATABASE_PATH=os.path.join(data_dir, 'bench.db'),
+               IPFS_CACHE_DIR=os.path.join(data_dir, 'ipfs_cache'),
+               JOB_WORKERS='0',
+               INDEXER_ENABLED='false')
+    output = subprocess.run([sys.executable, '-c', PROBE], cwd=BACKEND_DIR, env=env,
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def summarize(samples):
+    return {
+        'median_ms': round(statistics.median(samples) * 1000, 1),
+        'min_ms': round(min(samples) * 1000, 1),
+        'max_ms': round(max(samples) * 1000, 1)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters to time')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        # One untimed run compiles bytecode and creates the database
+        run_once(data_dir)
+        results = [run_once(data_dir) for _ in range(args.runs)]
+
+    report = {
+        'runs': args.runs,
+        'python': sys.version.split()[0],
+        'modules_loaded_at_startup': results[-1]['modules_loaded']
+    }
+    for metric in ('import_app', 'first_request', 'first_chain_use'):
+        report[metric] = summarize([result[metric] for result in results])
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    for metric in ('import_app', 'first_request', 'first_chain_use'):
+        stats = report[metric]
+        print(f"{metric:<16} median {stats['median_ms']:>8.1f} ms   "
+              f"min {stats['min_ms']:>8.1f} ms   max {stats['max_ms']:>8.1f} ms")
+    loaded = [name for name, imported in report['modules_loaded_at_startup'].items() if imported]
+    print(f"heavy modules imported at startup: {', '.join(loaded) or 'none'}")
+
+if __name__ == '__main__':
+    main()
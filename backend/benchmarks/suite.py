@@ -0,0 +1,341 @@
+"""
+Benchmark suite for the backend hot paths
+
+For each dataset size a fresh interpreter seeds a throwaway database and
+user store with N users and N indexed patents, points Filebase and the
+IPFS gateway at a local HTTP stub, and times these scenarios through the
+Flask test client:
+    login           POST /api/auth/login (JSON)
+    load_user       Flask-Login user loader for a random user, without a session cache
+    profile         GET /api/auth/profile as a logged-in user
+    search          GET /api/ip/search for a word in a few percent of patents (JSON)
+    search_broad    GET /api/ip/search for a title word in about a fifth of patents (JSON)
+    list            GET /api/ip/patents, first page and a category filter (JSON)
+    view_patent     GET /api/ip/patent/<token_id> (JSON)
+    register        POST /api/ip/register with a small file, up to the queued job (JSON)
+    ipfs_pin        metadata upload to the Filebase stub
+    ipfs_get        gateway fetch of uncached metadata from the stub
+
+With --rpc-url pointing at a development node (e.g. anvil) that has the
+contract deployed and CONTRACT_ADDRESS/PRIVATE_KEY set, register_job also
+runs queued registrations end to end against that node.
+
+The report lists ops/s and p50/p95/p99 latency per scenario and size; save
+it with --output and pass it to --compare on a later commit.
+
+Usage:
+    python benchmarks/suite.py [--sizes 1000,10000,100000] [--requests N]
+                               [--rpc-url URL] [--output FILE] [--compare FILE] [--json]
+"""
+import io
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import statistics
+import subprocess
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PASSWORD = 'benchmark-password'
+CATEGORIES = ('software', 'hardware', 'design', 'process')
+WORDS = ('engine', 'sensor', 'battery', 'protocol', 'lens', 'turbine', 'polymer', 'circuit',
+         'antenna', 'valve', 'enzyme', 'ledger', 'compiler', 'actuator', 'membrane', 'codec')
+# Description vocabulary: 2048 words, so a search term matches a few percent of patents
+VOCABULARY = tuple(f'{word}{prefix}{index}' for word in WORDS for prefix in 'abcdefgh' for index in range(16))
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Stands in for Filebase (POST /filebase) and an IPFS gateway (GET /ipfs/<cid>)"""
+
+    protocol_version = 'HTTP/1.1'
+    # Send headers and body in one segment so keep-alive clients don't hit delayed ACKs
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+
+    def _send(self, status, body, content_type='application/json'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.path != '/filebase':
+            return self._send(404, b'{}')
+        cid = 'bafk' + hashlib.sha256(body).hexdigest()[:52]
+        self._send(200, json.dumps({'cid': cid}).encode())
+
+    def do_GET(self):
+        if not self.path.startswith('/ipfs/'):
+            return self._send(404, b'{}')
+        cid = self.path[len('/ipfs/'):]
+        self._send(200, json.dumps({'title': f'Patent {cid}', 'description': 'Stub metadata',
+                                    'category': 'software'}).encode())
+
+    def log_message(self, *args):
+        pass
+
+def start_stub():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+def seed(size, users_file):
+    """Write size users and size patents, indexed as if the event indexer had synced"""
+    from werkzeug.security import generate_password_hash
+    from models.database import transaction
+    from models.patent_model import Patent
+    from models import chain_state
+
+    # One hash for every user keeps seeding fast; verification cost is unchanged
+    password_hash = generate_password_hash(PASSWORD)
+    users = {}
+    for i in range(size):
+        user_id = f'user{i:08d}'
+        users[user_id] = {'id': user_id, 'name': f'User {i}', 'email': f'user{i}@example.com',
+                          'wallet_address': f'0x{i:040x}', 'password_hash': password_hash,
+                          'created_at': '2024-01-01T00:00:00'}
+    with open(users_file, 'w') as f:
+        json.dump(users, f)
+
+    rng = random.Random(size)
+    with transaction() as conn:
+        for token_id in range(1, size + 1):
+            owner = f'0x{rng.randrange(size):040x}'
+            title = ' '.join(rng.sample(WORDS, 3)).title()
+            cid = f'bafk{token_id:052d}'
+            Patent._upsert(conn, {
+                'id': f'patent{token_id:08d}', 'title': title,
+                'description': ' '.join(rng.choices(VOCABULARY, k=60)), 'category': rng.choice(CATEGORIES),
+                'owner_id': f'user{rng.randrange(size):08d}', 'token_id': token_id, 'cid': cid,
+                'tx_hash': f'0x{token_id:064x}', 'duration': 10, 'created_at': '2024-01-01T00:00:00',
+                'for_sale': False, 'min_bid': 0, 'sale_tx_hash': None
+            })
+            conn.execute(
+                """
+                INSERT INTO chain_patents (token_id, owner, cid, registration_time, is_for_sale,
+                                           sale_end_time, updated_block)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (token_id, owner, cid, 1700000000 + token_id, token_id % 5 == 0,
+                 1800000000 + token_id if token_id % 5 == 0 else 0, token_id)
+            )
+        chain_state.set_checkpoint(conn, size, f'0x{size:064x}')
+
+def summarize(samples, errors):
+    ordered = sorted(samples)
+
+    def percentile(q):
+        return round(ordered[min(int(q * len(ordered)), len(ordered) - 1)] * 1000, 3)
+
+    return {
+        'ops_per_sec': round(len(samples) / sum(samples), 1) if sum(samples) else None,
+        'mean_ms': round(statistics.mean(samples) * 1000, 3),
+        'p50_ms': percentile(0.50),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'errors': errors
+    }
+
+def measure(operation, count):
+    """Run operation(i) count times after a short warm-up; operation returns True on success"""
+    for i in range(min(count // 10, 20)):
+        operation(i)
+
+    samples = []
+    errors = 0
+    for i in range(count):
+        start = time.perf_counter()
+        ok = operation(i)
+        samples.append(time.perf_counter() - start)
+        errors += not ok
+    return summarize(samples, errors)
+
+def run_worker(size, count, rpc_url):
+    """Seed one dataset size and time every scenario; runs in a fresh interpreter"""
+    sys.path.insert(0, BACKEND_DIR)
+    data_dir = os.environ['BENCH_DATA_DIR']
+    users_file = os.environ['USERS_FILE']
+
+    from models.database import init_db
+    init_db()
+    start = time.perf_counter()
+    seed(size, users_file)
+    seed_seconds = time.perf_counter() - start
+
+    import app as app_module
+    from services import ipfs_service, job_queue
+
+    app = app_module.app
+    app.config['UPLOAD_FOLDER'] = os.path.join(data_dir, 'uploads')
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    rng = random.Random(0)
+    json_headers = {'Accept': 'application/json'}
+
+    def user_index():
+        return rng.randrange(size)
+
+    client = app.test_client()
+    session_client = app.test_client()
+    session_client.post('/api/auth/login', json={'email': 'user0@example.com', 'password': PASSWORD})
+
+    def login(i):
+        response = client.post('/api/auth/login',
+                               json={'email': f'user{user_index()}@example.com', 'password': PASSWORD})
+        return response.status_code == 200
+
+    def load_user(i):
+        # A fresh request context has no cached principal, so this reads the user store
+        with app.test_request_context():
+            return app_module.load_user(f'user{user_index():08d}') is not None
+
+    def profile(i):
+        return session_client.get('/api/auth/profile', headers=json_headers).status_code == 200
+
+    def search(i):
+        query = rng.choice(VOCABULARY)
+        return client.get('/api/ip/search', query_string={'q': query}, headers=json_headers).status_code == 200
+
+    def search_broad(i):
+        query = rng.choice(WORDS)
+        return client.get('/api/ip/search', query_string={'q': query}, headers=json_headers).status_code == 200
+
+    def list_page(i):
+        params = {'category': rng.choice(CATEGORIES)} if i % 2 else {}
+        return client.get('/api/ip/patents', query_string=params, headers=json_headers).status_code == 200
+
+    def view_patent(i):
+        token_id = rng.randrange(1, size + 1)
+        return client.get(f'/api/ip/patent/{token_id}', headers=json_headers).status_code == 200
+
+    def register(i):
+        response = session_client.post('/api/ip/register', headers=json_headers, data={
+            'title': f'Benchmark patent {i}', 'description': 'Registered by the benchmark suite',
+            'category': 'software', 'duration': '10',
+            'file': (io.BytesIO(b'x' * 4096), f'drawing{i}.bin')
+        })
+        return response.status_code == 202
+
+    def ipfs_pin(i):
+        return bool(ipfs_service.upload_to_ipfs(json_data={'title': f'Pinned {i}', 'nonce': rng.random()}))
+
+    def ipfs_get(i):
+        return bool(ipfs_service.get_from_ipfs(f'bafkuncached{size:08d}{i:08d}{rng.randrange(10 ** 8):08d}'))
+
+    scenarios = {
+        'login': login,
+        'load_user': load_user,
+        'profile': profile,
+        'search': search,
+        'search_broad': search_broad,
+        'list': list_page,
+        'view_patent': view_patent,
+        'register': register,
+        'ipfs_pin': ipfs_pin,
+        'ipfs_get': ipfs_get
+    }
+    if rpc_url:
+        # Drains the registrations queued by the register scenario
+        scenarios['register_job'] = lambda i: job_queue.run_next()
+
+    results = {}
+    for name, operation in scenarios.items():
+        # Password checks are deliberately slow, so login gets fewer rounds
+        rounds = max(count // 10, 10) if name in ('login', 'register_job') else count
+        results[name] = measure(operation, rounds)
+
+    return {'seed_seconds': round(seed_seconds, 2), 'scenarios': results}
+
+def run_size(size, count, rpc_url, stub_url):
+    with tempfile.TemporaryDirectory() as data_dir:
+        env = dict(os.environ,
+                   BENCH_DATA_DIR=data_dir,
+                   DATABASE_PATH=os.path.join(data_dir, 'bench.db'),
+                   USERS_FILE=os.path.join(data_dir, 'users.json'),
+                   IPFS_CACHE_DIR=os.path.join(data_dir, 'ipfs_cache'),
+                   FILEBASE_ENDPOINT=f'{stub_url}/filebase',
+                   IPFS_GATEWAY_URL=f'{stub_url}/ipfs/',
+                   JOB_WORKERS='0',
+                   INDEXER_ENABLED='false')
+        if rpc_url:
+            env['WEB3_PROVIDER_URLS'] = rpc_url
+
+        command = [sys.executable, os.path.abspath(__file__), '--worker', str(size), '--requests', str(count)]
+        if rpc_url:
+            command += ['--rpc-url', rpc_url]
+        output = subprocess.run(command, cwd=BACKEND_DIR, env=env, check=True,
+                                capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_report(report, baseline=None):
+    for size, result in report['sizes'].items():
+        print(f"\n{size} records (seeded in {result['seed_seconds']}s)")
+        print(f"{'scenario':<14} {'ops/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'errors':>7}"
+              + (f" {'p50 vs base':>12}" if baseline else ''))
+        for name, stats in result['scenarios'].items():
+            line = (f"{name:<14} {stats['ops_per_sec'] or 0:>10.1f} {stats['p50_ms']:>10.3f} "
+                    f"{stats['p95_ms']:>10.3f} {stats['p99_ms']:>10.3f} {stats['errors']:>7}")
+            base = (baseline or {}).get('sizes', {}).get(size, {}).get('scenarios', {}).get(name)
+            if base and base['p50_ms']:
+                line += f" {(stats['p50_ms'] / base['p50_ms'] - 1) * 100:>+11.1f}%"
+            print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,10000', help='Comma-separated dataset sizes, e.g. 1000,10000,100000')
+    parser.add_argument('--requests', type=int, default=200, help='Timed calls per scenario')
+    parser.add_argument('--rpc-url', help='Development node with the contract deployed, enables register_job')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    parser.add_argument('--compare', help='Earlier JSON report to compare p50 latencies against')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    parser.add_argument('--worker', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.requests, args.rpc_url)))
+        return
+
+    stub, stub_url = start_stub()
+    report = {
+        'commit': git_commit(),
+        'python': sys.version.split()[0],
+        'requests': args.requests,
+        'chain': bool(args.rpc_url),
+        'sizes': {}
+    }
+    try:
+        for size in (int(size) for size in args.sizes.split(',')):
+            report['sizes'][str(size)] = run_size(size, args.requests, args.rpc_url, stub_url)
+    finally:
+        stub.shutdown()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+if __name__ == '__main__':
+    main()
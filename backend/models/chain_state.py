@@ -0,0 +1,340 @@
+import json
+import time
+
+from models.database import get_connection
+from services.metrics import timed
+
+# Local projection of the IPNFT contract state, built from its events
+# Writers are in services/event_indexer.py; every function that takes a
+# connection expects to run inside models.database.transaction()
+
+CHECKPOINT_KEY = 'checkpoint'
+REORGS_KEY = 'reorgs'
+
+# Sort orders for list_patents: name -> (key columns, direction)
+PATENT_SORTS = {
+    'newest': (('token_id',), 'DESC'),
+    'oldest': (('token_id',), 'ASC'),
+    'ending_soon': (('sale_end_time', 'token_id'), 'ASC')
+}
+
+def _row_to_patent(row):
+    """Convert a chain_patents row to the dict layout returned by blockchain_service"""
+    return {
+        'token_id': row['token_id'],
+        'owner': row['owner'],
+        'cid': row['cid'],
+        'registration_time': row['registration_time'],
+        'is_for_sale': bool(row['is_for_sale']),
+        'min_bid': int(row['min_bid']),
+        'sale_end_time': row['sale_end_time'],
+        'highest_bidder': row['highest_bidder'],
+        'highest_bid': int(row['highest_bid'])
+    }
+
+def get_checkpoint():
+    """
+    Get the last block the indexer has fully processed
+
+    Returns:
+        dict or None: {'block_number': int, 'block_hash': str}, or None before the first sync
+    """
+    row = get_connection().execute(
+        'SELECT value FROM indexer_state WHERE key = ?', (CHECKPOINT_KEY,)
+    ).fetchone()
+    return json.loads(row['value']) if row else None
+
+def get_reorg_count():
+    """Get the number of chain reorgs rolled back so far"""
+    row = get_connection().execute(
+        'SELECT value FROM indexer_state WHERE key = ?', (REORGS_KEY,)
+    ).fetchone()
+    return json.loads(row['value']) if row else 0
+
+def is_synced():
+    """Check whether the indexer has populated the store at least once"""
+    return get_checkpoint() is not None
+
+@timed('chain_state.get_patent', layer='model')
+def get_patent(token_id):
+    """Get the indexed state of a single patent, or None if it is unknown"""
+    row = get_connection().execute(
+        'SELECT * FROM chain_patents WHERE token_id = ?', (int(token_id),)
+    ).fetchone()
+    return _row_to_patent(row) if row else None
+
+@timed('chain_state.get_all_patents', layer='model')
+def get_all_patents():
+    """Get the indexed state of every patent, ordered by token ID"""
+    rows = get_connection().execute('SELECT * FROM chain_patents ORDER BY token_id').fetchall()
+    return [_row_to_patent(row) for row in rows]
+
+@timed('chain_state.list_patents', layer='model')
+def list_patents(sort='newest', limit=20, after=None, offset=0, category=None, owner=None, for_sale=None):
+    """
+    Get one page of indexed patents
+
+    Pages use keyset pagination: passing the returned next_key as ``after``
+    continues from an index position instead of skipping rows, so every
+    page costs the same however deep it is. ``offset`` is honoured when no
+    key is given but is proportional to the rows skipped.
+
+    Args:
+        sort (str): One of PATENT_SORTS; 'ending_soon' only lists sales that have not ended
+        limit (int): Page size
+        after (list, optional): Sort key of the last patent on the previous page
+        offset (int): Rows to skip when no key is given
+        category (str, optional): Only patents whose local record has this category
+        owner (str, optional): Only patents owned by this address, case-insensitive
+        for_sale (bool, optional): Only patents that are, or are not, for sale
+
+    Returns:
+        tuple: (patents, next_key) where next_key is None on the last page
+    """
+    columns, direction = PATENT_SORTS[sort]
+    conditions, params = [], []
+    if sort == 'ending_soon':
+        for_sale = True
+        now = int(time.time())
+        if after is None or after[0] <= now:
+            # Open sales only; a cursor key that has itself ended is implied by this bound
+            conditions.append('cp.sale_end_time > ?')
+            params.append(now)
+            if after is not None:
+                after, offset = None, 0
+
+    if for_sale is not None:
+        conditions.append('cp.is_for_sale = ?')
+        params.append(int(for_sale))
+    if owner:
+        conditions.append('cp.owner = ? COLLATE NOCASE')
+        params.append(owner)
+    if category:
+        conditions.append('cp.category = ?')
+        params.append(category)
+    if after is not None:
+        keys = ', '.join(f'cp.{column}' for column in columns)
+        placeholders = ', '.join('?' for _ in columns)
+        conditions.append(f"({keys}) {'<' if direction == 'DESC' else '>'} ({placeholders})")
+        params.extend(after)
+        offset = 0
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    order = ', '.join(f'cp.{column} {direction}' for column in columns)
+
+    # Local title and description, from one record even if several share the token ID
+    rows = get_connection().execute(
+        f"""
+        SELECT cp.*, p.title, p.description
+        FROM chain_patents cp
+        LEFT JOIN patents p ON p.rowid = (SELECT rowid FROM patents WHERE token_id = cp.token_id LIMIT 1)
+        {where}
+        ORDER BY {order}
+        LIMIT ? OFFSET ?
+        """,
+        (*params, limit + 1, offset)
+    ).fetchall()
+
+    patents = []
+    for row in rows[:limit]:
+        patent = _row_to_patent(row)
+        patent.update(title=row['title'], description=row['description'], category=row['category'])
+        patents.append(patent)
+
+    next_key = [rows[limit - 1][column] for column in columns] if len(rows) > limit else None
+    return patents, next_key
+
+def iter_patents(since=None, batch_size=1000):
+    """
+    Yield every indexed patent, with its local title, description and category
+
+    Patents are read in token ID order, or in change order with ``since``,
+    batch_size rows per query, so an export of any size holds one batch in
+    memory and never keeps a read transaction open between batches.
+
+    Args:
+        since (int, optional): Only patents changed by an event after this block
+        batch_size (int): Rows per query
+
+    Yields:
+        dict: Patent state as returned by list_patents, plus updated_block
+    """
+    if since is None:
+        columns, condition, params = ('token_id',), '', []
+    else:
+        columns, condition, params = ('updated_block', 'token_id'), 'cp.updated_block > ? AND', [since]
+    keys = ', '.join(f'cp.{column}' for column in columns)
+    placeholders = ', '.join('?' for _ in columns)
+
+    last_key = [0] * len(columns)
+    while True:
+        rows = get_connection().execute(
+            f"""
+            SELECT cp.*, p.title, p.description
+            FROM chain_patents cp
+            LEFT JOIN patents p ON p.rowid = (SELECT rowid FROM patents WHERE token_id = cp.token_id LIMIT 1)
+            WHERE {condition} ({keys}) > ({placeholders})
+            ORDER BY {keys}
+            LIMIT ?
+            """,
+            (*params, *last_key, batch_size)
+        ).fetchall()
+
+        for row in rows:
+            patent = _row_to_patent(row)
+            patent.update(title=row['title'], description=row['description'], category=row['category'],
+                          updated_block=row['updated_block'])
+            yield patent
+
+        if len(rows) < batch_size:
+            return
+        last_key = [rows[-1][column] for column in columns]
+
+def catalogue_version():
+    """
+    Fingerprint of everything iter_patents can return
+
+    Changes whenever the indexer checkpoint moves or a local patent record
+    is added, edited or removed, so it can serve as an export ETag.
+
+    Returns:
+        str: Opaque version string
+    """
+    checkpoint = get_checkpoint() or {}
+    row = get_connection().execute('SELECT version FROM catalogue_version').fetchone()
+    return f"{checkpoint.get('block_number')}:{checkpoint.get('block_hash')}:{get_reorg_count()}:{row['version']}"
+
+@timed('chain_state.get_bids', layer='model')
+def get_bids(token_id):
+    """Get the latest bid of every bidder on a patent, highest first"""
+    rows = get_connection().execute(
+        'SELECT bidder, amount, tx_hash FROM chain_bids WHERE token_id = ?', (int(token_id),)
+    ).fetchall()
+    bids = [
+        {'bidder_address': row['bidder'], 'amount': int(row['amount']), 'tx_hash': row['tx_hash']}
+        for row in rows
+    ]
+    return sorted(bids, key=lambda bid: bid['amount'], reverse=True)
+
+def set_checkpoint(conn, block_number, block_hash):
+    """Record the last fully processed block"""
+    conn.execute(
+        """
+        INSERT INTO indexer_state (key, value) VALUES (?, ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+        """,
+        (CHECKPOINT_KEY, json.dumps({'block_number': block_number, 'block_hash': block_hash}))
+    )
+
+def record_event(conn, event):
+    """
+    Store a decoded contract event and apply it to the projection
+
+    Args:
+        conn (sqlite3.Connection): Connection with an open transaction
+        event (dict): Event with block_number, log_index, block_hash, tx_hash,
+            event, token_id and args keys
+
+    Returns:
+        bool: False if the event was already recorded
+    """
+    cursor = conn.execute(
+        """
+        INSERT OR IGNORE INTO chain_events
+            (block_number, log_index, block_hash, tx_hash, event, token_id, args)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        (event['block_number'], event['log_index'], event['block_hash'], event['tx_hash'],
+         event['event'], event['token_id'], json.dumps(event['args']))
+    )
+    if cursor.rowcount == 0:
+        return False
+
+    _apply_event(conn, event)
+    return True
+
+def _apply_event(conn, event):
+    """Fold a single event into chain_patents and chain_bids"""
+    token_id = event['token_id']
+    args = event['args']
+
+    if event['event'] == 'PatentRegistered':
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO chain_patents (token_id, owner, cid, registration_time, updated_block)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (token_id, args['owner'], args['cid'], args['timestamp'], event['block_number'])
+        )
+    elif event['event'] == 'PatentListedForSale':
+        conn.execute(
+            """
+            UPDATE chain_patents
+            SET is_for_sale = 1, min_bid = ?, sale_end_time = ?, highest_bidder = NULL, highest_bid = '0',
+                updated_block = ?
+            WHERE token_id = ?
+            """,
+            (str(args['minBid']), args['endTime'], event['block_number'], token_id)
+        )
+    elif event['event'] == 'BidPlaced':
+        conn.execute(
+            """
+            INSERT INTO chain_bids (token_id, bidder, amount, tx_hash) VALUES (?, ?, ?, ?)
+            ON CONFLICT(token_id, bidder) DO UPDATE SET amount = excluded.amount, tx_hash = excluded.tx_hash
+            """,
+            (token_id, args['bidder'], str(args['amount']), event['tx_hash'])
+        )
+        conn.execute(
+            'UPDATE chain_patents SET highest_bidder = ?, highest_bid = ?, updated_block = ? WHERE token_id = ?',
+            (args['bidder'], str(args['amount']), event['block_number'], token_id)
+        )
+    elif event['event'] == 'BidAccepted':
+        conn.execute(
+            """
+            UPDATE chain_patents
+            SET owner = ?, is_for_sale = 0, min_bid = '0', sale_end_time = 0,
+                highest_bidder = NULL, highest_bid = '0', updated_block = ?
+            WHERE token_id = ?
+            """,
+            (args['buyer'], event['block_number'], token_id)
+        )
+
+def rollback(conn, from_block):
+    """
+    Undo every event at or after a block and rebuild the affected patents
+
+    Args:
+        conn (sqlite3.Connection): Connection with an open transaction
+        from_block (int): First block to discard
+
+    Returns:
+        set: Token IDs whose state was rebuilt
+    """
+    rows = conn.execute(
+        'SELECT DISTINCT token_id FROM chain_events WHERE block_number >= ?', (from_block,)
+    ).fetchall()
+    token_ids = {row['token_id'] for row in rows}
+
+    conn.execute('DELETE FROM chain_events WHERE block_number >= ?', (from_block,))
+    conn.execute(
+        """
+        INSERT INTO indexer_state (key, value) VALUES (?, '1')
+        ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1
+        """,
+        (REORGS_KEY,)
+    )
+
+    for token_id in token_ids:
+        conn.execute('DELETE FROM chain_patents WHERE token_id = ?', (token_id,))
+        conn.execute('DELETE FROM chain_bids WHERE token_id = ?', (token_id,))
+
+        remaining = conn.execute(
+            'SELECT * FROM chain_events WHERE token_id = ? ORDER BY block_number, log_index',
+            (token_id,)
+        ).fetchall()
+        for row in remaining:
+            event = dict(row)
+            event['args'] = json.loads(event['args'])
+            _apply_event(conn, event)
+
+    return token_ids
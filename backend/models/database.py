@@ -0,0 +1,319 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from models.ids import legacy_id
+
+# Embedded SQLite storage shared by the models
+# WAL mode lets readers proceed while a single writer commits
+# Relative paths are taken from the backend directory, not the working directory
+DATABASE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             os.getenv('DATABASE_PATH', 'data/ipnft.db'))
+
+# Ensure data directory exists
+os.makedirs(os.path.dirname(DATABASE_PATH), exist_ok=True)
+
+# Schema migrations, applied in order and tracked with PRAGMA user_version
+MIGRATIONS = [
+    """
+    CREATE TABLE IF NOT EXISTS patents (
+        id TEXT PRIMARY KEY,
+        title TEXT,
+        description TEXT,
+        category TEXT,
+        owner_id TEXT,
+        token_id INTEGER,
+        cid TEXT,
+        tx_hash TEXT,
+        duration INTEGER,
+        created_at TEXT,
+        for_sale INTEGER NOT NULL DEFAULT 0,
+        min_bid NUMERIC DEFAULT 0,
+        sale_tx_hash TEXT
+    );
+    """,
+    # Secondary indexes for the finders in models/patent_model.py
+    """
+    CREATE INDEX IF NOT EXISTS idx_patents_token_id ON patents (token_id);
+    CREATE INDEX IF NOT EXISTS idx_patents_owner_id ON patents (owner_id, created_at);
+    CREATE INDEX IF NOT EXISTS idx_patents_cid ON patents (cid);
+    CREATE INDEX IF NOT EXISTS idx_patents_tx_hash ON patents (tx_hash);
+    """,
+    # Full-text index over patents, kept in sync by triggers on every upsert
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS patents_fts USING fts5(
+        title, description, category,
+        content='patents', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    );
+    CREATE TRIGGER IF NOT EXISTS patents_fts_insert AFTER INSERT ON patents BEGIN
+        INSERT INTO patents_fts (rowid, title, description, category)
+        VALUES (new.rowid, new.title, new.description, new.category);
+    END;
+    CREATE TRIGGER IF NOT EXISTS patents_fts_delete AFTER DELETE ON patents BEGIN
+        INSERT INTO patents_fts (patents_fts, rowid, title, description, category)
+        VALUES ('delete', old.rowid, old.title, old.description, old.category);
+    END;
+    CREATE TRIGGER IF NOT EXISTS patents_fts_update AFTER UPDATE OF title, description, category ON patents BEGIN
+        INSERT INTO patents_fts (patents_fts, rowid, title, description, category)
+        VALUES ('delete', old.rowid, old.title, old.description, old.category);
+        INSERT INTO patents_fts (rowid, title, description, category)
+        VALUES (new.rowid, new.title, new.description, new.category);
+    END;
+    INSERT INTO patents_fts (patents_fts) VALUES ('rebuild');
+    """,
+    # On-chain state materialized from contract events by services/event_indexer.py
+    # Wei amounts are stored as decimal strings since they overflow SQLite integers
+    """
+    CREATE TABLE IF NOT EXISTS chain_events (
+        block_number INTEGER NOT NULL,
+        log_index INTEGER NOT NULL,
+        block_hash TEXT NOT NULL,
+        tx_hash TEXT NOT NULL,
+        event TEXT NOT NULL,
+        token_id INTEGER NOT NULL,
+        args TEXT NOT NULL,
+        PRIMARY KEY (block_number, log_index)
+    );
+    CREATE INDEX IF NOT EXISTS idx_chain_events_token_id ON chain_events (token_id, block_number, log_index);
+    CREATE TABLE IF NOT EXISTS chain_patents (
+        token_id INTEGER PRIMARY KEY,
+        owner TEXT NOT NULL,
+        cid TEXT NOT NULL,
+        registration_time INTEGER NOT NULL,
+        is_for_sale INTEGER NOT NULL DEFAULT 0,
+        min_bid TEXT NOT NULL DEFAULT '0',
+        sale_end_time INTEGER NOT NULL DEFAULT 0,
+        highest_bidder TEXT,
+        highest_bid TEXT NOT NULL DEFAULT '0'
+    );
+    CREATE INDEX IF NOT EXISTS idx_chain_patents_owner ON chain_patents (owner);
+    CREATE TABLE IF NOT EXISTS chain_bids (
+        token_id INTEGER NOT NULL,
+        bidder TEXT NOT NULL,
+        amount TEXT NOT NULL,
+        tx_hash TEXT NOT NULL,
+        PRIMARY KEY (token_id, bidder)
+    );
+    CREATE TABLE IF NOT EXISTS indexer_state (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+    """,
+    # Durable background jobs for services/job_queue.py
+    """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY,
+        kind TEXT NOT NULL,
+        status TEXT NOT NULL,
+        stage TEXT,
+        payload TEXT NOT NULL,
+        result TEXT,
+        error TEXT,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        run_after REAL NOT NULL,
+        lease_expires REAL,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs (status, run_after);
+    """,
+    # Keyset pagination over chain_patents, see chain_state.list_patents
+    """
+    DROP INDEX IF EXISTS idx_chain_patents_owner;
+    CREATE INDEX IF NOT EXISTS idx_chain_patents_owner ON chain_patents (owner COLLATE NOCASE, token_id);
+    CREATE INDEX IF NOT EXISTS idx_chain_patents_for_sale ON chain_patents (is_for_sale, token_id);
+    CREATE INDEX IF NOT EXISTS idx_chain_patents_sale_end ON chain_patents (is_for_sale, sale_end_time, token_id);
+    """,
+    # Block of the last event applied to each patent, for incremental exports
+    """
+    ALTER TABLE chain_patents ADD COLUMN updated_block INTEGER NOT NULL DEFAULT 0;
+    UPDATE chain_patents SET updated_block = COALESCE(
+        (SELECT MAX(block_number) FROM chain_events WHERE token_id = chain_patents.token_id), 0
+    );
+    CREATE INDEX IF NOT EXISTS idx_chain_patents_updated ON chain_patents (updated_block, token_id);
+    """,
+    # Re-key patents with timestamp or UUID ids to time-ordered ids (models/ids.py)
+    # The old ids stay resolvable through patent_id_aliases, see Patent.resolve_id
+    """
+    CREATE TABLE IF NOT EXISTS patent_id_aliases (
+        old_id TEXT PRIMARY KEY,
+        id TEXT NOT NULL
+    );
+    INSERT OR IGNORE INTO patent_id_aliases (old_id, id)
+    SELECT id, legacy_id(created_at) FROM patents
+    WHERE length(id) != 26 OR id GLOB '*[^0-9A-HJKMNP-TV-Z]*';
+    UPDATE patents SET id = (SELECT alias.id FROM patent_id_aliases alias WHERE alias.old_id = patents.id)
+    WHERE id IN (SELECT old_id FROM patent_id_aliases);
+    """,
+    # Server-side sessions for services/session_store.py
+    """
+    CREATE TABLE IF NOT EXISTS sessions (
+        id TEXT PRIMARY KEY,
+        data TEXT NOT NULL,
+        expires_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at);
+    """,
+    # Token of the worker holding a running job's lease
+    """
+    ALTER TABLE jobs ADD COLUMN lease_owner TEXT;
+    """,
+    # Category of each indexed patent, copied from its local record so that
+    # category filters in chain_state.list_patents can walk an index
+    """
+    ALTER TABLE chain_patents ADD COLUMN category TEXT;
+    UPDATE chain_patents SET category = (
+        SELECT category FROM patents WHERE token_id = chain_patents.token_id LIMIT 1
+    );
+    CREATE INDEX IF NOT EXISTS idx_chain_patents_category ON chain_patents (category, token_id);
+    CREATE INDEX IF NOT EXISTS idx_chain_patents_category_for_sale
+        ON chain_patents (category, is_for_sale, token_id);
+    CREATE INDEX IF NOT EXISTS idx_chain_patents_category_sale_end
+        ON chain_patents (category, is_for_sale, sale_end_time, token_id);
+
+    CREATE TRIGGER IF NOT EXISTS chain_patents_category_insert AFTER INSERT ON chain_patents BEGIN
+        UPDATE chain_patents SET category = (
+            SELECT category FROM patents WHERE token_id = new.token_id LIMIT 1
+        ) WHERE token_id = new.token_id;
+    END;
+    CREATE TRIGGER IF NOT EXISTS patents_category_insert AFTER INSERT ON patents BEGIN
+        UPDATE chain_patents SET category = (
+            SELECT category FROM patents WHERE token_id = new.token_id LIMIT 1
+        ) WHERE token_id = new.token_id;
+    END;
+    CREATE TRIGGER IF NOT EXISTS patents_category_update AFTER UPDATE OF token_id, category ON patents BEGIN
+        UPDATE chain_patents SET category = (
+            SELECT category FROM patents WHERE token_id = chain_patents.token_id LIMIT 1
+        ) WHERE token_id IN (old.token_id, new.token_id);
+    END;
+    CREATE TRIGGER IF NOT EXISTS patents_category_delete AFTER DELETE ON patents BEGIN
+        UPDATE chain_patents SET category = (
+            SELECT category FROM patents WHERE token_id = old.token_id LIMIT 1
+        ) WHERE token_id = old.token_id;
+    END;
+    """,
+    # Counter bumped by every change to the local fields of the catalogue
+    # export, part of its ETag (chain_state.catalogue_version)
+    """
+    CREATE TABLE IF NOT EXISTS catalogue_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL
+    );
+    INSERT OR IGNORE INTO catalogue_version (id, version) VALUES (1, 0);
+
+    CREATE TRIGGER IF NOT EXISTS patents_version_insert AFTER INSERT ON patents BEGIN
+        UPDATE catalogue_version SET version = version + 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS patents_version_update
+    AFTER UPDATE OF token_id, title, description, category ON patents BEGIN
+        UPDATE catalogue_version SET version = version + 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS patents_version_delete AFTER DELETE ON patents BEGIN
+        UPDATE catalogue_version SET version = version + 1;
+    END;
+    """,
+    # Files each user streamed to IPFS through /upload, which /register may reference
+    """
+    CREATE TABLE IF NOT EXISTS uploads (
+        user_id TEXT NOT NULL,
+        cid TEXT NOT NULL,
+        sha256 TEXT NOT NULL,
+        filename TEXT,
+        created_at TEXT NOT NULL,
+        PRIMARY KEY (user_id, cid)
+    );
+    """,
+    # Databases that ran migration 8 before it kept the old patent ids
+    """
+    CREATE TABLE IF NOT EXISTS patent_id_aliases (
+        old_id TEXT PRIMARY KEY,
+        id TEXT NOT NULL
+    );
+    """,
+]
+
+_local = threading.local()
+_init_lock = threading.Lock()
+_initialized = False
+
+def _connect():
+    """Open a new connection with the pragmas every connection needs"""
+    conn = sqlite3.connect(DATABASE_PATH, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA foreign_keys=ON')
+    return conn
+
+def init_db():
+    """Create or upgrade the schema to the latest migration"""
+    global _initialized
+    with _init_lock:
+        if _initialized:
+            return
+
+        conn = _connect()
+        try:
+            conn.create_function('legacy_id', 1, legacy_id)
+            conn.execute('BEGIN IMMEDIATE')
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            for index, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+                for statement in _split_statements(migration):
+                    conn.execute(statement)
+                conn.execute(f'PRAGMA user_version = {index}')
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+        _initialized = True
+
+def _split_statements(script):
+    """Split a migration script into individual statements"""
+    statements = []
+    buffer = ''
+    for line in script.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            if buffer.strip():
+                statements.append(buffer.strip())
+            buffer = ''
+    if buffer.strip():
+        statements.append(buffer.strip())
+    return statements
+
+def get_connection():
+    """Get the SQLite connection for the current thread"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        init_db()
+        conn = _connect()
+        _local.conn = conn
+    return conn
+
+@contextmanager
+def transaction():
+    """
+    Run a block of statements in a single write transaction
+
+    Yields:
+        sqlite3.Connection: Connection with an open IMMEDIATE transaction
+    """
+    conn = get_connection()
+    if conn.in_transaction:
+        # Nested use joins the outer transaction
+        yield conn
+        return
+
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        yield conn
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    else:
+        conn.execute('COMMIT')
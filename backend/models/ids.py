@@ -0,0 +1,126 @@
+import os
+import re
+import time
+import threading
+from datetime import datetime
+
+# ULID layout: 48-bit millisecond timestamp followed by 80 random bits,
+# written as 26 Crockford base32 characters so string order is time order
+ENCODING = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+ID_LENGTH = 26
+RANDOM_BITS = 80
+RANDOM_MAX = (1 << RANDOM_BITS) - 1
+
+ID_PATTERN = re.compile(f"^[{ENCODING}]{{{ID_LENGTH}}}$")
+
+_lock = threading.Lock()
+_last_ms = -1
+_last_random = 0
+
+def _reset_after_fork():
+    # A forked child must not continue the parent's sequence
+    global _last_ms, _last_random
+    _last_ms, _last_random = -1, 0
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+def _encode(value):
+    chars = []
+    for _ in range(ID_LENGTH):
+        chars.append(ENCODING[value & 31])
+        value >>= 5
+    return ''.join(reversed(chars))
+
+def _decode(value):
+    number = 0
+    for char in value:
+        number = (number << 5) | ENCODING.index(char)
+    return number
+
+def _to_ms(when):
+    if isinstance(when, datetime):
+        when = when.timestamp()
+    return int(when * 1000)
+
+def new_id():
+    """
+    Generate a unique, time-ordered record ID
+
+    IDs from one process are strictly increasing: within a millisecond, or
+    if the clock steps back, the random part of the previous ID is
+    incremented. Other processes draw fresh random bits, so their IDs sort
+    by millisecond and collide with probability ~2^-80.
+
+    Returns:
+        str: 26-character ID
+    """
+    global _last_ms, _last_random
+    with _lock:
+        ms = time.time_ns() // 1000000
+        if ms <= _last_ms:
+            ms = _last_ms
+            random_part = _last_random + 1
+            if random_part > RANDOM_MAX:
+                # 2^80 IDs in one millisecond: borrow the next one
+                ms += 1
+                random_part = int.from_bytes(os.urandom(10), 'big')
+        else:
+            random_part = int.from_bytes(os.urandom(10), 'big')
+        _last_ms, _last_random = ms, random_part
+    return _encode((ms << RANDOM_BITS) | random_part)
+
+def id_at(when):
+    """
+    Generate an ID for a past or future time, e.g. to re-key an old record
+
+    Args:
+        when (datetime or float): Local datetime or Unix timestamp in seconds
+
+    Returns:
+        str: 26-character ID with random low bits
+    """
+    return _encode((_to_ms(when) << RANDOM_BITS) | int.from_bytes(os.urandom(10), 'big'))
+
+def legacy_id(created_at):
+    """
+    Replacement ID for a record keyed by a timestamp or UUID
+
+    Args:
+        created_at (str): The record's ISO creation time
+
+    Returns:
+        str: ID for that time, or a new ID if created_at is missing or invalid
+    """
+    try:
+        return id_at(datetime.fromisoformat(created_at))
+    except (TypeError, ValueError):
+        return new_id()
+
+def is_id(value):
+    """Whether a value is an ID produced by this module"""
+    return isinstance(value, str) and bool(ID_PATTERN.match(value))
+
+def id_time(value):
+    """
+    Creation time encoded in an ID
+
+    Returns:
+        datetime: Local time, millisecond precision
+    """
+    return datetime.fromtimestamp((_decode(value) >> RANDOM_BITS) / 1000)
+
+def id_range(start=None, end=None):
+    """
+    ID bounds covering a creation time range, for ``id >= low AND id < high`` scans
+
+    Args:
+        start (datetime or float): Inclusive lower bound, None for the beginning
+        end (datetime or float): Exclusive upper bound, None for no limit
+
+    Returns:
+        tuple: (low, high) ID strings
+    """
+    low = _encode(_to_ms(start) << RANDOM_BITS) if start is not None else _encode(0)
+    high = _encode(_to_ms(end) << RANDOM_BITS) if end is not None else 'Z' * ID_LENGTH
+    return low, high
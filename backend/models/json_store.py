@@ -0,0 +1,188 @@
+import os
+import json
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Journal size that triggers compaction, unless the snapshot is larger still
+JOURNAL_COMPACT_BYTES = int(os.getenv('JOURNAL_COMPACT_BYTES', 1024 * 1024))  # 1MB
+
+class JournaledJSONStore:
+    """
+    Dict of id -> record persisted as a JSON snapshot plus an append-only journal
+
+    Writes append one JSON line to ``<path>.journal``, so they cost O(record)
+    instead of rewriting the file. Once the journal outgrows the snapshot it
+    is folded into a new snapshot, written to a temp file and renamed over
+    the old one, so readers never see a partial file. A lock file
+    serializes writers and compaction across processes (fcntl on POSIX,
+    msvcrt on Windows, where readers take the same exclusive lock).
+
+    Journal records are full upserts, so replaying one twice is harmless;
+    a line torn by a crash mid-append is skipped.
+    """
+
+    def __init__(self, path, compact_bytes=JOURNAL_COMPACT_BYTES):
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.compact_bytes = compact_bytes
+        self._thread_lock = threading.RLock()
+        self._lock_file = None
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    @contextmanager
+    def _locked(self, exclusive):
+        """Hold the cross-process lock; threads of this process queue on an RLock first"""
+        with self._thread_lock:
+            if self._lock_file is None:
+                self._lock_file = open(f"{self.path}.lock", 'a+')
+            fd = self._lock_file.fileno()
+
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                else:
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+    @staticmethod
+    def _stat(path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def snapshot_stamp(self):
+        """Identity of the current snapshot; changes on every compaction"""
+        return self._stat(self.path)
+
+    def journal_size(self):
+        """Bytes in the journal, 0 if there is none"""
+        stat = self._stat(self.journal_path)
+        return stat[2] if stat else 0
+
+    def _read_snapshot(self):
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _read_journal(self, offset):
+        """
+        Read journal records appended after a byte offset
+
+        Returns:
+            tuple: (records, offset just past the last complete line)
+        """
+        try:
+            with open(self.journal_path, 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return [], 0
+
+        end = data.rfind(b'\n') + 1
+        records = []
+        for line in data[:end].splitlines():
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # Remains of an append torn by a crash
+                continue
+        return records, offset + end
+
+    def load(self):
+        """
+        Read the snapshot and replay the journal over it
+
+        Returns:
+            tuple: (records by id, snapshot_stamp, journal offset) to pass to read_changes
+        """
+        with self._locked(exclusive=False):
+            records = self._read_snapshot()
+            changes, offset = self._read_journal(0)
+            stamp = self.snapshot_stamp()
+
+        for record in changes:
+            records[record['id']] = record
+        return records, stamp, offset
+
+    def read_changes(self, stamp, offset):
+        """
+        Read records written since a load
+
+        Args:
+            stamp: snapshot_stamp from load or a previous read_changes
+            offset (int): Journal offset from load or a previous read_changes
+
+        Returns:
+            tuple or None: (records, new offset), or None if the store was
+                compacted since and must be loaded again
+        """
+        if self.snapshot_stamp() != stamp:
+            return None
+        if self.journal_size() == offset:
+            return [], offset
+
+        with self._locked(exclusive=False):
+            if self.snapshot_stamp() != stamp:
+                return None
+            return self._read_journal(offset)
+
+    def put(self, record):
+        """
+        Durably upsert one record
+
+        Args:
+            record (dict): Record with an 'id' key
+        """
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+        with self._locked(exclusive=True):
+            with open(self.journal_path, 'ab+') as f:
+                # Terminate a torn line left by a crash so it stays on its own
+                if f.seek(0, os.SEEK_END):
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b'\n':
+                        line = '\n' + line
+                f.write(line.encode())
+                f.flush()
+                os.fsync(f.fileno())
+
+            snapshot = self._stat(self.path)
+            if self.journal_size() > max(self.compact_bytes, snapshot[2] if snapshot else 0):
+                self._compact()
+
+    def compact(self):
+        """Fold the journal into a new snapshot"""
+        with self._locked(exclusive=True):
+            self._compact()
+
+    def _compact(self):
+        records = self._read_snapshot()
+        changes, _ = self._read_journal(0)
+        for record in changes:
+            records[record['id']] = record
+
+        # Write to a temp file and rename so readers never see partial content
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(records, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+        # A crash before this truncate only replays records already in the snapshot
+        with open(self.journal_path, 'w'):
+            pass
@@ -0,0 +1,45 @@
+import os
+import json
+
+from models.database import transaction
+from models.ids import is_id, legacy_id
+from models.patent_model import Patent, PATENTS_FILE
+
+def migrate_patents_json(json_path=PATENTS_FILE):
+    """
+    One-shot import of the legacy patents.json file into the SQLite store
+
+    The whole file is imported in a single transaction and then renamed to
+    ``patents.json.migrated`` so the import never runs twice.
+
+    Args:
+        json_path (str): Path to the legacy patents.json file
+
+    Returns:
+        int: Number of patents imported
+    """
+    if not os.path.exists(json_path):
+        return 0
+
+    with open(json_path, 'r') as f:
+        patents = json.load(f)
+
+    with transaction() as conn:
+        for patent_id, patent_data in patents.items():
+            patent_data = dict(patent_data)
+            patent_data.setdefault('id', patent_id)
+            if not is_id(patent_data['id']):
+                new_patent_id = legacy_id(patent_data.get('created_at'))
+                conn.execute(
+                    'INSERT OR IGNORE INTO patent_id_aliases (old_id, id) VALUES (?, ?)',
+                    (patent_data['id'], new_patent_id)
+                )
+                patent_data['id'] = new_patent_id
+            Patent._upsert(conn, patent_data)
+
+    os.replace(json_path, json_path + '.migrated')
+    return len(patents)
+
+if __name__ == '__main__':
+    count = migrate_patents_json()
+    print(f"Migrated {count} patents to SQLite")
@@ -1,58 +1,94 @@
 import os
-import json
+import re
+from collections import namedtuple
 from datetime import datetime
 
-# Simple file-based storage for demonstration
-# In a production app, use a proper database like SQLite, PostgreSQL, etc.
+from models.database import get_connection, transaction
+from models.ids import new_id, id_range
+from services.metrics import timed
+
+# Patents are stored in the embedded SQLite database (see models/database.py)
+# The legacy JSON file is only read by the one-shot migrator in models/migrate.py
 PATENTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../data/patents.json')
 
-# Ensure data directory exists
-os.makedirs(os.path.dirname(PATENTS_FILE), exist_ok=True)
+# Column order shared by inserts and row hydration
+PATENT_FIELDS = ('id', 'title', 'description', 'category', 'owner_id', 'token_id', 'cid',
+                 'tx_hash', 'duration', 'created_at', 'for_sale', 'min_bid', 'sale_tx_hash')
+
+UPSERT_PATENT_SQL = f"""
+    INSERT INTO patents ({', '.join(PATENT_FIELDS)})
+    VALUES ({', '.join('?' for _ in PATENT_FIELDS)})
+    ON CONFLICT(id) DO UPDATE SET
+        {', '.join(f'{field} = excluded.{field}' for field in PATENT_FIELDS if field != 'id')}
+"""
+
+# Columns list paths load up front; description is fetched on first access
+PATENT_LIST_FIELDS = tuple(field for field in PATENT_FIELDS if field != 'description')
+
+# Column weights for bm25 ranking: title, description, category
+SEARCH_RANK_WEIGHTS = (10.0, 1.0, 5.0)
+
+# Words of description context around the matched terms in search results
+SEARCH_SNIPPET_TOKENS = 24
+
+# Read-only search result: the listed columns plus a description excerpt
+PatentSummary = namedtuple('PatentSummary', ('id', 'title', 'category', 'owner_id', 'token_id', 'cid',
+                                             'created_at', 'for_sale', 'snippet'))
+
+# Marks a description that has not been read from the database yet
+_UNLOADED = object()
 
 class Patent:
-    """Patent model for local storage of patent metadata"""
+    """
+    Patent model for local storage of patent metadata
+    
+    Instances are slotted, and patents loaded by list finders fetch their
+    description only when it is first read.
+    """
+    
+    __slots__ = ('id', 'title', '_description', 'category', 'owner_id', 'token_id', 'cid',
+                 'tx_hash', 'duration', 'created_at', 'for_sale', 'min_bid', 'sale_tx_hash')
     
     def __init__(self, id=None, title=None, description=None, category=None, 
                  owner_id=None, token_id=None, cid=None, tx_hash=None, duration=10,
-                 for_sale=False, min_bid=0, sale_tx_hash=None):
-        self.id = id or str(datetime.now().timestamp())
+                 for_sale=False, min_bid=0, sale_tx_hash=None, created_at=None):
+        self.id = id or new_id()
         self.title = title
-        self.description = description
+        self._description = description
         self.category = category
         self.owner_id = owner_id
         self.token_id = token_id
         self.cid = cid
         self.tx_hash = tx_hash
         self.duration = duration
-        self.created_at = datetime.now().isoformat()
-        self.for_sale = for_sale
+        self.created_at = created_at or datetime.now().isoformat()
+        self.for_sale = bool(for_sale)
         self.min_bid = min_bid
         self.sale_tx_hash = sale_tx_hash
     
+    @property
+    def description(self):
+        """Patent description, read from the database on first access if it was not loaded"""
+        if self._description is _UNLOADED:
+            row = get_connection().execute(
+                'SELECT description FROM patents WHERE id = ?', (self.id,)
+            ).fetchone()
+            self._description = row['description'] if row else None
+        return self._description
+    
+    @description.setter
+    def description(self, description):
+        self._description = description
+    
+    def to_dict(self):
+        """Serialize patent to a plain dict"""
+        return {field: getattr(self, field) for field in PATENT_FIELDS}
+    
+    @timed('patent.save', layer='model')
     def save(self):
         """Save patent to storage"""
-        patents = Patent.get_all_patents()
-        
-        # Add or update patent
-        patents[self.id] = {
-            'id': self.id,
-            'title': self.title,
-            'description': self.description,
-            'category': self.category,
-            'owner_id': self.owner_id,
-            'token_id': self.token_id,
-            'cid': self.cid,
-            'tx_hash': self.tx_hash,
-            'duration': self.duration,
-            'created_at': self.created_at,
-            'for_sale': self.for_sale,
-            'min_bid': self.min_bid,
-            'sale_tx_hash': self.sale_tx_hash
-        }
-        
-        # Write to file
-        with open(PATENTS_FILE, 'w') as f:
-            json.dump(patents, f, indent=2)
+        with transaction() as conn:
+            Patent._upsert(conn, self.to_dict())
     
     def update_sale_status(self, for_sale, min_bid, sale_tx_hash):
         """Update sale status of patent"""
@@ -70,62 +106,210 @@ class Patent:
         self.save()
     
     @staticmethod
+    def _upsert(conn, patent_data):
+        """Insert or update a single patent row inside an open transaction"""
+        values = [patent_data.get(field) for field in PATENT_FIELDS]
+        values[PATENT_FIELDS.index('for_sale')] = 1 if patent_data.get('for_sale') else 0
+        conn.execute(UPSERT_PATENT_SQL, values)
+    
+    @staticmethod
+    def _from_row(row):
+        """Build a Patent from a database row; rows without a description load it lazily"""
+        patent_data = dict(row)
+        patent_data.setdefault('description', _UNLOADED)
+        return Patent(**patent_data)
+    
+    @staticmethod
+    def _row_to_dict(row):
+        """Convert a database row to the dict layout used by the JSON store"""
+        patent_data = dict(row)
+        patent_data['for_sale'] = bool(patent_data['for_sale'])
+        return patent_data
+    
+    @staticmethod
+    @timed('patent.get_all_patents', layer='model')
     def get_all_patents():
         """Get all patents from storage"""
-        if not os.path.exists(PATENTS_FILE):
-            return {}
-        
-        try:
-            with open(PATENTS_FILE, 'r') as f:
-                return json.load(f)
-        except:
-            return {}
+        rows = get_connection().execute('SELECT * FROM patents ORDER BY created_at').fetchall()
+        return {row['id']: Patent._row_to_dict(row) for row in rows}
+    
+    @staticmethod
+    def resolve_id(patent_id):
+        """Map an ID from before patents were re-keyed to time-ordered IDs to the current one"""
+        row = get_connection().execute(
+            'SELECT id FROM patent_id_aliases WHERE old_id = ?', (patent_id,)
+        ).fetchone()
+        return row['id'] if row else patent_id
     
     @staticmethod
+    @timed('patent.find_by_id', layer='model')
     def find_by_id(patent_id):
-        """Find patent by ID"""
-        patents = Patent.get_all_patents()
-        patent_data = patents.get(patent_id)
+        """Find patent by ID, including IDs it had before it was re-keyed"""
+        row = get_connection().execute(
+            """
+            SELECT * FROM patents
+            WHERE id = COALESCE((SELECT id FROM patent_id_aliases WHERE old_id = ?), ?)
+            """,
+            (patent_id, patent_id)
+        ).fetchone()
         
-        if not patent_data:
+        if not row:
             return None
         
-        return Patent(**patent_data)
+        return Patent._from_row(row)
     
     @staticmethod
+    @timed('patent.find_by_token_id', layer='model')
     def find_by_token_id(token_id):
         """Find patent by token ID"""
-        patents = Patent.get_all_patents()
+        row = get_connection().execute(
+            'SELECT * FROM patents WHERE token_id = ? LIMIT 1', (int(token_id),)
+        ).fetchone()
         
-        for patent_id, patent_data in patents.items():
-            if patent_data['token_id'] == int(token_id):
-                return Patent(**patent_data)
+        if not row:
+            return None
         
-        return None
+        return Patent._from_row(row)
     
     @staticmethod
+    @timed('patent.find_by_owner', layer='model')
     def find_by_owner(owner_id):
-        """Find patents by owner ID"""
-        patents = Patent.get_all_patents()
-        owner_patents = []
+        """Find patents by owner ID; descriptions are loaded on first access"""
+        rows = get_connection().execute(
+            f"SELECT {', '.join(PATENT_LIST_FIELDS)} FROM patents WHERE owner_id = ? ORDER BY created_at",
+            (owner_id,)
+        ).fetchall()
+        
+        return [Patent._from_row(row) for row in rows]
+    
+    @staticmethod
+    @timed('patent.find_created_between', layer='model')
+    def find_created_between(start=None, end=None, limit=None):
+        """
+        Find patents created in a time range, oldest first
+        
+        Ids are time-ordered, so this is a range scan over the primary key.
         
-        for patent_id, patent_data in patents.items():
-            if patent_data['owner_id'] == owner_id:
-                owner_patents.append(Patent(**patent_data))
+        Args:
+            start (datetime or float): Inclusive lower bound, None for the beginning
+            end (datetime or float): Exclusive upper bound, None for no limit
+            limit (int): Maximum number of patents, None for all
         
-        return owner_patents
+        Returns:
+            list: Patents with descriptions loaded on first access
+        """
+        low, high = id_range(start, end)
+        rows = get_connection().execute(
+            f"SELECT {', '.join(PATENT_LIST_FIELDS)} FROM patents WHERE id >= ? AND id < ? ORDER BY id LIMIT ?",
+            (low, high, -1 if limit is None else limit)
+        ).fetchall()
+        
+        return [Patent._from_row(row) for row in rows]
+    
+    @staticmethod
+    @timed('patent.find_newest', layer='model')
+    def find_newest(limit=20, before_id=None):
+        """
+        Page through patents newest first
+        
+        Args:
+            limit (int): Page size
+            before_id (str): Id of the last patent on the previous page
+        
+        Returns:
+            list: Patents with descriptions loaded on first access
+        """
+        rows = get_connection().execute(
+            f"SELECT {', '.join(PATENT_LIST_FIELDS)} FROM patents WHERE id < ? ORDER BY id DESC LIMIT ?",
+            (before_id or id_range()[1], limit)
+        ).fetchall()
+        
+        return [Patent._from_row(row) for row in rows]
+    
+    @staticmethod
+    @timed('patent.find_by_cid', layer='model')
+    def find_by_cid(cid):
+        """Find patent by IPFS metadata CID"""
+        row = get_connection().execute('SELECT * FROM patents WHERE cid = ? LIMIT 1', (cid,)).fetchone()
+        
+        if not row:
+            return None
+        
+        return Patent._from_row(row)
+    
+    @staticmethod
+    @timed('patent.find_by_tx_hash', layer='model')
+    def find_by_tx_hash(tx_hash):
+        """Find patent by registration transaction hash"""
+        row = get_connection().execute(
+            'SELECT * FROM patents WHERE tx_hash = ? LIMIT 1', (tx_hash,)
+        ).fetchone()
+        
+        if not row:
+            return None
+        
+        return Patent._from_row(row)
+    
+    @staticmethod
+    def _fts_query(query):
+        """
+        Turn free text into an FTS5 prefix query
+        
+        Every word must match as a prefix, so results keep up with the
+        user while they are still typing.
+        
+        Returns:
+            str or None: FTS5 MATCH expression, or None if the query has no words
+        """
+        terms = re.findall(r'\w+', query.lower())
+        if not terms:
+            return None
+        
+        return ' '.join(f'"{term}"*' for term in terms)
     
     @staticmethod
-    def search(query):
-        """Search patents by title or description"""
-        patents = Patent.get_all_patents()
-        results = []
-        
-        query = query.lower()
-        for patent_id, patent_data in patents.items():
-            if (query in patent_data['title'].lower() or 
-                query in patent_data['description'].lower() or
-                query in patent_data['category'].lower()):
-                results.append(Patent(**patent_data))
-        
-        return results
\ No newline at end of file
+    @timed('patent.search', layer='model')
+    def search(query, limit=None, offset=0):
+        """
+        Search patents by title, description or category
+        
+        Args:
+            query (str): Free text query, matched by word prefix
+            limit (int, optional): Maximum number of results to return
+            offset (int): Number of ranked results to skip
+            
+        Returns:
+            list: PatentSummary views of the matching patents, best match first,
+                with a description snippet instead of the full text
+        """
+        match = Patent._fts_query(query)
+        if not match:
+            return []
+        
+        rows = get_connection().execute(
+            """
+            SELECT patents.id, patents.title, patents.category, patents.owner_id, patents.token_id,
+                   patents.cid, patents.created_at, patents.for_sale,
+                   snippet(patents_fts, 1, '', '', '...', ?) AS snippet
+            FROM patents_fts
+            JOIN patents ON patents.rowid = patents_fts.rowid
+            WHERE patents_fts MATCH ?
+            ORDER BY bm25(patents_fts, ?, ?, ?)
+            LIMIT ? OFFSET ?
+            """,
+            (SEARCH_SNIPPET_TOKENS, match, *SEARCH_RANK_WEIGHTS, -1 if limit is None else limit, offset)
+        ).fetchall()
+        
+        return [PatentSummary(*row[:-2], bool(row['for_sale']), row['snippet']) for row in rows]
+    
+    @staticmethod
+    @timed('patent.count_search', layer='model')
+    def count_search(query):
+        """Count patents matching a search query"""
+        match = Patent._fts_query(query)
+        if not match:
+            return 0
+        
+        return get_connection().execute(
+            'SELECT COUNT(*) FROM patents_fts WHERE patents_fts MATCH ?', (match,)
+        ).fetchone()[0]
@@ -1,108 +1,268 @@
 import os
 import json
-from flask_login import UserMixin
+import hashlib
+import threading
+from collections import OrderedDict
 from datetime import datetime
 
+from models.ids import new_id
+from models.json_store import JournaledJSONStore
+from services.metrics import timed
+
 # Simple file-based storage for demonstration
 # In a production app, use a proper database like SQLite, PostgreSQL, etc.
-USERS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../data/users.json')
+USERS_FILE = os.getenv('USERS_FILE',
+                       os.path.join(os.path.dirname(os.path.abspath(__file__)), '../data/users.json'))
+
+# Fields of a user that are cached in its session, everything but the password hash,
+# plus the stamp of the record they were read from
+PRINCIPAL_FIELDS = ('id', 'name', 'email', 'wallet_address', 'created_at', 'stamp')
+
+# Maximum number of hydrated User objects kept in memory
+USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', 1024))
 
 # Ensure data directory exists
 os.makedirs(os.path.dirname(USERS_FILE), exist_ok=True)
 
-class User(UserMixin):
-    """User model for authentication and profile management"""
+class UserRepository:
+    """
+    In-process view of the users store with hash indexes on id, email and wallet
+    
+    Records live in a JournaledJSONStore, so saves append a single line and
+    are safe across worker processes. Lookups cost two stat() calls plus a
+    dict access; records other processes appended are read incrementally,
+    and the file is only re-parsed after a compaction. Hydrated User objects
+    are kept in a bounded LRU and evicted whenever their record changes.
+    
+    Every record has a stamp, a hash of its content that is the same in all
+    processes and changes with any edit, so a copy of a user cached
+    elsewhere can be checked against the store without hydrating it.
+    """
+    
+    def __init__(self, path, cache_size=USER_CACHE_SIZE):
+        self.path = path
+        self.store = JournaledJSONStore(path)
+        self.cache_size = cache_size
+        self._lock = threading.RLock()
+        self._stamp = None
+        self._offset = 0
+        self._loaded = False
+        self._records = {}
+        self._ids_by_email = {}
+        self._ids_by_wallet = {}
+        self._cache = OrderedDict()
+        self._stamps = {}
+    
+    def _refresh(self):
+        """Pick up records written by this or any other process since the last look"""
+        if self._loaded:
+            changes = self.store.read_changes(self._stamp, self._offset)
+            if changes is not None:
+                records, self._offset = changes
+                for user_data in records:
+                    self._apply(user_data)
+                return
+        
+        self._records, self._stamp, self._offset = self.store.load()
+        self._ids_by_email = {}
+        self._ids_by_wallet = {}
+        for user_id, user_data in self._records.items():
+            self._index(user_id, user_data)
+        self._cache.clear()
+        self._stamps.clear()
+        self._loaded = True
+    
+    def _apply(self, user_data):
+        """Replace one record and its index entries"""
+        previous = self._records.get(user_data['id'])
+        if previous:
+            self._unindex(previous)
+        self._records[user_data['id']] = user_data
+        self._index(user_data['id'], user_data)
+        self._cache.pop(user_data['id'], None)
+        self._stamps.pop(user_data['id'], None)
+    
+    def _index(self, user_id, user_data):
+        """Add a record to the email and wallet indexes"""
+        self._ids_by_email[user_data['email']] = user_id
+        self._ids_by_wallet[user_data['wallet_address']] = user_id
+    
+    def _unindex(self, user_data):
+        """Remove a record from the email and wallet indexes"""
+        self._ids_by_email.pop(user_data['email'], None)
+        self._ids_by_wallet.pop(user_data['wallet_address'], None)
+    
+    @timed('users.all', layer='model')
+    def all(self):
+        """Get a copy of all user records keyed by id"""
+        with self._lock:
+            self._refresh()
+            return dict(self._records)
+    
+    @timed('users.get', layer='model')
+    def get(self, user_id):
+        """Get a hydrated User by id, served from the LRU when possible"""
+        with self._lock:
+            self._refresh()
+            
+            user = self._cache.get(user_id)
+            if user is not None:
+                self._cache.move_to_end(user_id)
+                return user
+            
+            user_data = self._records.get(user_id)
+            if not user_data:
+                return None
+            
+            user = User(
+                id=user_data['id'],
+                name=user_data['name'],
+                email=user_data['email'],
+                wallet_address=user_data['wallet_address'],
+                password_hash=user_data['password_hash'],
+                created_at=user_data.get('created_at'),
+                stamp=self._stamp_of(user_id, user_data)
+            )
+            self._cache[user_id] = user
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return user
+    
+    def _stamp_of(self, user_id, user_data):
+        """Hash a record's content, computed on first use and kept until it changes"""
+        stamp = self._stamps.get(user_id)
+        if stamp is None:
+            content = json.dumps(user_data, sort_keys=True).encode()
+            stamp = self._stamps[user_id] = hashlib.sha256(content).hexdigest()[:16]
+        return stamp
+    
+    @timed('users.stamp', layer='model')
+    def stamp(self, user_id):
+        """Get the current stamp of a user's record, or None if there is no such user"""
+        with self._lock:
+            self._refresh()
+            user_data = self._records.get(user_id)
+            return self._stamp_of(user_id, user_data) if user_data else None
+    
+    def get_by_email(self, email):
+        """Get a hydrated User by email"""
+        with self._lock:
+            self._refresh()
+            user_id = self._ids_by_email.get(email)
+        return self.get(user_id) if user_id else None
+    
+    def get_by_wallet(self, wallet_address):
+        """Get a hydrated User by wallet address"""
+        with self._lock:
+            self._refresh()
+            user_id = self._ids_by_wallet.get(wallet_address)
+        return self.get(user_id) if user_id else None
+    
+    @timed('users.put', layer='model')
+    def put(self, user_data):
+        """
+        Append a record to the users store and update the indexes
+        
+        Args:
+            user_data (dict): Serialized user record
+        """
+        with self._lock:
+            self.store.put(user_data)
+            self._refresh()
+
+# Shared repository for this process
+user_repository = UserRepository(USERS_FILE)
+
+class User:
+    """
+    User model for authentication and profile management
     
-    def __init__(self, id=None, name=None, email=None, wallet_address=None, password_hash=None):
-        self.id = id or str(datetime.now().timestamp())
+    Instances are slotted, so the Flask-Login user interface is implemented
+    here rather than inherited from UserMixin, which would add a __dict__.
+    """
+    
+    __slots__ = ('id', 'name', 'email', 'wallet_address', 'password_hash', 'created_at', 'stamp')
+    
+    # Flask-Login user interface
+    is_authenticated = True
+    is_active = True
+    is_anonymous = False
+    
+    def __init__(self, id=None, name=None, email=None, wallet_address=None, password_hash=None,
+                 created_at=None, stamp=None):
+        self.id = id or new_id()
         self.name = name
         self.email = email
         self.wallet_address = wallet_address
         self.password_hash = password_hash
-        self.created_at = datetime.now().isoformat()
+        self.created_at = created_at or datetime.now().isoformat()
+        self.stamp = stamp  # Stamp of the stored record this was read from, see UserRepository
+    
+    def get_id(self):
+        """Identifier stored in the session by Flask-Login"""
+        return str(self.id)
+    
+    def __eq__(self, other):
+        if isinstance(other, User):
+            return self.get_id() == other.get_id()
+        return NotImplemented
+    
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        if equal is NotImplemented:
+            return NotImplemented
+        return not equal
+    
+    __hash__ = object.__hash__
+    
+    def to_principal(self):
+        """Serialize the fields cached in the session, see PRINCIPAL_FIELDS"""
+        return {field: getattr(self, field) for field in PRINCIPAL_FIELDS}
+    
+    @staticmethod
+    def from_principal(principal):
+        """Rebuild a User from to_principal output; it has no password hash and cannot be saved"""
+        return User(**{field: principal[field] for field in PRINCIPAL_FIELDS})
     
     def save(self):
         """Save user to storage"""
-        users = User.get_all_users()
-        
-        # Add or update user
-        users[self.id] = {
+        if self.password_hash is None:
+            raise ValueError("Refusing to save a user without a password hash")
+        user_repository.put({
             'id': self.id,
             'name': self.name,
             'email': self.email,
             'wallet_address': self.wallet_address,
             'password_hash': self.password_hash,
             'created_at': self.created_at
-        }
-        
-        # Write to file
-        with open(USERS_FILE, 'w') as f:
-            json.dump(users, f, indent=2)
+        })
     
     @staticmethod
     def get_all_users():
         """Get all users from storage"""
-        if not os.path.exists(USERS_FILE):
-            return {}
-        
-        try:
-            with open(USERS_FILE, 'r') as f:
-                return json.load(f)
-        except:
-            return {}
+        return user_repository.all()
     
     @staticmethod
     def find_by_id(user_id):
         """Find user by ID"""
-        users = User.get_all_users()
-        user_data = users.get(user_id)
-        
-        if not user_data:
-            return None
-        
-        return User(
-            id=user_data['id'],
-            name=user_data['name'],
-            email=user_data['email'],
-            wallet_address=user_data['wallet_address'],
-            password_hash=user_data['password_hash']
-        )
+        return user_repository.get(user_id)
     
     @staticmethod
     def get_by_id(user_id):
         """Get user by ID - alias for find_by_id for Flask-Login"""
         return User.find_by_id(user_id)
     
+    @staticmethod
+    def get_stamp(user_id):
+        """Get the stamp of a user's stored record, see UserRepository.stamp"""
+        return user_repository.stamp(user_id)
+    
     @staticmethod
     def find_by_email(email):
         """Find user by email"""
-        users = User.get_all_users()
-        
-        for user_id, user_data in users.items():
-            if user_data['email'] == email:
-                return User(
-                    id=user_data['id'],
-                    name=user_data['name'],
-                    email=user_data['email'],
-                    wallet_address=user_data['wallet_address'],
-                    password_hash=user_data['password_hash']
-                )
-        
-        return None
+        return user_repository.get_by_email(email)
     
     @staticmethod
     def find_by_wallet(wallet_address):
         """Find user by wallet address"""
-        users = User.get_all_users()
-        
-        for user_id, user_data in users.items():
-            if user_data['wallet_address'] == wallet_address:
-                return User(
-                    id=user_data['id'],
-                    name=user_data['name'],
-                    email=user_data['email'],
-                    wallet_address=user_data['wallet_address'],
-                    password_hash=user_data['password_hash']
-                )
-        
-        return None
\ No newline at end of file
+        return user_repository.get_by_wallet(wallet_address)
@@ -1,10 +1,21 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, session, jsonify
 from flask_login import login_user, logout_user, login_required, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
 from models.user_model import User
+from services.password_service import HashingBusyError, hash_password, verify_and_upgrade
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
+# Seconds clients are asked to wait when the password hashing pool is full
+HASHING_RETRY_AFTER = 1
+
+def _hashing_busy(template):
+    """429 response for a request turned away by the password hashing pool"""
+    message = 'Too many sign-ins in progress, please try again in a moment'
+    if request.is_json:
+        return jsonify({'error': message}), 429, {'Retry-After': str(HASHING_RETRY_AFTER)}
+    flash(message, 'error')
+    return render_template(template), 429, {'Retry-After': str(HASHING_RETRY_AFTER)}
+
 @auth_bp.route('/signup', methods=['GET', 'POST'])
 def signup():
     """User registration route"""
@@ -43,11 +54,16 @@ def signup():
             return render_template('register.html')
         
         # Create new user
+        try:
+            password_hash = hash_password(password)
+        except HashingBusyError:
+            return _hashing_busy('register.html')
+        
         new_user = User(
             name=name,
             email=email,
             wallet_address=wallet_address,
-            password_hash=generate_password_hash(password)
+            password_hash=password_hash
         )
         new_user.save()
         
@@ -83,10 +99,14 @@ def login():
             email = request.form.get('email')
             password = request.form.get('password')
         
-        # Find user by email
+        # Find user by email; the hash is upgraded if its parameters are outdated
         user = User.find_by_email(email)
+        try:
+            valid = verify_and_upgrade(user, password)
+        except HashingBusyError:
+            return _hashing_busy('login.html')
         
-        if not user or not check_password_hash(user.password_hash, password):
+        if not valid:
             if request.is_json:
                 return jsonify({'error': 'Invalid email or password'}), 401
             flash('Please check your login details and try again.', 'error')
@@ -116,6 +136,7 @@ def login():
 def logout():
     """User logout route"""
     logout_user()
+    session.pop('_principal', None)
     
     # Check if the request is from API
     if request.headers.get('Accept') == 'application/json':
@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify, request
 from flask_login import login_required, current_user
+from services import blockchain_service
 from services.blockchain_service import get_contract_balance, get_transaction_status
 
 blockchain_bp = Blueprint('blockchain', __name__, url_prefix='/api/blockchain')
@@ -16,6 +17,11 @@ def contract_balance():
     balance = get_contract_balance()
     return jsonify({"balance": balance})
 
+@blockchain_bp.route('/providers')
+def providers():
+    """Get routing and health state of the RPC nodes"""
+    return jsonify(blockchain_service.provider_pool.stats())
+
 @blockchain_bp.route('/verify-signature', methods=['POST'])
 def verify_signature():
     """Verify a wallet signature"""
@@ -28,4 +34,32 @@ def verify_signature():
     from services.blockchain_service import verify_signature
     is_valid = verify_signature(message, signature, address)
     
-    return jsonify({"valid": is_valid})
\ No newline at end of file
+    return jsonify({"valid": is_valid})
+
+@blockchain_bp.route('/verify-signatures', methods=['POST'])
+def verify_signatures():
+    """
+    Verify a batch of wallet signatures
+    
+    Body: {"signatures": [{"message": ..., "signature": ..., "address": ...}, ...]},
+    at most SIGNATURE_BATCH_MAX entries. Returns {"results": [{"valid": bool}, ...]}
+    in the same order.
+    """
+    from services.signature_service import SIGNATURE_BATCH_MAX, verify_batch
+    
+    data = request.get_json(silent=True) or {}
+    entries = data.get('signatures')
+    if not isinstance(entries, list):
+        return jsonify({"error": "signatures must be a list"}), 400
+    if len(entries) > SIGNATURE_BATCH_MAX:
+        return jsonify({"error": f"At most {SIGNATURE_BATCH_MAX} signatures per request"}), 413
+    
+    items = []
+    for entry in entries:
+        fields = [entry.get(name) if isinstance(entry, dict) else None
+                  for name in ('message', 'signature', 'address')]
+        if not all(isinstance(field, str) for field in fields):
+            return jsonify({"error": "Each entry needs message, signature and address strings"}), 400
+        items.append(tuple(fields))
+    
+    return jsonify({"results": [{"valid": valid} for valid in verify_batch(items)]})
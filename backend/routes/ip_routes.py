@@ -1,17 +1,122 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, current_app
+from flask import (Blueprint, render_template, redirect, url_for, flash, request, jsonify, current_app, Response,
+                   stream_with_context, abort)
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
 import os
+import io
+import csv
 import json
 import uuid
+import base64
+import hashlib
 from datetime import datetime
 
-from services.ipfs_service import upload_to_ipfs, get_from_ipfs
-from services.blockchain_service import register_patent, get_all_patents, get_patent_details
+from services import blockchain_service
+from services.ipfs_service import upload_stream_to_ipfs, get_from_ipfs
+from services.blockchain_service import get_patents_page, get_patent_details
+from services.job_queue import get_job
+from services.registration_service import submit_registration, record_upload, get_upload
+from services.event_indexer import INDEXER_ENABLED
+from models import chain_state
 from models.patent_model import Patent
+from models.user_model import User
 
 ip_bp = Blueprint('ip', __name__, url_prefix='/api/ip')
 
+# Search result paging
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+
+# Patent list paging
+PATENTS_PAGE_SIZE = 20
+PATENTS_MAX_PAGE_SIZE = 100
+
+# Catalogue export
+EXPORT_FIELDS = ('token_id', 'owner', 'cid', 'registration_time', 'is_for_sale', 'min_bid', 'sale_end_time',
+                 'highest_bidder', 'highest_bid', 'title', 'category', 'description', 'updated_block')
+EXPORT_CHUNK_SIZE = 64 * 1024  # Bytes of rows buffered per write to the client
+EXPORT_MIMETYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+def _encode_cursor(sort, key):
+    """Pack a sort order and the last sort key of a page into an opaque token"""
+    payload = json.dumps({'sort': sort, 'key': key}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+def _decode_cursor(cursor, sort):
+    """Unpack a cursor from _encode_cursor, checking it belongs to the same sort order"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        key = payload['key']
+    except (ValueError, TypeError, KeyError):
+        raise ValueError('Invalid cursor')
+    if payload.get('sort') != sort or not isinstance(key, list):
+        raise ValueError('Cursor does not match the requested sort order')
+    return key
+
+def _parse_bool(value):
+    """Parse an optional true/false query parameter"""
+    if value in (None, ''):
+        return None
+    return value.lower() in ('1', 'true', 'yes')
+
+def _export_lines(patents, fmt):
+    """Format patents as NDJSON or CSV lines, grouped into chunks of about EXPORT_CHUNK_SIZE"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == 'csv':
+        writer.writerow(EXPORT_FIELDS)
+    
+    for patent in patents:
+        if fmt == 'csv':
+            writer.writerow([patent[field] for field in EXPORT_FIELDS])
+        else:
+            buffer.write(json.dumps({field: patent[field] for field in EXPORT_FIELDS}))
+            buffer.write('\n')
+        
+        if buffer.tell() >= EXPORT_CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def _chain_page(sort, per_page, after, category, owner, for_sale):
+    """
+    Read a page straight from the chain while the event index is not synced
+    
+    Filters are applied to the token range that was read, so a filtered page
+    can hold fewer than per_page patents; next_key still advances past it.
+    """
+    if sort not in ('newest', 'oldest'):
+        raise ValueError(f'Sort order {sort} needs the event index, which has not synced yet')
+    
+    patents, next_token_id = get_patents_page(per_page, after[0] if after else None,
+                                              descending=sort == 'newest')
+    page = []
+    for patent in patents:
+        if owner and patent['owner'].lower() != owner.lower():
+            continue
+        if for_sale is not None and patent['is_for_sale'] != for_sale:
+            continue
+        
+        local = Patent.find_by_token_id(patent['token_id'])
+        if category and (not local or local.category != category):
+            continue
+        patent.update(title=local.title if local else None,
+                      description=local.description if local else None,
+                      category=local.category if local else None)
+        page.append(patent)
+    
+    return page, [next_token_id] if next_token_id else None
+
+def _register_error(message):
+    """Reject a registration form with 400, as JSON or by re-rendering the form"""
+    if request.headers.get('Accept') == 'application/json':
+        return jsonify({'error': message}), 400
+    flash(message, 'error')
+    return render_template('register_patent.html'), 400
+
 @ip_bp.route('/register', methods=['GET', 'POST'])
 @login_required
 def register_ip():
@@ -21,75 +126,209 @@ def register_ip():
         title = request.form.get('title')
         description = request.form.get('description')
         category = request.form.get('category')
-        duration = request.form.get('duration', 10)  # Default 10 years
+        duration = request.form.get('duration', '10')  # Default 10 years
         
         # Validate inputs
         if not title or not description or not category:
-            flash('Title, description, and category are required', 'error')
-            return render_template('register_patent.html')
+            return _register_error('Title, description, and category are required')
+        if not duration.isdecimal() or int(duration) < 1:
+            return _register_error('Duration must be a whole number of years')
         
-        # Handle file upload if provided
-        file_path = None
-        if 'file' in request.files:
+        # A file may already have been streamed to IPFS through /upload; only
+        # files this user pinned there are accepted, with the hash recorded then
+        file_cid = request.form.get('file_cid') or None
+        file_sha256 = None
+        if file_cid:
+            upload = get_upload(current_user.id, file_cid)
+            if not upload:
+                return _register_error('file_cid must be a CID returned by /upload')
+            file_sha256 = upload['sha256']
+        
+        # Otherwise spool the upload once so the background job can pin it
+        file_path = filename = content_type = None
+        if not file_cid and 'file' in request.files:
             file = request.files['file']
             if file.filename:
                 filename = secure_filename(file.filename)
-                unique_filename = f"{uuid.uuid4()}_{filename}"
-                file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], unique_filename)
+                content_type = file.mimetype
+                file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], f"{uuid.uuid4()}_{filename}")
                 file.save(file_path)
         
-        # Create metadata JSON
-        metadata = {
-            "title": title,
-            "description": description,
-            "category": category,
-            "duration": int(duration),
-            "creator": current_user.wallet_address,
-            "createdAt": datetime.now().isoformat(),
-        }
-        
-        # Upload file to IPFS if exists
-        if file_path:
-            file_cid = upload_to_ipfs(file_path)
-            metadata["file_cid"] = file_cid
-        
-        # Upload metadata to IPFS
-        metadata_cid = upload_to_ipfs(json_data=metadata)
-        
-        # Register patent on blockchain
-        tx_hash, token_id = register_patent(
+        # Upload, pinning, chain submission and persistence run in a background job
+        job_id = submit_registration(
+            user_id=current_user.id,
             wallet_address=current_user.wallet_address,
-            cid=metadata_cid
-        )
-        
-        # Store in local database
-        patent = Patent(
             title=title,
             description=description,
             category=category,
-            owner_id=current_user.id,
-            token_id=token_id,
-            cid=metadata_cid,
-            tx_hash=tx_hash,
-            duration=int(duration)
+            duration=int(duration),
+            file_path=file_path,
+            filename=filename,
+            content_type=content_type,
+            file_cid=file_cid,
+            file_sha256=file_sha256
         )
-        patent.save()
+        status_url = url_for('ip.job_status', job_id=job_id)
         
-        flash('Patent registered successfully!', 'success')
-        return redirect(url_for('ip.view_patent', token_id=token_id))
+        if request.headers.get('Accept') == 'application/json':
+            return jsonify({'job_id': job_id, 'status_url': status_url}), 202, {'Location': status_url}
+        
+        flash(f'Patent registration submitted (job {job_id}). It will appear once it is confirmed.', 'success')
+        return redirect(url_for('ip.list_patents'))
     
     return render_template('register_patent.html')
 
+@ip_bp.route('/jobs/<job_id>')
+@login_required
+def job_status(job_id):
+    """Route to check the progress of a background registration job"""
+    job = get_job(job_id)
+    if not job or job['payload'].get('user_id') != current_user.id:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    response = {
+        'id': job['id'],
+        'status': job['status'],
+        'stage': job['stage'],
+        'attempts': job['attempts'],
+        'error': job['error'],
+        'result': job['result'],
+        'created_at': job['created_at'],
+        'updated_at': job['updated_at']
+    }
+    if job['status'] == 'succeeded':
+        response['patent_url'] = url_for('ip.view_patent', token_id=job['result']['token_id'])
+    
+    return jsonify(response)
+
+@ip_bp.route('/upload', methods=['POST'])
+@login_required
+def upload_file():
+    """
+    Stream a raw request body straight to IPFS
+    
+    The body is the file itself (not multipart) and is piped to Filebase in
+    chunks as it arrives, so large drawings never touch local disk. The
+    returned CID can be passed to /register as file_cid.
+    """
+    max_length = current_app.config['MAX_CONTENT_LENGTH']
+    if max_length and request.content_length and request.content_length > max_length:
+        return jsonify({'error': 'File too large'}), 413
+    
+    filename = secure_filename(request.headers.get('X-Filename') or request.args.get('filename') or 'upload')
+    cid, sha256 = upload_stream_to_ipfs(request.stream, filename, request.mimetype)
+    record_upload(current_user.id, cid, sha256, filename)
+    
+    return jsonify({'cid': cid, 'sha256': sha256}), 201
+
 @ip_bp.route('/patents')
 def list_patents():
-    """Route to list all patents"""
-    patents = get_all_patents()
-    return render_template('patents.html', patents=patents)
+    """
+    Route to list patents a page at a time
+    
+    Query parameters: per_page (capped at PATENTS_MAX_PAGE_SIZE), sort
+    (newest, oldest or ending_soon), category, owner, for_sale, and either
+    the cursor from the previous page's next_cursor or an offset.
+    """
+    per_page = min(max(request.args.get('per_page', PATENTS_PAGE_SIZE, type=int), 1), PATENTS_MAX_PAGE_SIZE)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    sort = request.args.get('sort', 'newest')
+    category = request.args.get('category') or None
+    owner = request.args.get('owner') or None
+    for_sale = _parse_bool(request.args.get('for_sale'))
+    wants_json = request.headers.get('Accept') == 'application/json'
+    
+    try:
+        if sort not in chain_state.PATENT_SORTS:
+            raise ValueError(f'Unknown sort order {sort}')
+        if sort == 'ending_soon' and for_sale is False:
+            raise ValueError('Sort order ending_soon only lists patents for sale')
+        cursor = request.args.get('cursor')
+        after = _decode_cursor(cursor, sort) if cursor else None
+        
+        # Serve from the event-indexed store once it has synced
+        if chain_state.is_synced():
+            patents, next_key = chain_state.list_patents(sort, per_page, after, offset,
+                                                         category=category, owner=owner, for_sale=for_sale)
+        else:
+            patents, next_key = _chain_page(sort, per_page, after, category, owner, for_sale)
+    except ValueError as e:
+        if wants_json:
+            return jsonify({'error': str(e)}), 400
+        flash(str(e), 'error')
+        return redirect(url_for('ip.list_patents'))
+    
+    next_cursor = _encode_cursor(sort, next_key) if next_key else None
+    if wants_json:
+        return jsonify({'patents': patents, 'next_cursor': next_cursor, 'per_page': per_page})
+    
+    filters = {'category': category, 'owner': owner, 'for_sale': request.args.get('for_sale', '')}
+    return render_template('patents.html', patents=patents, next_cursor=next_cursor,
+                          sort=sort, per_page=per_page, filters=filters)
+
+@ip_bp.route('/patents/export')
+def export_patents():
+    """
+    Stream the whole patent catalogue as NDJSON or CSV
+    
+    Query parameters: format (ndjson or csv) and since, a block number. With
+    since, only patents changed by events after that block are exported.
+    The X-Catalogue-Block response header is the block the export is
+    current to, to pass as since on the next sync. The ETag changes
+    whenever the catalogue does, so If-None-Match skips unchanged exports.
+    
+    An export with since only lists patents changed by newer events, so it
+    misses patents that a chain reorg removed or set back. The
+    X-Catalogue-Reorgs header counts the reorgs rolled back so far; when it
+    differs from the value sent with the export that since came from, the
+    client must fetch a full export instead.
+    """
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_MIMETYPES:
+        return jsonify({'error': f'Unknown export format {fmt}'}), 400
+    
+    since = request.args.get('since')
+    if since is not None:
+        if not since.isdigit():
+            return jsonify({'error': 'since must be a block number'}), 400
+        since = int(since)
+    
+    checkpoint = chain_state.get_checkpoint()
+    if checkpoint is None:
+        return jsonify({'error': 'The patent index has not synced yet'}), 503
+    
+    version = f"{chain_state.catalogue_version()}:{fmt}:{since}"
+    etag = hashlib.sha1(version.encode()).hexdigest()
+    headers = {'X-Catalogue-Block': str(checkpoint['block_number']),
+               'X-Catalogue-Reorgs': str(chain_state.get_reorg_count())}
+    if request.if_none_match.contains(etag):
+        response = Response(status=304, headers=headers)
+    else:
+        body = _export_lines(chain_state.iter_patents(since=since), fmt)
+        response = Response(stream_with_context(body), mimetype=EXPORT_MIMETYPES[fmt], headers=headers)
+    response.set_etag(etag)
+    return response
 
-@ip_bp.route('/patent/<token_id>')
+@ip_bp.route('/patent/<int:token_id>')
 def view_patent(token_id):
     """Route to view a specific patent"""
-    patent_details = get_patent_details(token_id)
+    patent_details = chain_state.get_patent(token_id)
+    if not patent_details:
+        # Not indexed yet, read it from the chain
+        patent_details = get_patent_details(token_id)
+    
+    wants_json = request.headers.get('Accept') == 'application/json'
+    if not patent_details:
+        if wants_json:
+            return jsonify({'error': 'Patent not found'}), 404
+        abort(404)
+    
+    if wants_json:
+        local = Patent.find_by_token_id(token_id)
+        patent_details.update(title=local.title if local else None,
+                              description=local.description if local else None,
+                              category=local.category if local else None)
+        return jsonify(patent_details)
     
     # Get metadata from IPFS
     metadata = get_from_ipfs(patent_details['cid'])
@@ -102,13 +341,25 @@ def view_patent(token_id):
 def search_patents():
     """Route to search patents"""
     query = request.args.get('q', '')
+    wants_json = request.headers.get('Accept') == 'application/json'
     if not query:
+        if wants_json:
+            return jsonify({'patents': [], 'total': 0, 'page': 1})
         return render_template('search.html', patents=[])
     
-    # Search in local database
-    patents = Patent.search(query)
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', SEARCH_PAGE_SIZE, type=int), 1), SEARCH_MAX_PAGE_SIZE)
+    
+    # Search in local full-text index
+    patents = Patent.search(query, limit=per_page, offset=(page - 1) * per_page)
+    total = Patent.count_search(query)
+    
+    if wants_json:
+        return jsonify({'patents': [patent._asdict() for patent in patents], 'total': total,
+                        'page': page, 'per_page': per_page})
     
-    return render_template('search.html', patents=patents, query=query)
+    return render_template('search.html', patents=patents, query=query,
+                          total=total, page=page, per_page=per_page)
 
 @ip_bp.route('/list-for-sale/<token_id>', methods=['GET', 'POST'])
 @login_required
@@ -173,10 +424,15 @@ def accept_bid(token_id, bidder_address):
         bidder_address=bidder_address
     )
     
-    # Update patent ownership in database
-    # This would typically be done via an event listener
-    # but for simplicity we'll do it here
-    patent.update_owner(bidder_address)
+    if INDEXER_ENABLED:
+        # services/event_indexer.py moves ownership in the local store once
+        # the BidAccepted event is mined
+        flash('Bid accepted successfully! Ownership will transfer once the transaction is confirmed.', 'success')
+    else:
+        # Without the indexer nothing else updates the local store, so record
+        # the sale here; an indexer started later reconciles from the event
+        buyer = User.find_by_wallet(bidder_address)
+        patent.update_owner(buyer.id if buyer else bidder_address)
+        flash('Bid accepted successfully! Ownership transferred.', 'success')
     
-    flash('Bid accepted successfully! Ownership transferred.', 'success')
     return redirect(url_for('ip.view_patent', token_id=token_id))
\ No newline at end of file
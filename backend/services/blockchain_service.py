@@ -1,9 +1,13 @@
 import os
-import json
-from web3 import Web3
-from eth_account.messages import encode_defunct
+import functools
+import threading
 from dotenv import load_dotenv
 
+from services import io_pool, contract_abi
+from services.multicall import batch_call
+from services.chain_cache import TokenCache
+from services.metrics import timed
+
 # Load environment variables
 load_dotenv()
 
@@ -12,55 +16,227 @@ ALCHEMY_API_KEY = os.getenv('ALCHEMY_API_KEY')
 ALCHEMY_NETWORK = os.getenv('ALCHEMY_NETWORK', 'goerli')  # Default to Goerli testnet
 ALCHEMY_URL = f"https://eth-{ALCHEMY_NETWORK}.g.alchemy.com/v2/{ALCHEMY_API_KEY}"
 
+# Additional or replacement RPC nodes, comma-separated; defaults to Alchemy alone
+WEB3_PROVIDER_URLS = [url.strip() for url in os.getenv('WEB3_PROVIDER_URLS', '').split(',') if url.strip()]
+
 # Contract configuration
 CONTRACT_ADDRESS = os.getenv('CONTRACT_ADDRESS')
-CONTRACT_ABI_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 
-                               '../contracts/abi/IPNFT.json')
+CONTRACT_ABI_PATH = contract_abi.CONTRACT_ABI_PATH
+
+# Per-token reads for patent pages, dropped when the token emits an event
+patent_cache = TokenCache()
+
+class _Chain:
+    """
+    Web3 connection and the objects bound to it
+    
+    Importing web3 takes about half a second, so none of this is built
+    until the first call that talks to the chain.
+    """
+    
+    def __init__(self):
+        from web3 import Web3
+        from services.provider_pool import ProviderPool
+        from services.chain_cache import LogInvalidator
+        from services.tx_manager import NonceManager, GasOracle, GasEstimator
+        
+        # Web3 over a pool of nodes with failover
+        self.provider_pool = ProviderPool(WEB3_PROVIDER_URLS or [ALCHEMY_URL])
+        self.w3 = Web3(self.provider_pool)
+        
+        abi = contract_abi.get_abi()
+        if CONTRACT_ADDRESS and abi:
+            self.contract = self.w3.eth.contract(address=CONTRACT_ADDRESS, abi=abi)
+        else:
+            self.contract = None
+        
+        # Local nonce allocation, cached fees and memoized gas limits, so
+        # building a transaction needs no RPC once they are warm
+        self.nonce_manager = NonceManager(self.w3)
+        self.gas_oracle = GasOracle(self.w3)
+        self.gas_estimator = GasEstimator()
+        
+        self.patent_cache_invalidator = (
+            LogInvalidator(self.w3, CONTRACT_ADDRESS, patent_cache) if self.contract else None
+        )
+
+_chain = None
+_chain_lock = threading.Lock()
 
-# Initialize Web3
-w3 = Web3(Web3.HTTPProvider(ALCHEMY_URL))
+def _get_chain():
+    global _chain
+    if _chain is None:
+        with _chain_lock:
+            if _chain is None:
+                _chain = _Chain()
+    return _chain
 
-# Load contract ABI
-try:
-    with open(CONTRACT_ABI_PATH, 'r') as f:
-        contract_abi = json.load(f)
-except FileNotFoundError:
-    contract_abi = []  # Will be populated after contract deployment
+def get_web3():
+    """Get the process-wide Web3 instance, connecting on first use"""
+    return _get_chain().w3
+
+def get_contract():
+    """Get the IPNFT contract, or None if it is not configured"""
+    return _get_chain().contract
+
+def __getattr__(name):
+    # Keep `blockchain_service.w3`, `.contract` etc. working without building
+    # them at import time
+    if name in ('w3', 'contract', 'provider_pool', 'nonce_manager', 'gas_oracle',
+                'gas_estimator', 'patent_cache_invalidator'):
+        return getattr(_get_chain(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+@functools.lru_cache(maxsize=None)
+def get_chain_id():
+    """Chain ID of the connected node, fetched once"""
+    return get_web3().eth.chain_id
+
+def get_transaction_params_async(wallet_address):
+    """
+    Start warming the nonce and fee caches for a transaction
+    
+    Both lookups run concurrently on the shared I/O pool, so callers can start
+    them early and overlap them with other work such as IPFS uploads. No
+    nonce is reserved until get_transaction_params is called.
+    
+    Args:
+        wallet_address (str): Ethereum wallet address sending the transaction
+        
+    Returns:
+        dict: Futures for the 'nonce' and 'fees' lookups
+    """
+    chain = _get_chain()
+    return {
+        'nonce': io_pool.submit(chain.nonce_manager.prime, wallet_address),
+        'fees': io_pool.submit(chain.gas_oracle.fee_params)
+    }
+
+@timed('blockchain.get_transaction_params')
+def get_transaction_params(wallet_address, pending=None):
+    """
+    Reserve a nonce and get fee parameters for a transaction
+    
+    Args:
+        wallet_address (str): Ethereum wallet address sending the transaction
+        pending (dict, optional): Futures from get_transaction_params_async
+        
+    Returns:
+        dict: 'nonce' plus 'gasPrice' or EIP-1559 fee fields for build_transaction
+    """
+    chain = _get_chain()
+    if pending:
+        pending['nonce'].result()
+        fees = pending['fees'].result()
+    else:
+        fees = chain.gas_oracle.fee_params()
+    
+    return {'nonce': chain.nonce_manager.allocate(wallet_address), **fees}
+
+def _build_transaction(function_call, wallet_address, tx_params=None, value=0):
+    """
+    Build a transaction for a contract function call
+    
+    Args:
+        function_call: Bound contract function, e.g. contract.functions.registerPatent(cid)
+        wallet_address (str): Ethereum wallet address sending the transaction
+        tx_params (dict, optional): Result of get_transaction_params
+        value (int): Wei sent with the call
+        
+    Returns:
+        dict: Unsigned transaction
+    """
+    chain = _get_chain()
+    # Callers that reserved their own nonce also release it on failure
+    owns_nonce = tx_params is None
+    tx_params = tx_params or get_transaction_params(wallet_address)
+    try:
+        params = {
+            'from': wallet_address,
+            'chainId': get_chain_id(),
+            'gas': chain.gas_estimator.estimate(function_call, wallet_address, value),
+            **tx_params
+        }
+        if value:
+            params['value'] = value
+        
+        return function_call.build_transaction(params)
+    except Exception as e:
+        if is_nonce_error(e):
+            resync_nonce(wallet_address)
+        elif owns_nonce:
+            release_nonce(wallet_address, tx_params)
+        raise
+
+def is_nonce_error(error):
+    """Check whether the node rejected a transaction because its nonce is out of step"""
+    return 'nonce' in str(error).lower()
+
+def release_nonce(wallet_address, tx):
+    """
+    Give back the nonce of a transaction that will not be sent from here
+    
+    Args:
+        wallet_address (str): Ethereum wallet address the nonce was reserved for
+        tx (dict): Built transaction or get_transaction_params result
+    """
+    _get_chain().nonce_manager.release(wallet_address, tx['nonce'])
+
+def resync_nonce(wallet_address):
+    """
+    Drop the local nonce of a wallet so the next transaction reads it from the node
+    
+    Args:
+        wallet_address (str): Ethereum wallet address whose nonce is out of step
+    """
+    _get_chain().nonce_manager.resync(wallet_address)
 
-# Initialize contract
-if CONTRACT_ADDRESS and contract_abi:
-    contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=contract_abi)
-else:
-    contract = None
+@timed('blockchain.send_transaction')
+def send_transaction(wallet_address, raw_transaction):
+    """
+    Broadcast a signed transaction
+    
+    If the node rejects it, whether or not its nonce was used up is unknown
+    (a timeout may still have broadcast it), so the wallet's nonce is read
+    from the node again on the next transaction.
+    
+    Args:
+        wallet_address (str): Ethereum wallet address that signed the transaction
+        raw_transaction (bytes): Signed transaction
+        
+    Returns:
+        str: Transaction hash
+    """
+    try:
+        return get_web3().eth.send_raw_transaction(raw_transaction).hex()
+    except Exception:
+        resync_nonce(wallet_address)
+        raise
 
-def register_patent(wallet_address, cid):
+@timed('blockchain.register_patent')
+def register_patent(wallet_address, cid, tx_params=None):
     """
     Register a new patent on the blockchain
     
     Args:
         wallet_address (str): Ethereum wallet address of the patent owner
         cid (str): IPFS CID of the patent metadata
+        tx_params (dict, optional): Reserved nonce and fees from get_transaction_params
         
     Returns:
         tuple: (transaction_hash, token_id)
     """
+    contract = get_contract()
     if not contract:
         raise Exception("Contract not initialized")
     
-    # Get nonce for the transaction
-    nonce = w3.eth.get_transaction_count(wallet_address)
-    
     # Build transaction
-    tx = contract.functions.registerPatent(cid).build_transaction({
-        'from': wallet_address,
-        'nonce': nonce,
-        'gas': 2000000,
-        'gasPrice': w3.eth.gas_price
-    })
+    tx = _build_transaction(contract.functions.registerPatent(cid), wallet_address, tx_params)
     
     # Note: In a real application, this transaction would be signed by the user's wallet
     # Here we're assuming the transaction is signed and submitted by the user's wallet
     # and we're just returning the transaction hash and a placeholder token ID
+    release_nonce(wallet_address, tx)
     
     # For demonstration purposes, we'll return a placeholder
     tx_hash = "0x" + "0" * 64  # Placeholder transaction hash
@@ -68,6 +244,47 @@ def register_patent(wallet_address, cid):
     
     return tx_hash, token_id
 
+@timed('blockchain.read_patents')
+def _read_patents(token_ids, block_number):
+    """
+    Read patent and sale details for a range of tokens at one block
+    
+    getPatent and getSaleDetails for every token are batched through
+    Multicall3, so a range costs a handful of RPC round trips.
+    """
+    w3, contract = get_web3(), get_contract()
+    
+    calls = []
+    for token_id in token_ids:
+        calls.append(contract.functions.getPatent(token_id))
+        calls.append(contract.functions.getSaleDetails(token_id))
+    results = batch_call(w3, calls, block_identifier=block_number)
+    
+    patents = []
+    for index, token_id in enumerate(token_ids):
+        patent_result, sale_result = results[2 * index], results[2 * index + 1]
+        if patent_result is None:
+            print(f"Error getting patent {token_id}")
+            continue
+        
+        owner, cid, registration_time = patent_result
+        is_for_sale, min_bid, sale_end_time = sale_result or (False, 0, 0)
+        
+        # Get metadata from IPFS (this would be handled by the frontend)
+        # Here we just return the CID
+        patents.append({
+            'token_id': token_id,
+            'owner': owner,
+            'cid': cid,
+            'registration_time': registration_time,
+            'is_for_sale': is_for_sale,
+            'min_bid': min_bid,
+            'sale_end_time': sale_end_time
+        })
+    
+    return patents
+
+@timed('blockchain.get_all_patents')
 def get_all_patents():
     """
     Get all patents from the blockchain
@@ -75,52 +292,89 @@ def get_all_patents():
     Returns:
         list: List of patent metadata
     """
+    contract = get_contract()
     if not contract:
         raise Exception("Contract not initialized")
     
+    # Read everything at one block so supply and details agree
+    block_number = get_web3().eth.block_number
+    
     # Get total supply of tokens
-    total_supply = contract.functions.totalSupply().call()
+    total_supply = contract.functions.totalSupply().call(block_identifier=block_number)
+    return _read_patents(range(1, total_supply + 1), block_number)
+
+@timed('blockchain.get_patents_page')
+def get_patents_page(limit, after_token_id=None, descending=True):
+    """
+    Get one page of patents by token ID straight from the chain
     
-    patents = []
-    for token_id in range(1, total_supply + 1):
-        try:
-            # Get patent details
-            owner, cid, registration_time = contract.functions.getPatent(token_id).call()
-            
-            # Get metadata from IPFS (this would be handled by the frontend)
-            # Here we just return the CID
-            patents.append({
-                'token_id': token_id,
-                'owner': owner,
-                'cid': cid,
-                'registration_time': registration_time
-            })
-        except Exception as e:
-            print(f"Error getting patent {token_id}: {e}")
+    Only the requested range of token IDs is read, so a page costs the same
+    however many patents exist. Used until the event index has synced.
     
-    return patents
+    Args:
+        limit (int): Number of token IDs to read
+        after_token_id (int, optional): Last token ID of the previous page
+        descending (bool): Newest first if True, oldest first otherwise
+        
+    Returns:
+        tuple: (patents, next_token_id) where next_token_id is None on the last page
+    """
+    contract = get_contract()
+    if not contract:
+        raise Exception("Contract not initialized")
+    
+    block_number = get_web3().eth.block_number
+    total_supply = contract.functions.totalSupply().call(block_identifier=block_number)
+    
+    if descending:
+        first = total_supply if after_token_id is None else min(after_token_id - 1, total_supply)
+        token_ids = range(first, max(first - limit, 0), -1)
+        has_more = bool(token_ids) and token_ids[-1] > 1
+    else:
+        first = 1 if after_token_id is None else after_token_id + 1
+        token_ids = range(first, min(first + limit - 1, total_supply) + 1)
+        has_more = bool(token_ids) and token_ids[-1] < total_supply
+    
+    next_token_id = token_ids[-1] if has_more else None
+    return _read_patents(token_ids, block_number), next_token_id
 
+@timed('blockchain.get_patent_details')
 def get_patent_details(token_id):
     """
     Get details of a specific patent
     
+    Reads go through patent_cache: a token is re-read after a contract event
+    mentions it or after at most one block time, and concurrent viewers of
+    the same token share one RPC.
+    
     Args:
         token_id (int): Token ID of the patent
         
     Returns:
-        dict: Patent details
+        dict or None: Patent details, or None if the token does not exist
     """
-    if not contract:
+    if not get_contract():
         raise Exception("Contract not initialized")
     
-    # Get patent details
-    owner, cid, registration_time = contract.functions.getPatent(token_id).call()
+    token_id = int(token_id)
+    _get_chain().patent_cache_invalidator.poll()
+    details = patent_cache.get(token_id, _fetch_patent_details)
+    return dict(details) if details else None
+
+def _fetch_patent_details(token_id):
+    contract = get_contract()
     
-    # Check if patent is for sale
-    try:
-        is_for_sale, min_bid, sale_end_time = contract.functions.getSaleDetails(token_id).call()
-    except:
-        is_for_sale, min_bid, sale_end_time = False, 0, 0
+    # Get patent and sale details in one round trip
+    patent_result, sale_result = batch_call(get_web3(), [
+        contract.functions.getPatent(token_id),
+        contract.functions.getSaleDetails(token_id)
+    ])
+    if patent_result is None:
+        # Unknown token; cached like any read until a PatentRegistered event invalidates it
+        return None
+    
+    owner, cid, registration_time = patent_result
+    is_for_sale, min_bid, sale_end_time = sale_result or (False, 0, 0)
     
     return {
         'token_id': token_id,
@@ -132,6 +386,7 @@ def get_patent_details(token_id):
         'sale_end_time': sale_end_time
     }
 
+@timed('blockchain.list_for_sale')
 def list_for_sale(wallet_address, token_id, min_bid, duration=30):
     """
     List a patent for sale
@@ -145,6 +400,7 @@ def list_for_sale(wallet_address, token_id, min_bid, duration=30):
     Returns:
         str: Transaction hash
     """
+    w3, contract = get_web3(), get_contract()
     if not contract:
         raise Exception("Contract not initialized")
     
@@ -154,22 +410,21 @@ def list_for_sale(wallet_address, token_id, min_bid, duration=30):
     # Convert duration from days to seconds
     duration_seconds = duration * 24 * 60 * 60
     
-    # Get nonce for the transaction
-    nonce = w3.eth.get_transaction_count(wallet_address)
-    
     # Build transaction
-    tx = contract.functions.listForSale(token_id, min_bid_wei, duration_seconds).build_transaction({
-        'from': wallet_address,
-        'nonce': nonce,
-        'gas': 2000000,
-        'gasPrice': w3.eth.gas_price
-    })
+    tx = _build_transaction(
+        contract.functions.listForSale(token_id, min_bid_wei, duration_seconds),
+        wallet_address
+    )
+    
+    # The user's wallet signs and sends the transaction, so its nonce is not used up here
+    release_nonce(wallet_address, tx)
     
     # Placeholder transaction hash
     tx_hash = "0x" + "0" * 64
     
     return tx_hash
 
+@timed('blockchain.place_bid')
 def place_bid(wallet_address, token_id, bid_amount):
     """
     Place a bid on a patent
@@ -182,29 +437,25 @@ def place_bid(wallet_address, token_id, bid_amount):
     Returns:
         str: Transaction hash
     """
+    w3, contract = get_web3(), get_contract()
     if not contract:
         raise Exception("Contract not initialized")
     
     # Convert bid_amount from ETH to Wei
     bid_amount_wei = w3.to_wei(bid_amount, 'ether')
     
-    # Get nonce for the transaction
-    nonce = w3.eth.get_transaction_count(wallet_address)
-    
     # Build transaction
-    tx = contract.functions.placeBid(token_id).build_transaction({
-        'from': wallet_address,
-        'nonce': nonce,
-        'gas': 2000000,
-        'gasPrice': w3.eth.gas_price,
-        'value': bid_amount_wei
-    })
+    tx = _build_transaction(contract.functions.placeBid(token_id), wallet_address, value=bid_amount_wei)
+    
+    # The user's wallet signs and sends the transaction, so its nonce is not used up here
+    release_nonce(wallet_address, tx)
     
     # Placeholder transaction hash
     tx_hash = "0x" + "0" * 64
     
     return tx_hash
 
+@timed('blockchain.accept_bid')
 def accept_bid(wallet_address, token_id, bidder_address):
     """
     Accept a bid on a patent
@@ -217,25 +468,22 @@ def accept_bid(wallet_address, token_id, bidder_address):
     Returns:
         str: Transaction hash
     """
+    contract = get_contract()
     if not contract:
         raise Exception("Contract not initialized")
     
-    # Get nonce for the transaction
-    nonce = w3.eth.get_transaction_count(wallet_address)
-    
     # Build transaction
-    tx = contract.functions.acceptBid(token_id, bidder_address).build_transaction({
-        'from': wallet_address,
-        'nonce': nonce,
-        'gas': 2000000,
-        'gasPrice': w3.eth.gas_price
-    })
+    tx = _build_transaction(contract.functions.acceptBid(token_id, bidder_address), wallet_address)
+    
+    # The user's wallet signs and sends the transaction, so its nonce is not used up here
+    release_nonce(wallet_address, tx)
     
     # Placeholder transaction hash
     tx_hash = "0x" + "0" * 64
     
     return tx_hash
 
+@timed('blockchain.get_transaction_status')
 def get_transaction_status(tx_hash):
     """
     Get the status of a transaction
@@ -247,7 +495,7 @@ def get_transaction_status(tx_hash):
         dict: Transaction status
     """
     try:
-        tx_receipt = w3.eth.get_transaction_receipt(tx_hash)
+        tx_receipt = get_web3().eth.get_transaction_receipt(tx_hash)
         return {
             'status': 'confirmed' if tx_receipt.status == 1 else 'failed',
             'block_number': tx_receipt.blockNumber,
@@ -258,6 +506,7 @@ def get_transaction_status(tx_hash):
             'status': 'pending'
         }
 
+@timed('blockchain.get_contract_balance')
 def get_contract_balance():
     """
     Get the balance of the contract
@@ -265,6 +514,7 @@ def get_contract_balance():
     Returns:
         float: Contract balance in ETH
     """
+    w3, contract = get_web3(), get_contract()
     if not contract:
         raise Exception("Contract not initialized")
     
@@ -273,6 +523,7 @@ def get_contract_balance():
     
     return float(balance_eth)
 
+@timed('blockchain.verify_signature')
 def verify_signature(message, signature, address):
     """
     Verify a signature
@@ -285,9 +536,10 @@ def verify_signature(message, signature, address):
     Returns:
         bool: True if signature is valid, False otherwise
     """
-    message_hash = encode_defunct(text=message)
+    from services.signature_service import recover_signer
+    
     try:
-        signer = w3.eth.account.recover_message(message_hash, signature=signature)
-        return signer.lower() == address.lower()
+        signer = recover_signer(message, signature)
+        return signer is not None and signer.lower() == address.lower()
     except:
         return False
\ No newline at end of file
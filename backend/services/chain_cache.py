@@ -0,0 +1,152 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from dotenv import load_dotenv
+
+from services import metrics
+
+# Load environment variables
+load_dotenv()
+
+# Read-through cache for per-token contract reads
+CHAIN_BLOCK_TIME = float(os.getenv('CHAIN_BLOCK_TIME', 12))  # Seconds between blocks
+PATENT_CACHE_TTL = min(float(os.getenv('PATENT_CACHE_TTL', CHAIN_BLOCK_TIME)), CHAIN_BLOCK_TIME)  # Never longer than a block
+PATENT_CACHE_SIZE = int(os.getenv('PATENT_CACHE_SIZE', 1024))  # Tokens kept in memory
+LOG_POLL_MAX_BLOCKS = 1000  # Larger gaps drop the whole cache instead of scanning logs
+
+logger = logging.getLogger(__name__)
+
+class TokenCache:
+    """
+    LRU of token ID -> contract read, with TTL expiry and request coalescing
+
+    Concurrent misses for the same token share a single fetch: the first
+    caller runs it and the others wait for its result. A fetch that was
+    already in flight when its token was invalidated is returned to its
+    callers but not cached.
+    """
+
+    def __init__(self, ttl=PATENT_CACHE_TTL, max_size=PATENT_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._stale = set()
+        self._lock = threading.Lock()
+
+    def get(self, key, fetch):
+        """
+        Get a cached value, fetching it on a miss
+
+        Args:
+            key: Cache key, e.g. a token ID
+            fetch (callable): Called with the key on a miss, returns the value
+
+        Returns:
+            The cached or freshly fetched value
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+            self.misses += 1
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+
+        if not leader:
+            return future.result()
+
+        try:
+            value = fetch(key)
+        except Exception as e:
+            with self._lock:
+                del self._in_flight[key]
+                self._stale.discard(key)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._in_flight[key]
+            if key in self._stale:
+                self._stale.discard(key)
+            else:
+                self._entries[key] = (value, time.monotonic() + self.ttl)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        future.set_result(value)
+        return value
+
+    def invalidate(self, keys):
+        """Drop cached values for the given keys"""
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+                if key in self._in_flight:
+                    self._stale.add(key)
+
+    def clear(self):
+        """Drop every cached value"""
+        with self._lock:
+            self._entries.clear()
+            self._stale.update(self._in_flight)
+
+class LogInvalidator:
+    """
+    Invalidates cached tokens that appear in new contract events
+
+    At most once per block time, one eth_getLogs call covers every block
+    since the last poll; each event's first indexed topic is the token ID.
+    The poll is shared by all readers, so its cost does not grow with the
+    number of cached tokens or viewers.
+    """
+
+    def __init__(self, w3, address, cache, interval=CHAIN_BLOCK_TIME):
+        self.w3 = w3
+        self.address = address
+        self.cache = cache
+        self.interval = interval
+        self._last_block = None
+        self._next_poll = 0
+        self._lock = threading.Lock()
+
+    def poll(self):
+        """Check for new events if the last check is at least a block old"""
+        if time.monotonic() < self._next_poll:
+            return
+
+        with self._lock:
+            if time.monotonic() < self._next_poll:
+                return
+            self._next_poll = time.monotonic() + self.interval
+
+            try:
+                head = self.w3.eth.block_number
+                if self._last_block is None or head - self._last_block > LOG_POLL_MAX_BLOCKS:
+                    # Nothing to compare against, start over from the head
+                    self.cache.clear()
+                elif head > self._last_block:
+                    logs = self.w3.eth.get_logs({
+                        'address': self.address,
+                        'fromBlock': self._last_block + 1,
+                        'toBlock': head
+                    })
+                    token_ids = {int.from_bytes(bytes(log['topics'][1]), 'big')
+                                 for log in logs if len(log['topics']) > 1}
+                    if token_ids:
+                        self.cache.invalidate(token_ids)
+                self._last_block = head
+            except Exception:
+                # Entries still expire after their TTL
+                logger.exception("Error polling contract events")
+                metrics.background_errors.inc(('patent_cache_invalidator',))
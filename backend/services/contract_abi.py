@@ -0,0 +1,100 @@
+import os
+import json
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# ABI written by contracts/compile.py
+CONTRACT_ABI_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                 '../contracts/abi/IPNFT.json')
+
+# Compact copy of the ABI with event topics already hashed, rebuilt
+# automatically whenever the compiler output changes
+ABI_ARTIFACT_PATH = os.getenv('ABI_ARTIFACT_PATH',
+                              os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                           'data/IPNFT.abi.json'))
+
+_artifact = None
+
+def _source_stamp(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+def _signature(item):
+    from eth_utils.abi import collapse_if_tuple
+    return f"{item['name']}({','.join(collapse_if_tuple(arg) for arg in item.get('inputs', []))})"
+
+def build_artifact(abi_path=CONTRACT_ABI_PATH, artifact_path=ABI_ARTIFACT_PATH):
+    """
+    Precompile the contract ABI
+
+    Args:
+        abi_path (str): ABI JSON written by contracts/compile.py
+        artifact_path (str): Where to write the artifact
+
+    Returns:
+        dict: 'abi' and 'topics' (event name -> 0x-prefixed topic0)
+    """
+    from eth_utils import event_signature_to_log_topic, to_hex
+
+    with open(abi_path, 'r') as f:
+        abi = json.load(f)
+
+    artifact = {
+        'source': _source_stamp(abi_path),
+        'abi': abi,
+        'topics': {item['name']: to_hex(event_signature_to_log_topic(_signature(item)))
+                   for item in abi if item.get('type') == 'event'}
+    }
+
+    # Write to a temp file and rename so concurrent workers never read half an artifact
+    os.makedirs(os.path.dirname(artifact_path), exist_ok=True)
+    tmp_path = f"{artifact_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(artifact, f, separators=(',', ':'))
+    os.replace(tmp_path, artifact_path)
+    return artifact
+
+def load_artifact():
+    """
+    Get the precompiled ABI, rebuilding it if the compiler output changed
+
+    Returns:
+        dict or None: See build_artifact; None before the contract is compiled
+    """
+    global _artifact
+    if _artifact is not None:
+        return _artifact
+
+    try:
+        source = _source_stamp(CONTRACT_ABI_PATH)
+    except FileNotFoundError:
+        source = None
+
+    try:
+        with open(ABI_ARTIFACT_PATH, 'r') as f:
+            artifact = json.load(f)
+    except (FileNotFoundError, ValueError):
+        artifact = None
+
+    if artifact is None or (source is not None and artifact['source'] != source):
+        if source is None:
+            return None  # Will be populated after contract deployment
+        artifact = build_artifact(CONTRACT_ABI_PATH, ABI_ARTIFACT_PATH)
+
+    _artifact = artifact
+    return _artifact
+
+def get_abi():
+    """Contract ABI, or an empty list before the contract is compiled"""
+    artifact = load_artifact()
+    return artifact['abi'] if artifact else []
+
+def get_event_topic(name):
+    """topic0 of a contract event, as 0x-prefixed hex"""
+    return load_artifact()['topics'][name]
+
+if __name__ == '__main__':
+    build_artifact()
+    print(f"ABI artifact written to {ABI_ARTIFACT_PATH}")
@@ -0,0 +1,183 @@
+import os
+import time
+import logging
+import threading
+from dotenv import load_dotenv
+
+from models import chain_state
+from models.database import transaction
+from models.patent_model import Patent
+from models.user_model import User
+from services import contract_abi, metrics
+from services.blockchain_service import get_web3, get_contract, patent_cache
+
+# Load environment variables
+load_dotenv()
+
+# Indexer configuration
+INDEXER_ENABLED = os.getenv('INDEXER_ENABLED', 'false').lower() == 'true'
+INDEXER_START_BLOCK = int(os.getenv('INDEXER_START_BLOCK', 0))  # Contract deployment block
+INDEXER_BLOCK_RANGE = int(os.getenv('INDEXER_BLOCK_RANGE', 2000))  # Blocks per eth_getLogs
+INDEXER_REORG_DEPTH = int(os.getenv('INDEXER_REORG_DEPTH', 12))  # Blocks rolled back on a reorg
+INDEXER_POLL_INTERVAL = float(os.getenv('INDEXER_POLL_INTERVAL', 12))  # Seconds between syncs
+
+INDEXED_EVENTS = ('PatentRegistered', 'PatentListedForSale', 'BidPlaced', 'BidAccepted')
+
+logger = logging.getLogger(__name__)
+
+def _event_types():
+    """Map each indexed event's topic0 to its contract event class"""
+    contract = get_contract()
+    return {contract_abi.get_event_topic(name): getattr(contract.events, name) for name in INDEXED_EVENTS}
+
+def _decode_logs(logs, event_types):
+    """
+    Decode raw logs into the event dicts stored by models.chain_state
+
+    PatentRegistered carries no timestamp, so the block timestamp is fetched
+    once per block that contains a registration.
+    """
+    from eth_utils import to_hex
+
+    w3 = get_web3()
+    events = []
+    timestamps = {}
+    for log in logs:
+        event_type = event_types.get(to_hex(log['topics'][0]))
+        if event_type is None:
+            continue
+
+        decoded = event_type().process_log(log)
+        args = dict(decoded['args'])
+        token_id = args.pop('tokenId')
+
+        if decoded['event'] == 'PatentRegistered':
+            block_number = decoded['blockNumber']
+            if block_number not in timestamps:
+                timestamps[block_number] = w3.eth.get_block(block_number)['timestamp']
+            args['timestamp'] = timestamps[block_number]
+
+        events.append({
+            'block_number': decoded['blockNumber'],
+            'log_index': decoded['logIndex'],
+            'block_hash': to_hex(decoded['blockHash']),
+            'tx_hash': to_hex(decoded['transactionHash']),
+            'event': decoded['event'],
+            'token_id': token_id,
+            'args': args
+        })
+    return events
+
+def _sync_local_owners(token_ids):
+    """
+    Mirror the indexed owner of each token onto its local Patent record
+
+    Called inside the indexer's transaction, so the local records move with
+    chain_patents, including back to the previous owner when a reorg rolls
+    an accepted bid back.
+    """
+    for token_id in token_ids:
+        state = chain_state.get_patent(token_id)
+        patent = Patent.find_by_token_id(token_id)
+        if not state or not patent:
+            continue
+
+        owner = User.find_by_wallet(state['owner'])
+        owner_id = owner.id if owner else state['owner']
+        if patent.owner_id != owner_id:
+            patent.update_owner(owner_id)
+
+def sync_once():
+    """
+    Index every contract event between the checkpoint and the chain head
+
+    Logs are fetched INDEXER_BLOCK_RANGE blocks at a time and each range is
+    committed together with the new checkpoint, so an interrupted sync
+    resumes where it stopped. If the checkpointed block is no longer on the
+    canonical chain, the last INDEXER_REORG_DEPTH blocks are rolled back and
+    re-indexed.
+
+    Returns:
+        int: Number of new events recorded
+    """
+    from eth_utils import to_hex
+
+    w3, contract = get_web3(), get_contract()
+    if not contract:
+        raise Exception("Contract not initialized")
+
+    checkpoint = chain_state.get_checkpoint()
+    head = w3.eth.block_number
+    rollback_from = None
+
+    if checkpoint is None:
+        from_block = INDEXER_START_BLOCK
+    else:
+        block = w3.eth.get_block(checkpoint['block_number'])
+        if to_hex(block['hash']) != checkpoint['block_hash']:
+            rollback_from = max(checkpoint['block_number'] - INDEXER_REORG_DEPTH + 1, INDEXER_START_BLOCK)
+            from_block = rollback_from
+        else:
+            from_block = checkpoint['block_number'] + 1
+
+    if from_block > head and rollback_from is None:
+        return 0
+
+    event_types = _event_types()
+    recorded = 0
+
+    for start in range(from_block, max(head, from_block) + 1, INDEXER_BLOCK_RANGE):
+        end = min(start + INDEXER_BLOCK_RANGE - 1, head)
+        if end < start:
+            # The chain got shorter than our rollback point
+            start = end = head
+
+        logs = w3.eth.get_logs({
+            'address': contract.address,
+            'fromBlock': start,
+            'toBlock': end,
+            'topics': [list(event_types.keys())]
+        })
+        events = _decode_logs(logs, event_types)
+        end_hash = to_hex(w3.eth.get_block(end)['hash'])
+
+        with transaction() as conn:
+            if chain_state.get_checkpoint() != checkpoint:
+                # Another indexer process moved the checkpoint under us
+                return recorded
+
+            owner_changes = set()
+            if rollback_from is not None:
+                owner_changes = chain_state.rollback(conn, rollback_from)
+                patent_cache.clear()
+                rollback_from = None
+
+            new_events = [event for event in events if chain_state.record_event(conn, event)]
+            owner_changes.update(event['token_id'] for event in new_events if event['event'] == 'BidAccepted')
+            _sync_local_owners(owner_changes)
+            chain_state.set_checkpoint(conn, end, end_hash)
+
+        checkpoint = {'block_number': end, 'block_hash': end_hash}
+        recorded += len(new_events)
+        patent_cache.invalidate({event['token_id'] for event in new_events})
+
+    return recorded
+
+def run_forever(poll_interval=INDEXER_POLL_INTERVAL):
+    """Keep the local store in sync with the chain"""
+    while True:
+        try:
+            sync_once()
+        except Exception:
+            logger.exception("Event indexer sync failed")
+            metrics.background_errors.inc(('event_indexer',))
+        time.sleep(poll_interval)
+
+def start_indexer_thread():
+    """Run the indexer in a daemon thread of the current process"""
+    thread = threading.Thread(target=run_forever, name='event-indexer', daemon=True)
+    thread.start()
+    return thread
+
+if __name__ == '__main__':
+    run_forever()
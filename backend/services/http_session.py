@@ -0,0 +1,199 @@
+import os
+import time
+import threading
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+
+from services import metrics
+
+# Load environment variables
+load_dotenv()
+
+# Shared HTTP client configuration for outbound service calls
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 3.05))  # Seconds
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 30))  # Seconds
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 10))  # Connections kept per host
+HTTP_POOL_SIZES = os.getenv('HTTP_POOL_SIZES', '')  # Per-host overrides, e.g. "api.filebase.io=20,localhost:5001=4"
+HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', 3))
+HTTP_BACKOFF_FACTOR = float(os.getenv('HTTP_BACKOFF_FACTOR', 0.5))  # 0.5s, 1s, 2s, ...
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+def _parse_pool_sizes(spec):
+    """Parse "host=size,host=size" into a dict"""
+    pool_sizes = {}
+    for item in spec.split(','):
+        if '=' in item:
+            host, size = item.split('=', 1)
+            pool_sizes[host.strip()] = int(size)
+    return pool_sizes
+
+class HostMetrics:
+    """Request counters for one host"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.total_seconds = 0.0
+
+class PooledSession(requests.Session):
+    """
+    requests.Session with default timeouts, retries and per-host metrics
+
+    Connections are kept alive in per-host pools, so repeated calls to the
+    same service skip the TCP and TLS handshakes.
+    """
+
+    def __init__(self, pool_size=HTTP_POOL_SIZE, pool_sizes=None, max_retries=HTTP_MAX_RETRIES,
+                 backoff_factor=HTTP_BACKOFF_FACTOR, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)):
+        super().__init__()
+        self.timeout = timeout
+        self.pool_sizes = {}
+        self._metrics = {}
+        self._metrics_lock = threading.Lock()
+
+        # Uploads are content-addressed, so retrying a POST is safe
+        self.retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=None,
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+
+        self.mount('https://', self._adapter(pool_size))
+        self.mount('http://', self._adapter(pool_size))
+        for host, size in (pool_sizes or {}).items():
+            self.mount(f'https://{host}/', self._adapter(size))
+            self.mount(f'http://{host}/', self._adapter(size))
+            self.pool_sizes[host] = size
+
+    def _adapter(self, pool_size):
+        return HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                           max_retries=self.retry, pool_block=False)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        host = urlsplit(url).hostname
+
+        with self._metrics_lock:
+            host_metrics = self._metrics.setdefault(host, HostMetrics())
+            host_metrics.requests += 1
+            host_metrics.in_flight += 1
+            host_metrics.max_in_flight = max(host_metrics.max_in_flight, host_metrics.in_flight)
+
+        start = time.perf_counter()
+        try:
+            with metrics.timer('http', host):
+                response = super().request(method, url, **kwargs)
+        except requests.RequestException:
+            with self._metrics_lock:
+                host_metrics.errors += 1
+            raise
+        finally:
+            with self._metrics_lock:
+                host_metrics.in_flight -= 1
+                host_metrics.total_seconds += time.perf_counter() - start
+
+        if response.status_code >= 500 or response.status_code == 429:
+            with self._metrics_lock:
+                host_metrics.errors += 1
+        return response
+
+    def pool_stats(self):
+        """
+        Snapshot request counters and connection pool utilisation per host
+
+        Returns:
+            dict: host -> counters, plus pool_size, connections_in_use and
+                connections_created for hosts with an open pool
+        """
+        with self._metrics_lock:
+            stats = {
+                host: {
+                    'requests': host_metrics.requests,
+                    'errors': host_metrics.errors,
+                    'in_flight': host_metrics.in_flight,
+                    'max_in_flight': host_metrics.max_in_flight,
+                    'total_seconds': host_metrics.total_seconds
+                }
+                for host, host_metrics in self._metrics.items()
+            }
+
+        for adapter in set(self.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                host_stats = stats.setdefault(pool.host, {})
+                # Idle connections and unused slots both sit in the pool's queue
+                host_stats['pool_size'] = pool.pool.maxsize
+                host_stats['connections_in_use'] = pool.pool.maxsize - pool.pool.qsize()
+                host_stats['connections_created'] = pool.num_connections
+        return stats
+
+_session = None
+_stream_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """Get the process-wide pooled session"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = PooledSession(pool_sizes=_parse_pool_sizes(HTTP_POOL_SIZES))
+    return _session
+
+def get_stream_session():
+    """
+    Get the process-wide session for streamed request bodies
+
+    A generator body is consumed by the first attempt and cannot be replayed,
+    so this session never retries.
+    """
+    global _stream_session
+    if _stream_session is None:
+        with _session_lock:
+            if _stream_session is None:
+                _stream_session = PooledSession(pool_sizes=_parse_pool_sizes(HTTP_POOL_SIZES), max_retries=0)
+    return _stream_session
+
+def pool_stats():
+    """
+    Pool utilisation of the process-wide sessions that have been created
+
+    Returns:
+        dict: 'default' and 'stream' -> PooledSession.pool_stats()
+    """
+    sessions = {'default': _session, 'stream': _stream_session}
+    return {name: session.pool_stats() for name, session in sessions.items() if session is not None}
+
+def _pool_metric(field):
+    """Scrape callback reading one pool_stats field per session and host"""
+    def collect():
+        return {
+            (name, host): host_stats[field]
+            for name, session_stats in pool_stats().items()
+            for host, host_stats in session_stats.items()
+            if field in host_stats
+        }
+    return collect
+
+for field, metric_type, documentation in (
+    ('pool_size', 'gauge', 'Connections an outbound HTTP pool keeps per host'),
+    ('connections_in_use', 'gauge', 'Pooled outbound HTTP connections checked out right now'),
+    ('in_flight', 'gauge', 'Outbound HTTP requests in progress'),
+    ('errors', 'counter', 'Outbound HTTP requests that failed or returned 429 or 5xx')
+):
+    metrics.register(metrics.CallbackMetric(
+        f"{metrics.METRICS_PREFIX}_http_{field}{'_total' if metric_type == 'counter' else ''}",
+        documentation, _pool_metric(field), labels=('session', 'host'), metric_type=metric_type
+    ))
@@ -0,0 +1,27 @@
+import os
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Threads shared by the *_async service functions for overlapping network calls
+IO_POOL_SIZE = int(os.getenv('IO_POOL_SIZE', 16))
+
+_executor = ThreadPoolExecutor(max_workers=IO_POOL_SIZE, thread_name_prefix='io')
+
+def submit(fn, *args, **kwargs):
+    """
+    Run a blocking call on the shared I/O pool
+
+    Tasks on this pool must not wait on other tasks of the same pool, or a
+    saturated pool deadlocks; wait on the returned futures from the caller.
+
+    The call runs in a copy of the caller's context, so a request trace
+    (see services/metrics.py) includes it.
+
+    Returns:
+        concurrent.futures.Future: Future for the call's result
+    """
+    return _executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
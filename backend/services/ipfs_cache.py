@@ -0,0 +1,311 @@
+import os
+import re
+import base64
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Two-tier cache for immutable IPFS content, keyed by CID
+# Relative paths are taken from the backend directory, not the working directory
+IPFS_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              os.getenv('IPFS_CACHE_DIR', 'data/ipfs_cache'))
+IPFS_MEMORY_CACHE_BYTES = int(os.getenv('IPFS_MEMORY_CACHE_BYTES', 32 * 1024 * 1024))  # 32MB
+IPFS_DISK_CACHE_BYTES = int(os.getenv('IPFS_DISK_CACHE_BYTES', 1024 * 1024 * 1024))  # 1GB
+IPFS_VERIFY_CIDS = os.getenv('IPFS_VERIFY_CIDS', 'false').lower() == 'true'
+
+# CIDs are base58/base32 strings, which also makes them safe file names
+CID_PATTERN = re.compile(r'^[A-Za-z0-9]{8,128}$')
+
+# ipfs add splits files into chunks of this many bytes (its size-262144 default)
+UNIXFS_CHUNK_SIZE = 256 * 1024
+
+BASE58_ALPHABET = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+
+# Multicodec and multihash codes
+CODEC_RAW = 0x55
+CODEC_DAG_PB = 0x70
+HASH_SHA2_256 = 0x12
+
+logger = logging.getLogger(__name__)
+
+class CIDMismatchError(Exception):
+    """Raised when fetched content does not hash to the requested CID"""
+
+class MemoryCache:
+    """LRU of CID -> bytes bounded by the total size of the cached content"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, cid):
+        with self._lock:
+            content = self._items.get(cid)
+            if content is not None:
+                self._items.move_to_end(cid)
+            return content
+
+    def put(self, cid, content):
+        if len(content) > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._items.pop(cid, None)
+            if previous is not None:
+                self.size -= len(previous)
+
+            self._items[cid] = content
+            self.size += len(content)
+            while self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+
+class DiskCache:
+    """
+    On-disk store of CID -> bytes bounded by total size
+
+    Reads bump a file's mtime, so eviction removes the least recently used
+    files first once the directory grows past max_bytes.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.size = None
+        self._lock = threading.Lock()
+
+    def _path(self, cid):
+        return os.path.join(self.directory, cid[-2:], cid)
+
+    def _entries(self):
+        """List (mtime, size, path) for every cached file"""
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith('.tmp'):
+                    # Another writer's file, about to be renamed into place
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def get(self, cid):
+        path = self._path(cid)
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+        except OSError:
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return content
+
+    def put(self, cid, content):
+        if len(content) > self.max_bytes:
+            return
+
+        path = self._path(cid)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            try:
+                previous_size = os.path.getsize(path)
+            except FileNotFoundError:
+                previous_size = 0
+
+            # Write to a temp file and rename so readers never see partial content
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except OSError:
+            # The cache is best effort: a full disk or a concurrent eviction is just a miss
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            if self.size is None:
+                self.size = sum(size for _, size, _ in self._entries())
+            else:
+                self.size += len(content) - previous_size
+
+            if self.size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Remove least recently used files until the cache is at 90% of its budget"""
+        entries = sorted(self._entries())
+        self.size = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+
+        for _, size, path in entries:
+            if self.size <= target:
+                break
+            try:
+                os.remove(path)
+                self.size -= size
+            except FileNotFoundError:
+                pass
+
+def _read_varint(data, offset):
+    """Decode an unsigned varint, returning (value, next_offset)"""
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        value |= (byte & 0x7f) << shift
+        offset += 1
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+def _varint(value):
+    """Encode an unsigned varint"""
+    encoded = bytearray()
+    while True:
+        byte = value & 0x7f
+        value >>= 7
+        if not value:
+            encoded.append(byte)
+            return bytes(encoded)
+        encoded.append(byte | 0x80)
+
+def _b58decode(value):
+    number = 0
+    for char in value:
+        number = number * 58 + BASE58_ALPHABET.index(char)
+    leading_zeros = len(value) - len(value.lstrip('1'))
+    return b'\0' * leading_zeros + number.to_bytes((number.bit_length() + 7) // 8, 'big')
+
+def _parse_cid(cid):
+    """
+    Split a CID into its codec and multihash
+
+    Returns:
+        tuple or None: (codec, hash_code, digest), or None for CIDs in other encodings
+    """
+    try:
+        if cid.startswith('Qm') and len(cid) == 46:
+            # CIDv0: a bare base58 sha2-256 multihash of a dag-pb node
+            raw, offset, codec = _b58decode(cid), 0, CODEC_DAG_PB
+        elif cid.startswith('b'):
+            encoded = cid[1:].upper()
+            raw = base64.b32decode(encoded + '=' * (-len(encoded) % 8))
+            version, offset = _read_varint(raw, 0)
+            if version != 1:
+                return None
+            codec, offset = _read_varint(raw, offset)
+        else:
+            return None
+        hash_code, offset = _read_varint(raw, offset)
+        digest_length, offset = _read_varint(raw, offset)
+    except (ValueError, IndexError):
+        return None
+
+    digest = raw[offset:]
+    if len(digest) != digest_length:
+        return None
+    return codec, hash_code, digest
+
+def _unixfs_file_node(content):
+    """Encode the dag-pb node ipfs add makes for a file that fits in one chunk"""
+    unixfs = b'\x08\x02'  # Type: File
+    if content:
+        unixfs += b'\x12' + _varint(len(content)) + content
+    unixfs += b'\x18' + _varint(len(content))  # filesize
+    return b'\x0a' + _varint(len(unixfs)) + unixfs
+
+def verify_cid(cid, content):
+    """
+    Check that content hashes to a CID
+
+    Covers sha2-256 CIDs of ``raw`` blocks and of dag-pb UnixFS files up to
+    UNIXFS_CHUNK_SIZE, which includes every CIDv0 ``Qm...`` that Filebase
+    returns for metadata and small files. A larger dag-pb file is a tree of
+    chunks whose root hash depends on how it was chunked, so it is reported
+    as unverifiable.
+
+    Returns:
+        bool or None: True if the hash matches, False if it does not, None if unverifiable
+    """
+    parsed = _parse_cid(cid)
+    if parsed is None:
+        return None
+
+    codec, hash_code, digest = parsed
+    if hash_code != HASH_SHA2_256 or len(digest) != 32:
+        return None
+    if codec == CODEC_RAW:
+        return hashlib.sha256(content).digest() == digest
+    if codec == CODEC_DAG_PB and len(content) <= UNIXFS_CHUNK_SIZE:
+        return hashlib.sha256(_unixfs_file_node(content)).digest() == digest
+    return None
+
+# Set once content that verify_cid cannot check has been logged
+_unverifiable_logged = threading.Event()
+
+def _check_cid(cid, content):
+    """Raise CIDMismatchError if content does not match its CID, logging once if it cannot be checked"""
+    verified = verify_cid(cid, content)
+    if verified is False:
+        raise CIDMismatchError(f"Content from gateway does not match CID {cid}")
+    if verified is None and not _unverifiable_logged.is_set():
+        _unverifiable_logged.set()
+        logger.warning("IPFS_VERIFY_CIDS is on but CID %s cannot be verified from its content; "
+                       "content of such CIDs is served unverified", cid)
+
+memory_cache = MemoryCache(IPFS_MEMORY_CACHE_BYTES)
+disk_cache = DiskCache(IPFS_CACHE_DIR, IPFS_DISK_CACHE_BYTES)
+
+def store(cid, content):
+    """Add content to both cache tiers"""
+    if not CID_PATTERN.match(cid or ''):
+        return
+    memory_cache.put(cid, content)
+    disk_cache.put(cid, content)
+
+def get_or_fetch(cid, fetch):
+    """
+    Get content by CID from memory, then disk, then the network
+
+    Args:
+        cid (str): IPFS CID
+        fetch (callable): Called with the CID on a miss, returns the content bytes
+
+    Returns:
+        bytes: Content addressed by the CID
+    """
+    if not CID_PATTERN.match(cid or ''):
+        # Not a CID we can key a file on; don't cache it
+        return fetch(cid)
+
+    content = memory_cache.get(cid)
+    if content is not None:
+        return content
+
+    content = disk_cache.get(cid)
+    if content is not None:
+        memory_cache.put(cid, content)
+        return content
+
+    content = fetch(cid)
+    if IPFS_VERIFY_CIDS:
+        _check_cid(cid, content)
+
+    store(cid, content)
+    return content
@@ -1,8 +1,12 @@
 import os
 import json
-import requests
+import uuid
+import hashlib
 from dotenv import load_dotenv
 
+from services import ipfs_cache, io_pool
+from services.metrics import timed
+
 # Load environment variables
 load_dotenv()
 
@@ -11,6 +15,15 @@ FILEBASE_API_KEY = os.getenv('FILEBASE_API_KEY')
 FILEBASE_API_SECRET = os.getenv('FILEBASE_API_SECRET')
 FILEBASE_ENDPOINT = os.getenv('FILEBASE_ENDPOINT', 'https://api.filebase.io/v1/ipfs')
 
+# Gateway configuration
+# A path-style gateway keeps every CID on one host, so connections are reused
+IPFS_GATEWAY_URL = os.getenv('IPFS_GATEWAY_URL', 'https://dweb.link/ipfs/')
+IPFS_GATEWAY_TIMEOUT = float(os.getenv('IPFS_GATEWAY_TIMEOUT', 10))  # Seconds
+
+# Streaming upload configuration
+IPFS_UPLOAD_CHUNK_SIZE = int(os.getenv('IPFS_UPLOAD_CHUNK_SIZE', 256 * 1024))  # 256KB
+
+@timed('ipfs.upload')
 def upload_to_ipfs(file_path=None, json_data=None):
     """
     Upload a file or JSON data to IPFS via Filebase
@@ -27,19 +40,16 @@ def upload_to_ipfs(file_path=None, json_data=None):
     }
     
     if file_path and os.path.exists(file_path):
-        # Upload file
+        # Stream the file instead of building the multipart body in memory
         with open(file_path, 'rb') as f:
-            files = {'file': f}
-            response = requests.post(
-                FILEBASE_ENDPOINT,
-                headers=headers,
-                files=files
-            )
+            cid, _ = upload_stream_to_ipfs(f, os.path.basename(file_path))
+        return cid
     elif json_data:
         # Upload JSON data
         json_str = json.dumps(json_data)
         files = {'file': ('metadata.json', json_str)}
-        response = requests.post(
+        from services.http_session import get_session
+        response = get_session().post(
             FILEBASE_ENDPOINT,
             headers=headers,
             files=files
@@ -52,26 +62,130 @@ def upload_to_ipfs(file_path=None, json_data=None):
     
     # Extract CID from response
     result = response.json()
-    return result.get('cid')
+    cid = result.get('cid')
+    
+    # Metadata is viewed right after registration, so seed the cache with it
+    if json_data and not file_path and cid:
+        ipfs_cache.store(cid, json_str.encode('utf-8'))
+    
+    return cid
+
+def _multipart_stream(stream, filename, content_type, boundary, digest, chunk_size):
+    """
+    Encode a single-file multipart/form-data body on the fly
+    
+    Yields the body in chunk_size pieces and feeds every content chunk into
+    digest, so neither the body nor the file is ever held in memory whole.
+    """
+    safe_filename = filename.replace('\\', '_').replace('"', '_')
+    yield (
+        f'--{boundary}\r\n'
+        f'Content-Disposition: form-data; name="file"; filename="{safe_filename}"\r\n'
+        f'Content-Type: {content_type}\r\n\r\n'
+    ).encode('utf-8')
+    
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        digest.update(chunk)
+        yield chunk
+    
+    yield f'\r\n--{boundary}--\r\n'.encode('utf-8')
+
+@timed('ipfs.upload_stream')
+def upload_stream_to_ipfs(stream, filename, content_type='application/octet-stream',
+                          chunk_size=IPFS_UPLOAD_CHUNK_SIZE):
+    """
+    Stream a file-like object to IPFS via Filebase without buffering it
+    
+    The body is sent with chunked transfer encoding as it is read, and the
+    SHA-256 of the content is computed along the way.
+    
+    Args:
+        stream: Readable binary file-like object, e.g. request.stream or FileStorage.stream
+        filename (str): File name to send with the upload
+        content_type (str): MIME type of the content
+        chunk_size (int): Bytes read from the stream per chunk
+        
+    Returns:
+        tuple: (cid, sha256_hex)
+    """
+    headers = {
+        'Authorization': f'Bearer {FILEBASE_API_KEY}'
+    }
+    
+    boundary = uuid.uuid4().hex
+    headers['Content-Type'] = f'multipart/form-data; boundary={boundary}'
+    digest = hashlib.sha256()
+    
+    # requests is imported on first use to keep app startup fast
+    from services.http_session import get_stream_session
+    response = get_stream_session().post(
+        FILEBASE_ENDPOINT,
+        headers=headers,
+        data=_multipart_stream(stream, filename, content_type or 'application/octet-stream',
+                               boundary, digest, chunk_size)
+    )
+    
+    if response.status_code != 200:
+        raise Exception(f"IPFS upload failed: {response.text}")
+    
+    result = response.json()
+    return result.get('cid'), digest.hexdigest()
 
+def upload_to_ipfs_async(file_path=None, json_data=None):
+    """
+    Start upload_to_ipfs on the shared I/O pool
+    
+    Returns:
+        concurrent.futures.Future: Resolves to the IPFS CID
+    """
+    return io_pool.submit(upload_to_ipfs, file_path=file_path, json_data=json_data)
+
+def upload_file_to_ipfs_async(file_path, filename=None, content_type='application/octet-stream'):
+    """
+    Start streaming a local file to IPFS on the shared I/O pool
+    
+    Returns:
+        concurrent.futures.Future: Resolves to (cid, sha256_hex)
+    """
+    def upload():
+        with open(file_path, 'rb') as f:
+            return upload_stream_to_ipfs(f, filename or os.path.basename(file_path), content_type)
+    
+    return io_pool.submit(upload)
+
+@timed('ipfs.gateway_fetch')
+def _fetch_from_gateway(cid):
+    """Download raw content for a CID from the public gateway"""
+    from services.http_session import get_session, HTTP_CONNECT_TIMEOUT
+    gateway_url = f"{IPFS_GATEWAY_URL}{cid}"
+    response = get_session().get(gateway_url, timeout=(HTTP_CONNECT_TIMEOUT, IPFS_GATEWAY_TIMEOUT))
+    
+    if response.status_code != 200:
+        raise Exception(f"Failed to retrieve from IPFS: {response.text}")
+    
+    return response.content
+
+@timed('ipfs.get')
 def get_from_ipfs(cid):
     """
     Retrieve content from IPFS via Filebase gateway
     
+    CIDs are immutable, so content is served from services/ipfs_cache.py
+    after the first fetch.
+    
     Args:
         cid (str): IPFS CID to retrieve
         
     Returns:
         dict or bytes: Content from IPFS (parsed as JSON if possible)
     """
-    gateway_url = f"https://{cid}.ipfs.dweb.link"
-    response = requests.get(gateway_url)
-    
-    if response.status_code != 200:
-        raise Exception(f"Failed to retrieve from IPFS: {response.text}")
+    content = ipfs_cache.get_or_fetch(cid, _fetch_from_gateway)
     
     # Try to parse as JSON, otherwise return raw content
     try:
-        return response.json()
-    except:
-        return response.content
\ No newline at end of file
+        return json.loads(content)
+    except ValueError:
+        return content
\ No newline at end of file
@@ -0,0 +1,268 @@
+import os
+import json
+import time
+import logging
+import threading
+from datetime import datetime
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dotenv import load_dotenv
+
+from models.database import get_connection, transaction
+from models.ids import new_id
+from services import metrics
+
+# Load environment variables
+load_dotenv()
+
+# Worker configuration
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))  # Worker threads per process, 0 to disable
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', 1.0))  # Seconds between polls when idle
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 3))
+JOB_RETRY_DELAY = float(os.getenv('JOB_RETRY_DELAY', 5))  # Seconds, doubled on each attempt
+JOB_LEASE_SECONDS = float(os.getenv('JOB_LEASE_SECONDS', 300))  # Running jobs past their lease are reclaimed
+
+# Job handlers by kind, see register_handler
+_handlers = {}
+_failure_handlers = {}
+
+# Wakes local workers as soon as a job is enqueued in this process
+_wakeup = threading.Event()
+
+logger = logging.getLogger(__name__)
+
+class LeaseLostError(Exception):
+    """Raised when another worker reclaimed a job whose lease ran out"""
+
+class Job:
+    """A claimed job, handed to its handler"""
+
+    def __init__(self, id, kind, stage, payload, attempts, lease_owner=None):
+        self.id = id
+        self.kind = kind
+        self.stage = stage
+        self.payload = payload
+        self.attempts = attempts
+        self.lease_owner = lease_owner
+
+    def _update_leased(self, conn, assignments, params):
+        """Update this job's row if we still hold its lease, else raise LeaseLostError"""
+        cursor = conn.execute(
+            f'UPDATE jobs SET {assignments} WHERE id = ? AND lease_owner = ?',
+            (*params, self.id, self.lease_owner)
+        )
+        if cursor.rowcount == 0:
+            raise LeaseLostError(f"Job {self.id} was reclaimed by another worker")
+
+    def checkpoint(self, stage, **updates):
+        """
+        Persist progress so a retried job resumes after the last finished stage
+
+        The lease is renewed at the same time.
+
+        Args:
+            stage (str): Name of the stage that just finished
+            **updates: Values to merge into the job payload
+
+        Raises:
+            LeaseLostError: If another worker has taken over the job
+        """
+        self.payload.update(updates)
+        self.stage = stage
+        with transaction() as conn:
+            self._update_leased(
+                conn, 'stage = ?, payload = ?, updated_at = ?, lease_expires = ?',
+                (stage, json.dumps(self.payload), datetime.now().isoformat(), time.time() + JOB_LEASE_SECONDS)
+            )
+
+    def renew(self):
+        """
+        Extend the lease by JOB_LEASE_SECONDS
+
+        Raises:
+            LeaseLostError: If another worker has taken over the job
+        """
+        with transaction() as conn:
+            self._update_leased(conn, 'lease_expires = ?', (time.time() + JOB_LEASE_SECONDS,))
+
+    def wait(self, future):
+        """
+        Wait for a future, renewing the lease while it runs
+
+        Raises:
+            LeaseLostError: If another worker has taken over the job
+        """
+        while True:
+            try:
+                return future.result(timeout=JOB_LEASE_SECONDS / 3)
+            except FutureTimeoutError:
+                self.renew()
+
+def register_handler(kind, handler, on_failed=None):
+    """
+    Register the function that runs jobs of a kind
+
+    Args:
+        kind (str): Job kind
+        handler (callable): Called with a Job, returns a JSON-serializable result
+        on_failed (callable, optional): Called with the Job once it has failed for good
+    """
+    _handlers[kind] = handler
+    if on_failed:
+        _failure_handlers[kind] = on_failed
+
+def enqueue(kind, payload):
+    """
+    Add a job to the queue
+
+    Args:
+        kind (str): Job kind, must have a registered handler
+        payload (dict): JSON-serializable job input
+
+    Returns:
+        str: Job ID
+    """
+    job_id = new_id()
+    now = datetime.now().isoformat()
+    with transaction() as conn:
+        conn.execute(
+            """
+            INSERT INTO jobs (id, kind, status, payload, run_after, created_at, updated_at)
+            VALUES (?, ?, 'queued', ?, ?, ?, ?)
+            """,
+            (job_id, kind, json.dumps(payload), time.time(), now, now)
+        )
+    _wakeup.set()
+    return job_id
+
+def get_job(job_id):
+    """
+    Get the state of a job
+
+    Returns:
+        dict or None: Job fields with payload and result decoded
+    """
+    row = get_connection().execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+    if not row:
+        return None
+
+    job = dict(row)
+    job['payload'] = json.loads(job['payload'])
+    job['result'] = json.loads(job['result']) if job['result'] else None
+    return job
+
+def claim():
+    """
+    Atomically take the oldest runnable job
+
+    Queued jobs whose retry delay has passed are runnable, as are running jobs
+    whose lease expired because their worker died.
+
+    Returns:
+        Job or None: The claimed job
+    """
+    now = time.time()
+    lease_owner = new_id()
+    with transaction() as conn:
+        row = conn.execute(
+            """
+            SELECT id, kind, stage, payload, attempts FROM jobs
+            WHERE (status = 'queued' AND run_after <= ?)
+               OR (status = 'running' AND lease_expires < ?)
+            ORDER BY run_after
+            LIMIT 1
+            """,
+            (now, now)
+        ).fetchone()
+        if not row:
+            return None
+
+        conn.execute(
+            """
+            UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_expires = ?, lease_owner = ?,
+                            updated_at = ?
+            WHERE id = ?
+            """,
+            (now + JOB_LEASE_SECONDS, lease_owner, datetime.now().isoformat(), row['id'])
+        )
+
+    return Job(row['id'], row['kind'], row['stage'], json.loads(row['payload']), row['attempts'] + 1, lease_owner)
+
+def _finish(job, result):
+    with transaction() as conn:
+        job._update_leased(
+            conn, "status = 'succeeded', result = ?, error = NULL, lease_expires = NULL, updated_at = ?",
+            (json.dumps(result), datetime.now().isoformat())
+        )
+
+def _fail(job, error):
+    """Requeue a failed job with exponential backoff, or mark it failed for good"""
+    if job.attempts < JOB_MAX_ATTEMPTS:
+        status = 'queued'
+        run_after = time.time() + JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+    else:
+        status = 'failed'
+        run_after = time.time()
+
+    with transaction() as conn:
+        job._update_leased(
+            conn, 'status = ?, error = ?, run_after = ?, lease_expires = NULL, updated_at = ?',
+            (status, error, run_after, datetime.now().isoformat())
+        )
+
+    on_failed = _failure_handlers.get(job.kind)
+    if status == 'failed' and on_failed:
+        on_failed(job)
+
+def run_next():
+    """
+    Claim and run a single job
+
+    Returns:
+        bool: True if a job was run
+    """
+    job = claim()
+    if job is None:
+        return False
+
+    handler = _handlers.get(job.kind)
+    if handler is None:
+        _fail(job, f"No handler registered for job kind {job.kind}")
+        return True
+
+    try:
+        try:
+            result = handler(job)
+        except LeaseLostError:
+            raise
+        except Exception as e:
+            logger.exception("Job %s (%s) failed on attempt %d", job.id, job.kind, job.attempts)
+            metrics.background_errors.inc(('job_handler',))
+            _fail(job, str(e))
+        else:
+            _finish(job, result)
+    except LeaseLostError:
+        # The worker that reclaimed the job owns its outcome now
+        logger.exception("Job %s lost its lease", job.id)
+        metrics.background_errors.inc(('job_lease_lost',))
+    return True
+
+def _worker_loop():
+    while True:
+        try:
+            if run_next():
+                continue
+        except Exception:
+            logger.exception("Job worker error")
+            metrics.background_errors.inc(('job_worker',))
+
+        _wakeup.wait(JOB_POLL_INTERVAL)
+        _wakeup.clear()
+
+def start_workers(count=JOB_WORKERS):
+    """Start background worker threads in the current process"""
+    threads = []
+    for index in range(count):
+        thread = threading.Thread(target=_worker_loop, name=f'job-worker-{index}', daemon=True)
+        thread.start()
+        threads.append(thread)
+    return threads
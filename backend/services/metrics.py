@@ -0,0 +1,239 @@
+import os
+import time
+import bisect
+import functools
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Prometheus metrics and opt-in per-request tracing
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'  # Serve /metrics
+TRACE_HEADER = os.getenv('TRACE_HEADER', 'X-Trace')  # Request header that turns on tracing
+METRICS_PREFIX = 'ipnft'
+
+# Histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def _format_labels(names, values):
+    pairs = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return f'{{{pairs}}}' if pairs else ''
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+class Counter:
+    """Monotonic counter with a fixed set of label names"""
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values=(), amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def collect(self):
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} counter'
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            yield f'{self.name}{_format_labels(self.labels, label_values)} {value}'
+
+class Histogram:
+    """Cumulative histogram of durations with a fixed set of label names"""
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # Per-bucket counts (last one is +Inf), then the sum
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def collect(self):
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} histogram'
+        with self._lock:
+            snapshot = sorted((label_values, list(series)) for label_values, series in self._series.items())
+
+        names = self.labels + ('le',)
+        for label_values, series in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), series):
+                cumulative += count
+                yield f'{self.name}_bucket{_format_labels(names, label_values + (bound,))} {cumulative}'
+            labels = _format_labels(self.labels, label_values)
+            yield f'{self.name}_sum{labels} {series[-1]}'
+            yield f'{self.name}_count{labels} {cumulative}'
+
+class CallbackMetric:
+    """Gauge or counter whose values are read from a callback at scrape time"""
+
+    def __init__(self, name, documentation, callback, labels=(), metric_type='gauge'):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.labels = labels
+        self.metric_type = metric_type
+
+    def collect(self):
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} {self.metric_type}'
+        for label_values, value in sorted(self.callback().items()):
+            yield f'{self.name}{_format_labels(self.labels, label_values)} {value}'
+
+http_request_seconds = Histogram(
+    f'{METRICS_PREFIX}_http_request_duration_seconds',
+    'Time spent handling HTTP requests, by Flask endpoint',
+    labels=('method', 'endpoint', 'status')
+)
+operation_seconds = Histogram(
+    f'{METRICS_PREFIX}_operation_duration_seconds',
+    'Time spent in instrumented calls: service functions, RPC methods, outbound HTTP and model I/O',
+    labels=('layer', 'operation')
+)
+operation_errors = Counter(
+    f'{METRICS_PREFIX}_operation_errors_total',
+    'Instrumented calls that raised',
+    labels=('layer', 'operation')
+)
+
+background_errors = Counter(
+    f'{METRICS_PREFIX}_background_errors_total',
+    'Failures caught and logged by background threads and fallbacks, by component',
+    labels=('component',)
+)
+
+_registry = [http_request_seconds, operation_seconds, operation_errors, background_errors]
+
+def register(metric):
+    """Add a metric from another module to the /metrics output"""
+    _registry.append(metric)
+
+# Spans of the current request when it asked for a trace, else None
+_trace = ContextVar('trace', default=None)
+
+def record(layer, operation, seconds, error=False):
+    """
+    Record one timed call
+
+    Args:
+        layer (str): 'service', 'rpc', 'http' or 'model'
+        operation (str): Call name, e.g. 'ipfs.upload'
+        seconds (float): Duration
+        error (bool): Whether the call raised
+    """
+    operation_seconds.observe((layer, operation), seconds)
+    if error:
+        operation_errors.inc((layer, operation))
+
+    spans = _trace.get()
+    if spans is not None:
+        spans.append((f'{layer}.{operation}', seconds))
+
+@contextmanager
+def timer(layer, operation):
+    """Time a block of code, see record"""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        record(layer, operation, time.perf_counter() - start, error=True)
+        raise
+    record(layer, operation, time.perf_counter() - start)
+
+def timed(operation, layer='service'):
+    """Decorator that times every call of a function, see record"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timer(layer, operation):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def start_trace():
+    """Collect spans for the current context; returns a token for end_trace"""
+    return _trace.set([])
+
+def end_trace(token):
+    """
+    Stop collecting spans
+
+    Returns:
+        list: (name, seconds) spans in completion order
+    """
+    spans = _trace.get()
+    _trace.reset(token)
+    return spans or []
+
+def render():
+    """Current metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.collect())
+    return '\n'.join(lines) + '\n'
+
+def init_app(app):
+    """
+    Time every request of a Flask app
+
+    Requests that send TRACE_HEADER: 1 get a Server-Timing response header
+    listing each instrumented call they made, including calls run on the
+    shared I/O pool.
+    """
+    from flask import g, request
+
+    # Modules that register scrape-time metrics on import, so /metrics lists
+    # them from the first scrape rather than after their first use
+    from services import http_session
+
+    @app.before_request
+    def _start_request_timer():
+        g.metrics_start = time.perf_counter()
+        if request.headers.get(TRACE_HEADER, '').lower() in ('1', 'true'):
+            g.trace_token = start_trace()
+
+    @app.after_request
+    def _observe_request(response):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return response
+
+        elapsed = time.perf_counter() - start
+        http_request_seconds.observe((request.method, request.endpoint or 'unmatched', str(response.status_code)),
+                                     elapsed)
+
+        token = g.pop('trace_token', None)
+        if token is not None:
+            timings = [f'{name};dur={seconds * 1000:.1f}' for name, seconds in end_trace(token)]
+            timings.append(f'total;dur={elapsed * 1000:.1f}')
+            response.headers['Server-Timing'] = ', '.join(timings)
+        return response
+
+    @app.teardown_request
+    def _end_trace(exc):
+        # Requests that failed before after_request still release their trace
+        token = g.pop('trace_token', None)
+        if token is not None:
+            end_trace(token)
@@ -0,0 +1,130 @@
+import os
+import logging
+from dotenv import load_dotenv
+
+from services import metrics
+
+# Load environment variables
+load_dotenv()
+
+# Multicall3 is deployed at the same address on mainnet, the public testnets
+# and most L2s. Local dev chains (anvil, eth-tester) need it deployed first,
+# or MULTICALL3_ADDRESS pointed at their own copy.
+MULTICALL3_ADDRESS = os.getenv('MULTICALL3_ADDRESS', '0xcA11bde05977b3631167028862bE2a173976CA11')
+
+# Number of calls packed into a single eth_call
+MULTICALL_CHUNK_SIZE = int(os.getenv('MULTICALL_CHUNK_SIZE', 500))
+
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"internalType": "address", "name": "target", "type": "address"},
+                    {"internalType": "bool", "name": "allowFailure", "type": "bool"},
+                    {"internalType": "bytes", "name": "callData", "type": "bytes"}
+                ],
+                "internalType": "struct Multicall3.Call3[]",
+                "name": "calls",
+                "type": "tuple[]"
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"internalType": "bool", "name": "success", "type": "bool"},
+                    {"internalType": "bytes", "name": "returnData", "type": "bytes"}
+                ],
+                "internalType": "struct Multicall3.Result[]",
+                "name": "returnData",
+                "type": "tuple[]"
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function"
+    }
+]
+
+logger = logging.getLogger(__name__)
+
+# Per-connection answer to "is Multicall3 deployed here?"
+_multicall_available = {}
+
+def _get_multicall(w3):
+    """
+    Get the Multicall3 contract if it is deployed on the connected chain
+
+    Returns:
+        Contract or None: Multicall3 contract, or None if there is no code at the address
+    """
+    address = w3.to_checksum_address(MULTICALL3_ADDRESS)
+    if w3 not in _multicall_available:
+        _multicall_available[w3] = len(w3.eth.get_code(address)) > 0
+
+    if not _multicall_available[w3]:
+        return None
+
+    return w3.eth.contract(address=address, abi=MULTICALL3_ABI)
+
+def _output_types(function_call):
+    """Get the ABI output types of a bound contract function"""
+    from eth_utils.abi import collapse_if_tuple
+    return [collapse_if_tuple(output) for output in function_call.abi['outputs']]
+
+def batch_call(w3, function_calls, chunk_size=None, block_identifier=None):
+    """
+    Execute many read-only contract calls with as few RPC round trips as possible
+
+    Calls are packed into Multicall3 ``aggregate3`` requests of ``chunk_size``
+    calls each, all pinned to the same block so the results are a consistent
+    snapshot. If Multicall3 is not deployed on the chain, each call is made
+    individually instead.
+
+    Args:
+        w3 (Web3): Connected Web3 instance
+        function_calls (list): Bound contract functions, e.g. contract.functions.getPatent(1)
+        chunk_size (int, optional): Calls per request, defaults to MULTICALL_CHUNK_SIZE
+        block_identifier (int, optional): Block to read at, defaults to the latest block
+            (resolved to a number up front when more than one request is needed)
+
+    Returns:
+        list: Decoded return values in call order, or None for calls that reverted
+    """
+    if not function_calls:
+        return []
+
+    chunk_size = chunk_size or MULTICALL_CHUNK_SIZE
+    if block_identifier is None:
+        block_identifier = w3.eth.block_number if len(function_calls) > chunk_size else 'latest'
+
+    multicall = _get_multicall(w3)
+    if multicall is None:
+        return [_single_call(function_call, block_identifier) for function_call in function_calls]
+
+    results = []
+    for start in range(0, len(function_calls), chunk_size):
+        chunk = function_calls[start:start + chunk_size]
+        calls = [
+            (function_call.address, True, function_call._encode_transaction_data())
+            for function_call in chunk
+        ]
+        responses = multicall.functions.aggregate3(calls).call(block_identifier=block_identifier)
+
+        for function_call, (success, return_data) in zip(chunk, responses):
+            if not success:
+                results.append(None)
+                continue
+            decoded = w3.codec.decode(_output_types(function_call), return_data)
+            results.append(decoded[0] if len(decoded) == 1 else tuple(decoded))
+
+    return results
+
+def _single_call(function_call, block_identifier):
+    """Fallback for chains without Multicall3"""
+    try:
+        return function_call.call(block_identifier=block_identifier)
+    except Exception:
+        logger.exception("Error calling %s", function_call.fn_name)
+        metrics.background_errors.inc(('multicall',))
+        return None
@@ -0,0 +1,116 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+from dotenv import load_dotenv
+
+from services import metrics
+
+# Load environment variables
+load_dotenv()
+
+# Password hashing parameters; existing hashes are upgraded on the next login
+PASSWORD_HASH_ALGORITHM = os.getenv('PASSWORD_HASH_ALGORITHM', 'sha256')  # PBKDF2 digest
+PASSWORD_HASH_ITERATIONS = int(os.getenv('PASSWORD_HASH_ITERATIONS', DEFAULT_PBKDF2_ITERATIONS))
+PASSWORD_SALT_LENGTH = int(os.getenv('PASSWORD_SALT_LENGTH', 16))
+
+# Hashing runs on a bounded pool so login bursts cannot take every request thread's CPU
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', os.cpu_count() or 2))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', PASSWORD_HASH_WORKERS * 4))  # Queued and running
+
+PASSWORD_HASH_METHOD = f'pbkdf2:{PASSWORD_HASH_ALGORITHM}:{PASSWORD_HASH_ITERATIONS}'
+
+class HashingBusyError(Exception):
+    """Raised when PASSWORD_HASH_MAX_PENDING hashes are already queued or running"""
+
+# hashlib releases the GIL inside PBKDF2, so threads hash in parallel
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix='password')
+_slots = threading.BoundedSemaphore(PASSWORD_HASH_MAX_PENDING)
+
+# Checked in place of a missing hash; made on the hashing pool by the first unknown login
+_dummy_hash = None
+_dummy_hash_lock = threading.Lock()
+
+def _run(operation, fn, *args):
+    """Run fn on the hashing pool and wait for it, or fail fast if the pool is saturated"""
+    if not _slots.acquire(blocking=False):
+        metrics.operation_errors.inc(('service', f'password.{operation}_rejected'))
+        raise HashingBusyError("Too many password checks in progress")
+
+    try:
+        future = _executor.submit(fn, *args)
+    except BaseException:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())
+
+    with metrics.timer('service', f'password.{operation}'):
+        return future.result()
+
+def hash_password(password):
+    """
+    Hash a password with the configured parameters
+
+    Raises:
+        HashingBusyError: If the hashing pool is saturated
+
+    Returns:
+        str: werkzeug password hash
+    """
+    return _run('hash', generate_password_hash, password, PASSWORD_HASH_METHOD, PASSWORD_SALT_LENGTH)
+
+def needs_rehash(password_hash):
+    """Whether a stored hash was made with other parameters than the configured ones"""
+    return password_hash.split('$', 1)[0] != PASSWORD_HASH_METHOD
+
+def _get_dummy_hash():
+    global _dummy_hash
+    if _dummy_hash is None:
+        with _dummy_hash_lock:
+            if _dummy_hash is None:
+                _dummy_hash = hash_password('')
+    return _dummy_hash
+
+def verify_password(password_hash, password):
+    """
+    Check a password against a stored hash
+
+    A missing hash is checked against a dummy one, so unknown accounts take
+    as long to reject as wrong passwords.
+
+    Raises:
+        HashingBusyError: If the hashing pool is saturated
+
+    Returns:
+        bool: Whether the password matches
+    """
+    if not password_hash:
+        _run('verify', check_password_hash, _get_dummy_hash(), password or '')
+        return False
+    return _run('verify', check_password_hash, password_hash, password or '')
+
+def verify_and_upgrade(user, password):
+    """
+    Check a user's password, rehashing it if the hash parameters changed
+
+    Args:
+        user (User): User loaded from the user store, or None
+        password (str): Submitted password
+
+    Raises:
+        HashingBusyError: If the hashing pool is saturated
+
+    Returns:
+        bool: Whether the password matches
+    """
+    if not verify_password(user.password_hash if user else None, password):
+        return False
+
+    if needs_rehash(user.password_hash):
+        try:
+            user.password_hash = hash_password(password)
+            user.save()
+        except HashingBusyError:
+            # The old hash still works; upgrade on a quieter login
+            pass
+    return True
@@ -0,0 +1,210 @@
+import os
+import time
+import threading
+from urllib.parse import urlsplit
+from web3.providers.base import JSONBaseProvider
+from dotenv import load_dotenv
+
+from services import io_pool, metrics
+from services.http_session import PooledSession, HTTP_CONNECT_TIMEOUT, HTTP_POOL_SIZE
+
+# Load environment variables
+load_dotenv()
+
+# JSON-RPC endpoint pool configuration
+RPC_READ_TIMEOUT = float(os.getenv('RPC_READ_TIMEOUT', 10))  # Seconds before failing over to the next node
+RPC_FAILURE_THRESHOLD = int(os.getenv('RPC_FAILURE_THRESHOLD', 3))  # Consecutive failures that open the circuit
+RPC_COOLDOWN = float(os.getenv('RPC_COOLDOWN', 30))  # Seconds an open circuit stays open
+RPC_HEALTH_INTERVAL = float(os.getenv('RPC_HEALTH_INTERVAL', 30))  # Seconds between health checks
+RPC_MAX_BLOCK_LAG = int(os.getenv('RPC_MAX_BLOCK_LAG', 3))  # Blocks a node may trail the best node
+LATENCY_SMOOTHING = 0.3  # Weight of the newest sample in the latency average
+
+# Calls that must all reach the same node: a raw transaction and the pending
+# nonce it was built with only agree if one mempool sees both
+PINNED_METHODS = {'eth_sendRawTransaction', 'eth_sendTransaction', 'eth_getTransactionCount'}
+
+class Endpoint:
+    """One JSON-RPC node with its latency average and circuit breaker state"""
+
+    def __init__(self, url):
+        self.url = url
+        parts = urlsplit(url)
+        self.host = f"{parts.hostname}:{parts.port}" if parts.port else parts.hostname
+        self.latency = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.open_until = 0
+        self.block_number = None
+        self.lagging = False
+
+    def available(self, now):
+        """Closed circuits are available, as are open ones whose cooldown passed (half-open)"""
+        return self.open_until <= now and not self.lagging
+
+    def record_success(self, seconds):
+        self.requests += 1
+        self.consecutive_failures = 0
+        self.open_until = 0
+        if self.latency:
+            self.latency += LATENCY_SMOOTHING * (seconds - self.latency)
+        else:
+            self.latency = seconds
+
+    def record_failure(self, now):
+        self.requests += 1
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= RPC_FAILURE_THRESHOLD:
+            # Half-open after the cooldown: one more failure reopens it immediately
+            self.open_until = now + RPC_COOLDOWN
+
+class ProviderPool(JSONBaseProvider):
+    """
+    web3 provider that spreads requests over several JSON-RPC nodes
+
+    Reads go to the healthy node with the lowest average latency, falling
+    over to the next one when a request fails or times out. Transaction
+    submission and nonce lookups stay on one pinned node until it fails.
+    A node that fails RPC_FAILURE_THRESHOLD times in a row is skipped for
+    RPC_COOLDOWN seconds. All nodes share one keep-alive session, so a slow
+    node only costs its own read timeout.
+    """
+
+    def __init__(self, urls, session=None, health_interval=RPC_HEALTH_INTERVAL):
+        super().__init__()
+        if not urls:
+            raise ValueError("ProviderPool needs at least one RPC URL")
+
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.session = session or PooledSession(
+            pool_size=HTTP_POOL_SIZE,
+            max_retries=0,  # Failover replaces retries
+            timeout=(HTTP_CONNECT_TIMEOUT, RPC_READ_TIMEOUT)
+        )
+        self.health_interval = health_interval
+        self._pinned = None
+        self._next_health_check = 0
+        self._lock = threading.Lock()
+
+    def _candidates(self, method):
+        """Endpoints in the order they should be tried for a method"""
+        now = time.monotonic()
+        with self._lock:
+            available = [e for e in self.endpoints if e.available(now)]
+            unavailable = sorted((e for e in self.endpoints if not e.available(now)),
+                                 key=lambda e: e.open_until)
+
+            if method in PINNED_METHODS:
+                if self._pinned is None or not self._pinned.available(now):
+                    self._pinned = available[0] if available else None
+                ordered = [self._pinned] if self._pinned else []
+                ordered += [e for e in available if e is not self._pinned]
+            else:
+                ordered = sorted(available, key=lambda e: e.latency)
+
+        # With every circuit open, still try the nodes rather than fail outright
+        return ordered + unavailable
+
+    def _post(self, endpoint, request_data):
+        response = self.session.post(endpoint.url, data=request_data,
+                                     headers={'Content-Type': 'application/json'})
+        response.raise_for_status()
+        return response.content
+
+    def make_request(self, method, params):
+        with metrics.timer('rpc', method):
+            return self._make_request(method, params)
+
+    def _make_request(self, method, params):
+        self._maybe_check_health()
+        request_data = self.encode_rpc_request(method, params)
+
+        last_error = None
+        for endpoint in self._candidates(method):
+            start = time.perf_counter()
+            try:
+                raw_response = self._post(endpoint, request_data)
+            except Exception as e:
+                last_error = e
+                with self._lock:
+                    endpoint.record_failure(time.monotonic())
+                    if endpoint is self._pinned:
+                        self._pinned = None
+                continue
+
+            with self._lock:
+                endpoint.record_success(time.perf_counter() - start)
+                if method in PINNED_METHODS and self._pinned is None:
+                    # The node that took over from a failed one keeps the nonce and mempool state
+                    self._pinned = endpoint
+            return self.decode_rpc_response(raw_response)
+
+        raise ConnectionError(f"All RPC endpoints failed for {method}: {last_error}")
+
+    def is_connected(self):
+        try:
+            self.make_request('web3_clientVersion', [])
+            return True
+        except Exception:
+            return False
+
+    def _maybe_check_health(self):
+        now = time.monotonic()
+        if now < self._next_health_check:
+            return
+        with self._lock:
+            if now < self._next_health_check:
+                return
+            self._next_health_check = now + self.health_interval
+        io_pool.submit(self.check_health)
+
+    def check_health(self):
+        """
+        Probe every node with eth_blockNumber
+
+        Updates latency averages and circuit state, and takes nodes that
+        trail the best block by more than RPC_MAX_BLOCK_LAG blocks out of rotation.
+        """
+        request_data = self.encode_rpc_request('eth_blockNumber', [])
+        for endpoint in self.endpoints:
+            start = time.perf_counter()
+            try:
+                response = self.decode_rpc_response(self._post(endpoint, request_data))
+                block_number = int(response['result'], 16)
+            except Exception:
+                with self._lock:
+                    endpoint.record_failure(time.monotonic())
+                    endpoint.block_number = None
+                continue
+
+            with self._lock:
+                endpoint.record_success(time.perf_counter() - start)
+                endpoint.block_number = block_number
+
+        with self._lock:
+            heads = [e.block_number for e in self.endpoints if e.block_number is not None]
+            best = max(heads) if heads else None
+            for endpoint in self.endpoints:
+                endpoint.lagging = (best is not None and endpoint.block_number is not None
+                                    and best - endpoint.block_number > RPC_MAX_BLOCK_LAG)
+
+    def stats(self):
+        """
+        Snapshot per-node routing state
+
+        Returns:
+            list: One dict per endpoint, hosts only so API keys in URLs stay private
+        """
+        now = time.monotonic()
+        with self._lock:
+            return [{
+                'host': e.host,
+                'latency_ms': round(e.latency * 1000, 1),
+                'requests': e.requests,
+                'failures': e.failures,
+                'circuit_open': e.open_until > now,
+                'lagging': e.lagging,
+                'block_number': e.block_number,
+                'pinned': e is self._pinned
+            } for e in self.endpoints]
@@ -0,0 +1,214 @@
+import os
+import json
+import time
+from datetime import datetime
+
+from models.database import get_connection, transaction
+from models.patent_model import Patent
+from services import job_queue
+from services.ipfs_service import upload_to_ipfs, upload_file_to_ipfs_async
+from services.blockchain_service import (register_patent, get_transaction_params, get_transaction_params_async,
+                                        release_nonce, resync_nonce, is_nonce_error)
+
+# Patent registration runs as a background job in four stages:
+#   upload        stream the attached file to IPFS
+#   metadata_pin  upload the metadata JSON that references the file
+#   chain_submit  register the metadata CID on the contract
+#   persist       store the patent locally
+# Each stage checkpoints its output, so a retried job skips finished stages.
+# Independent network calls overlap: the file pin, the nonce and the gas
+# price are all in flight at once, and only the metadata pin waits on the
+# file CID, so registration takes about as long as its slowest call chain.
+
+JOB_KIND = 'register_patent'
+
+# Orphaned spool files are only swept once they are this many seconds old
+SPOOL_SWEEP_MIN_AGE = 3600
+
+def record_upload(user_id, cid, sha256, filename=None):
+    """
+    Remember a file a user pinned through /upload so a registration can reference it
+
+    Args:
+        user_id (str): ID of the uploading user
+        cid (str): IPFS CID of the file
+        sha256 (str): SHA-256 of the file, computed while it was streamed
+        filename (str, optional): Name the file was uploaded with
+    """
+    with transaction() as conn:
+        conn.execute(
+            """
+            INSERT INTO uploads (user_id, cid, sha256, filename, created_at) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(user_id, cid) DO UPDATE SET sha256 = excluded.sha256, filename = excluded.filename
+            """,
+            (user_id, cid, sha256, filename, datetime.now().isoformat())
+        )
+
+def get_upload(user_id, cid):
+    """
+    Get a file the user pinned through /upload
+
+    Returns:
+        dict or None: cid, sha256, filename and created_at, or None if this user did not upload it
+    """
+    row = get_connection().execute(
+        'SELECT cid, sha256, filename, created_at FROM uploads WHERE user_id = ? AND cid = ?', (user_id, cid)
+    ).fetchone()
+    return dict(row) if row else None
+
+def submit_registration(user_id, wallet_address, title, description, category, duration,
+                        file_path=None, filename=None, content_type=None, file_cid=None, file_sha256=None):
+    """
+    Queue a patent registration
+
+    Args:
+        user_id (str): ID of the registering user
+        wallet_address (str): Wallet that will own the patent
+        title (str): Patent title
+        description (str): Patent description
+        category (str): Patent category
+        duration (int): Patent duration in years
+        file_path (str, optional): Spooled upload to pin, deleted once pinned or failed for good
+        filename (str, optional): Original name of the uploaded file
+        content_type (str, optional): MIME type of the uploaded file
+        file_cid (str, optional): CID of a file already pinned through /upload, see get_upload
+        file_sha256 (str, optional): SHA-256 recorded for file_cid by record_upload
+
+    Returns:
+        str: Job ID
+    """
+    return job_queue.enqueue(JOB_KIND, {
+        'user_id': user_id,
+        'wallet_address': wallet_address,
+        'title': title,
+        'description': description,
+        'category': category,
+        'duration': duration,
+        'created_at': datetime.now().isoformat(),
+        'file_path': file_path,
+        'filename': filename,
+        'content_type': content_type,
+        'file_cid': file_cid,
+        'file_sha256': file_sha256
+    })
+
+def run_registration(job):
+    """
+    Job handler that runs the registration stages
+
+    Returns:
+        dict: token_id, tx_hash and cid of the registered patent
+    """
+    payload = job.payload
+
+    # Start the chain RPCs now so they overlap with the IPFS uploads
+    pending_tx_params = None
+    if not payload.get('tx_hash'):
+        pending_tx_params = get_transaction_params_async(payload['wallet_address'])
+
+    # Stage 1: pin the file
+    if payload.get('file_path') and not payload.get('file_cid'):
+        # Large uploads can outlast the lease, so keep renewing it meanwhile
+        file_cid, file_sha256 = job.wait(upload_file_to_ipfs_async(
+            payload['file_path'], payload['filename'], payload['content_type']
+        ))
+        job.checkpoint('upload', file_cid=file_cid, file_sha256=file_sha256)
+        _remove_spool_file(payload['file_path'])
+
+    # Stage 2: pin the metadata
+    if not payload.get('metadata_cid'):
+        metadata = {
+            "title": payload['title'],
+            "description": payload['description'],
+            "category": payload['category'],
+            "duration": payload['duration'],
+            "creator": payload['wallet_address'],
+            "createdAt": payload['created_at'],
+        }
+        if payload.get('file_cid'):
+            metadata["file_cid"] = payload['file_cid']
+            if payload.get('file_sha256'):
+                metadata["file_sha256"] = payload['file_sha256']
+
+        job.checkpoint('metadata_pin', metadata_cid=upload_to_ipfs(json_data=metadata))
+
+    # Stage 3: register on the blockchain
+    if not payload.get('tx_hash'):
+        tx_params = get_transaction_params(payload['wallet_address'], pending_tx_params)
+        try:
+            tx_hash, token_id = register_patent(
+                wallet_address=payload['wallet_address'],
+                cid=payload['metadata_cid'],
+                tx_params=tx_params
+            )
+        except Exception as e:
+            # A failed attempt must not leave a gap in the wallet's nonces
+            if is_nonce_error(e):
+                resync_nonce(payload['wallet_address'])
+            else:
+                release_nonce(payload['wallet_address'], tx_params)
+            raise
+        job.checkpoint('chain_submit', tx_hash=tx_hash, token_id=token_id)
+
+    # Stage 4: store locally, keyed by job ID so a retry overwrites instead of
+    # duplicating; jobs queued before patents were re-keyed map to the new ID
+    patent = Patent(
+        id=Patent.resolve_id(job.id),
+        title=payload['title'],
+        description=payload['description'],
+        category=payload['category'],
+        owner_id=payload['user_id'],
+        token_id=payload['token_id'],
+        cid=payload['metadata_cid'],
+        tx_hash=payload['tx_hash'],
+        duration=payload['duration'],
+        created_at=payload['created_at']
+    )
+    patent.save()
+    job.checkpoint('persist')
+
+    return {
+        'token_id': payload['token_id'],
+        'tx_hash': payload['tx_hash'],
+        'cid': payload['metadata_cid']
+    }
+
+def _remove_spool_file(file_path):
+    try:
+        os.remove(file_path)
+    except FileNotFoundError:
+        pass
+
+def discard_registration(job):
+    """Failure handler: drop the spooled upload of a registration that will not be retried"""
+    if job.payload.get('file_path'):
+        _remove_spool_file(job.payload['file_path'])
+
+def sweep_spool_files(folder, min_age=SPOOL_SWEEP_MIN_AGE):
+    """
+    Delete spooled uploads that no queued or running registration refers to
+
+    Files younger than min_age are kept, since their job may not be queued yet.
+
+    Args:
+        folder (str): Upload spool directory
+
+    Returns:
+        int: Number of files deleted
+    """
+    rows = get_connection().execute(
+        "SELECT payload FROM jobs WHERE kind = ? AND status IN ('queued', 'running')", (JOB_KIND,)
+    ).fetchall()
+    in_use = {json.loads(row['payload']).get('file_path') for row in rows}
+
+    removed = 0
+    cutoff = time.time() - min_age
+    for entry in os.scandir(folder):
+        if not entry.is_file() or entry.name.startswith('.') or entry.path in in_use:
+            continue
+        if entry.stat().st_mtime < cutoff:
+            _remove_spool_file(entry.path)
+            removed += 1
+    return removed
+
+job_queue.register_handler(JOB_KIND, run_registration, on_failed=discard_registration)
@@ -0,0 +1,196 @@
+import os
+import time
+import secrets
+import threading
+from collections import OrderedDict
+from flask.sessions import SessionInterface, SessionMixin, session_json_serializer
+from werkzeug.datastructures import CallbackDict
+from dotenv import load_dotenv
+
+from models.database import get_connection, transaction
+
+# Load environment variables
+load_dotenv()
+
+# Server-side sessions: the cookie only carries a random session ID
+SESSION_BACKEND = os.getenv('SESSION_BACKEND', 'sqlite').lower()  # sqlite, memory or cookie
+SESSION_TTL = float(os.getenv('SESSION_TTL', 24 * 3600))  # Seconds of inactivity before a session expires
+SESSION_MEMORY_SIZE = int(os.getenv('SESSION_MEMORY_SIZE', 10000))  # Sessions kept by the memory backend
+SESSION_CLEANUP_INTERVAL = 300  # Seconds between sweeps of expired SQLite sessions
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """Session dict that remembers its ID and the user it was loaded for"""
+
+    def __init__(self, initial=None, sid=None, expires_at=None):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.expires_at = expires_at
+        self.loaded_user_id = self.get('_user_id')
+        self.new = sid is None
+        self.modified = False
+
+class MemorySessionStore:
+    """
+    Sessions in a bounded in-process LRU
+
+    Only suitable for a single worker process; sessions are lost on restart.
+    """
+
+    def __init__(self, max_size=SESSION_MEMORY_SIZE):
+        self.max_size = max_size
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, sid):
+        """
+        Returns:
+            tuple or None: (serialized data, expires_at) of a live session
+        """
+        with self._lock:
+            entry = self._sessions.get(sid)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._sessions[sid]
+                return None
+            self._sessions.move_to_end(sid)
+            return entry
+
+    def put(self, sid, data, expires_at):
+        with self._lock:
+            self._sessions[sid] = (data, expires_at)
+            self._sessions.move_to_end(sid)
+            while len(self._sessions) > self.max_size:
+                self._sessions.popitem(last=False)
+
+    def touch(self, sid, expires_at):
+        with self._lock:
+            entry = self._sessions.get(sid)
+            if entry is not None:
+                self._sessions[sid] = (entry[0], expires_at)
+
+    def delete(self, sid):
+        with self._lock:
+            self._sessions.pop(sid, None)
+
+class SQLiteSessionStore:
+    """Sessions in the sessions table of the app database, shared by all worker processes"""
+
+    def __init__(self, cleanup_interval=SESSION_CLEANUP_INTERVAL):
+        self.cleanup_interval = cleanup_interval
+        self._next_cleanup = 0
+
+    def get(self, sid):
+        """
+        Returns:
+            tuple or None: (serialized data, expires_at) of a live session
+        """
+        row = get_connection().execute(
+            'SELECT data, expires_at FROM sessions WHERE id = ? AND expires_at > ?', (sid, time.time())
+        ).fetchone()
+        return (row['data'], row['expires_at']) if row else None
+
+    def put(self, sid, data, expires_at):
+        with transaction() as conn:
+            conn.execute(
+                """
+                INSERT INTO sessions (id, data, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at
+                """,
+                (sid, data, expires_at)
+            )
+            if time.time() >= self._next_cleanup:
+                self._next_cleanup = time.time() + self.cleanup_interval
+                conn.execute('DELETE FROM sessions WHERE expires_at <= ?', (time.time(),))
+
+    def touch(self, sid, expires_at):
+        with transaction() as conn:
+            conn.execute('UPDATE sessions SET expires_at = ? WHERE id = ?', (expires_at, sid))
+
+    def delete(self, sid):
+        with transaction() as conn:
+            conn.execute('DELETE FROM sessions WHERE id = ?', (sid,))
+
+class ServerSideSessionInterface(SessionInterface):
+    """
+    Flask session interface backed by a session store
+
+    The cookie holds only an unguessable session ID. Sessions expire after
+    SESSION_TTL seconds without a request; the expiry is pushed forward at
+    most once per half TTL, so unchanged sessions are rarely written. The
+    session ID is replaced whenever the logged-in user changes, which stops
+    session fixation across a login.
+    """
+
+    serializer = session_json_serializer
+
+    def __init__(self, store, ttl=SESSION_TTL):
+        self.store = store
+        self.ttl = ttl
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            entry = self.store.get(sid)
+            if entry is not None:
+                data, expires_at = entry
+                return ServerSideSession(self.serializer.loads(data), sid=sid, expires_at=expires_at)
+        return ServerSideSession()
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        now = time.time()
+        sid = session.sid
+        if session.get('_user_id') != session.loaded_user_id:
+            # Log in or out: continue under a fresh ID
+            if sid:
+                self.store.delete(sid)
+            sid = None
+
+        if sid is None or session.modified:
+            sid = sid or secrets.token_urlsafe(32)
+            self.store.put(sid, self.serializer.dumps(dict(session)), now + self.ttl)
+        elif session.expires_at - now < self.ttl / 2:
+            self.store.touch(sid, now + self.ttl)
+        else:
+            return
+
+        response.set_cookie(
+            name, sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app)
+        )
+
+def init_app(app, backend=SESSION_BACKEND):
+    """
+    Install the configured session backend
+
+    Args:
+        app (Flask): Application to configure
+        backend (str): 'sqlite', 'memory', or 'cookie' for Flask's signed cookie sessions
+    """
+    if backend == 'cookie':
+        return
+    if backend == 'memory':
+        store = MemorySessionStore()
+    elif backend == 'sqlite':
+        store = SQLiteSessionStore()
+    else:
+        raise ValueError(f"Unknown SESSION_BACKEND {backend}")
+    app.session_interface = ServerSideSessionInterface(store)
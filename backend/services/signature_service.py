@@ -0,0 +1,151 @@
+import os
+import hashlib
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dotenv import load_dotenv
+
+from services import metrics
+
+# Load environment variables
+load_dotenv()
+
+# Wallet signature recovery
+SIGNATURE_WORKERS = int(os.getenv('SIGNATURE_WORKERS', os.cpu_count() or 2))  # Processes for batch recovery, 0 for none
+SIGNATURE_CACHE_SIZE = int(os.getenv('SIGNATURE_CACHE_SIZE', 10000))  # Recovered addresses kept in memory
+SIGNATURE_BATCH_MAX = int(os.getenv('SIGNATURE_BATCH_MAX', 256))  # Signatures accepted per batch request
+SIGNATURE_PARALLEL_MIN = 8  # Smaller batches are recovered in-process, pool IPC would cost more
+
+class RecoveredAddressCache:
+    """LRU of (message hash, signature) -> recovered address, or None for unrecoverable signatures"""
+
+    def __init__(self, max_size=SIGNATURE_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns:
+            tuple: (found, address)
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, address):
+        with self._lock:
+            self._entries[key] = address
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+recovered_addresses = RecoveredAddressCache()
+
+_executor = None
+
+def start_pool():
+    """
+    Fork the batch recovery processes
+
+    Call this at startup while the process still has a single thread: a fork
+    copies any lock another thread holds at that moment, and the pool never
+    forks again afterwards. Without a pool, batches are recovered in-process.
+    """
+    global _executor
+    if _executor is not None or SIGNATURE_WORKERS < 1 or threading.active_count() > 1:
+        return
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        return
+    executor = ProcessPoolExecutor(max_workers=SIGNATURE_WORKERS, mp_context=multiprocessing.get_context('fork'))
+    # The workers are forked on the first submit, so make it now
+    executor.submit(int).result()
+    _executor = executor
+
+def _forget_pool():
+    # A process forked from the app (e.g. gunicorn --preload) does not own the pool
+    global _executor
+    _executor = None
+
+os.register_at_fork(after_in_child=_forget_pool)
+
+def _cache_key(message, signature):
+    signature = signature.lower()
+    if not signature.startswith('0x'):
+        signature = '0x' + signature
+    return hashlib.sha256(message.encode('utf-8')).digest(), signature
+
+def recover_signer(message, signature):
+    """
+    Recover the address that signed a personal message, using the cache
+
+    Returns:
+        str or None: Checksummed signer address, None if the signature is invalid
+    """
+    from services import signature_worker
+
+    key = _cache_key(message, signature)
+    found, address = recovered_addresses.get(key)
+    if not found:
+        address = signature_worker.recover(message, signature)
+        recovered_addresses.put(key, address)
+    return address
+
+def verify_batch(items):
+    """
+    Verify many (message, signature, address) triples
+
+    Cached results are answered straight away; the rest are recovered in
+    parallel on the pool from start_pool, in one chunk per worker.
+
+    Args:
+        items (list): (message, signature, address) tuples
+
+    Returns:
+        list: One bool per item, in order
+    """
+    from services import signature_worker
+
+    with metrics.timer('service', 'signature.verify_batch'):
+        signers = [None] * len(items)
+        misses = {}
+        for index, (message, signature, _) in enumerate(items):
+            key = _cache_key(message, signature)
+            found, address = recovered_addresses.get(key)
+            if found:
+                signers[index] = address
+            else:
+                # Duplicates within a batch are recovered once
+                misses.setdefault(key, (message, signature, []))[2].append(index)
+
+        pending = list(misses.items())
+        pairs = [(message, signature) for _, (message, signature, _) in pending]
+        executor = _executor if len(pairs) >= SIGNATURE_PARALLEL_MIN else None
+        recovered = None
+        if executor is not None:
+            chunk_size = -(-len(pairs) // SIGNATURE_WORKERS)
+            chunks = [pairs[i:i + chunk_size] for i in range(0, len(pairs), chunk_size)]
+            try:
+                recovered = [address for chunk in executor.map(signature_worker.recover_many, chunks)
+                             for address in chunk]
+            except BrokenProcessPool:
+                # A worker died; the pool cannot be re-forked safely, so carry on in-process
+                _forget_pool()
+        if recovered is None:
+            recovered = signature_worker.recover_many(pairs)
+
+        for (key, (_, _, indexes)), address in zip(pending, recovered):
+            recovered_addresses.put(key, address)
+            for index in indexes:
+                signers[index] = address
+
+    return [signer is not None and signer.lower() == address.lower()
+            for signer, (_, _, address) in zip(signers, items)]
@@ -0,0 +1,16 @@
+# Recovery functions run by services.signature_service, in-process or on its
+# forked pool; imported lazily because eth_account takes a while to load
+
+from eth_account import Account
+from eth_account.messages import encode_defunct
+
+def recover(message, signature):
+    """Signer of an EIP-191 personal message, or None if the signature is malformed"""
+    try:
+        return Account.recover_message(encode_defunct(text=message), signature=signature)
+    except Exception:
+        return None
+
+def recover_many(pairs):
+    """Pool task: recover a chunk of (message, signature) pairs"""
+    return [recover(message, signature) for message, signature in pairs]
@@ -0,0 +1,178 @@
+import os
+import time
+import threading
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Transaction parameter caching
+GAS_PRICE_TTL = float(os.getenv('GAS_PRICE_TTL', 12))  # Seconds, about one block
+GAS_ESTIMATE_BUFFER = float(os.getenv('GAS_ESTIMATE_BUFFER', 1.25))  # Headroom over the first estimate
+DEFAULT_GAS_LIMIT = int(os.getenv('DEFAULT_GAS_LIMIT', 2000000))  # Used when estimation reverts
+NONCE_SYNC_TTL = float(os.getenv('NONCE_SYNC_TTL', 30))  # Seconds before the pending count is re-read
+PRIORITY_FEE_PERCENTILE = 50
+
+class NonceManager:
+    """
+    Hands out nonces per sending address without an RPC per transaction
+
+    The first nonce for an address comes from its pending transaction count;
+    after that nonces are allocated locally, so concurrent submits from one
+    wallet never reuse a nonce. A nonce that ends up not being sent must be
+    given back with release(), otherwise it leaves a gap the node waits on
+    forever. The count is re-read from the node every NONCE_SYNC_TTL
+    seconds and only ever moves the local value forward, since nonces that
+    were handed out but not broadcast yet are not in the node's count. A
+    local value that ran ahead is pulled back by resync().
+    """
+
+    def __init__(self, w3, sync_ttl=NONCE_SYNC_TTL):
+        self.w3 = w3
+        self.sync_ttl = sync_ttl
+        self._next = {}
+        self._released = {}
+        self._synced_at = {}
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    def _lock(self, address):
+        with self._locks_lock:
+            return self._locks.setdefault(address.lower(), threading.Lock())
+
+    def prime(self, address):
+        """Fetch the starting nonce for an address if it is unknown or stale"""
+        with self._lock(address):
+            key = address.lower()
+            synced_at = self._synced_at.get(key)
+            if synced_at is None or time.monotonic() - synced_at >= self.sync_ttl:
+                pending = self.w3.eth.get_transaction_count(address, 'pending')
+                self._next[key] = max(self._next.get(key, 0), pending)
+                # Released nonces the node has seen since were sent by someone else
+                released = self._released.get(key)
+                if released:
+                    self._released[key] = {nonce for nonce in released if nonce >= pending}
+                self._synced_at[key] = time.monotonic()
+
+    def allocate(self, address):
+        """Reserve the next nonce for an address, reusing released ones first"""
+        self.prime(address)
+        with self._lock(address):
+            key = address.lower()
+            released = self._released.get(key)
+            if released:
+                nonce = min(released)
+                released.discard(nonce)
+                return nonce
+            nonce = self._next[key]
+            self._next[key] = nonce + 1
+            return nonce
+
+    def release(self, address, nonce):
+        """Give back a nonce from allocate() that was not sent"""
+        with self._lock(address):
+            key = address.lower()
+            if key not in self._next or nonce >= self._next[key]:
+                # Already forgotten by a resync
+                return
+            released = self._released.setdefault(key, set())
+            released.add(nonce)
+            # Shrink the counter past released nonces at its top
+            while self._next[key] - 1 in released:
+                self._next[key] -= 1
+                released.discard(self._next[key])
+
+    def resync(self, address):
+        """Forget the local nonce so the next allocation asks the node again"""
+        with self._lock(address):
+            key = address.lower()
+            self._next.pop(key, None)
+            self._released.pop(key, None)
+            self._synced_at.pop(key, None)
+
+class GasOracle:
+    """
+    TTL-cached fee parameters
+
+    On EIP-1559 chains a single eth_feeHistory call gives the next block's
+    base fee and a median priority fee; other chains fall back to
+    eth_gasPrice. Either way the node is asked at most once per TTL.
+    """
+
+    def __init__(self, w3, ttl=GAS_PRICE_TTL):
+        self.w3 = w3
+        self.ttl = ttl
+        self._fees = None
+        self._expires = 0
+        self._lock = threading.Lock()
+
+    def _fetch(self):
+        try:
+            history = self.w3.eth.fee_history(1, 'latest', [PRIORITY_FEE_PERCENTILE])
+            base_fee = history['baseFeePerGas'][-1]
+            priority_fee = history['reward'][0][0]
+        except Exception:
+            return {'gasPrice': self.w3.eth.gas_price}
+
+        # Twice the base fee stays valid through several full blocks
+        return {
+            'maxFeePerGas': 2 * base_fee + priority_fee,
+            'maxPriorityFeePerGas': priority_fee
+        }
+
+    def fee_params(self):
+        """Get fee fields for build_transaction"""
+        with self._lock:
+            if self._fees is None or time.monotonic() >= self._expires:
+                self._fees = self._fetch()
+                self._expires = time.monotonic() + self.ttl
+            return dict(self._fees)
+
+    def invalidate(self):
+        with self._lock:
+            self._fees = None
+
+class GasEstimator:
+    """
+    Memoized gas limits per contract function and call shape
+
+    The first transaction for each function is estimated with eth_estimateGas
+    and the result, plus GAS_ESTIMATE_BUFFER headroom, is reused afterwards
+    for calls with the same argument lengths and value. A longer dynamic
+    argument, such as a longer CID, makes for more calldata and storage
+    writes, so it is estimated afresh. Estimates that revert (e.g. a bid
+    below the minimum) fall back to DEFAULT_GAS_LIMIT and are not memoized.
+    """
+
+    def __init__(self, buffer=GAS_ESTIMATE_BUFFER, default=DEFAULT_GAS_LIMIT):
+        self.buffer = buffer
+        self.default = default
+        self._estimates = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(function_call, value):
+        sizes = []
+        for arg in function_call.args:
+            if isinstance(arg, str):
+                arg = arg.encode()
+            sizes.append(len(arg) if isinstance(arg, (bytes, list, tuple)) else None)
+        return function_call.fn_name, tuple(sizes), value
+
+    def estimate(self, function_call, wallet_address, value=0):
+        key = self._key(function_call, value)
+        with self._lock:
+            if key in self._estimates:
+                return self._estimates[key]
+
+        params = {'from': wallet_address}
+        if value:
+            params['value'] = value
+        try:
+            gas = int(function_call.estimate_gas(params) * self.buffer)
+        except Exception:
+            return self.default
+
+        with self._lock:
+            self._estimates[key] = gas
+        return gas
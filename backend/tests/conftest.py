@@ -0,0 +1,37 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Keep every store the modules configure at import out of backend/data, and
+# leave background threads and processes off
+_scratch = tempfile.mkdtemp(prefix='ipnft-tests-')
+os.environ.update(
+    DATABASE_PATH=os.path.join(_scratch, 'ipnft.db'),
+    USERS_FILE=os.path.join(_scratch, 'users.json'),
+    IPFS_CACHE_DIR=os.path.join(_scratch, 'ipfs_cache'),
+    JOB_WORKERS='0',
+    INDEXER_ENABLED='false',
+    SIGNATURE_WORKERS='0'
+)
+
+def _close_connection(database):
+    conn = getattr(database._local, 'conn', None)
+    if conn is not None:
+        conn.close()
+        database._local.conn = None
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Empty database for one test, migrated on first use"""
+    from models import database
+
+    _close_connection(database)
+    monkeypatch.setattr(database, 'DATABASE_PATH', str(tmp_path / 'ipnft.db'))
+    monkeypatch.setattr(database, '_initialized', False)
+    yield database
+    _close_connection(database)
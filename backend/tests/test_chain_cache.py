@@ -0,0 +1,79 @@
+import threading
+from types import SimpleNamespace
+
+from services import chain_cache, metrics
+from services.chain_cache import TokenCache, LogInvalidator
+
+class FailingEth:
+    @property
+    def block_number(self):
+        raise ConnectionError('node unreachable')
+
+def test_failed_poll_is_logged_and_counted(caplog):
+    invalidator = LogInvalidator(SimpleNamespace(eth=FailingEth()), '0xC', TokenCache(), interval=0)
+    before = metrics.background_errors._values.get(('patent_cache_invalidator',), 0)
+
+    invalidator.poll()
+
+    assert metrics.background_errors._values[('patent_cache_invalidator',)] == before + 1
+    assert 'node unreachable' in caplog.text
+
+def test_concurrent_misses_share_one_fetch():
+    cache = TokenCache(ttl=60)
+    started, release = threading.Event(), threading.Event()
+    fetches = []
+
+    def slow_fetch(token_id):
+        fetches.append(token_id)
+        started.set()
+        release.wait(5)
+        return {'token_id': token_id}
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(cache.get(1, slow_fetch)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(cache.get(1, slow_fetch))) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert fetches == [1]
+    assert results == [{'token_id': 1}] * 4
+
+def test_entries_expire_and_invalidated_fetches_are_not_cached(monkeypatch):
+    clock = {'now': 100.0}
+    monkeypatch.setattr(chain_cache.time, 'monotonic', lambda: clock['now'])
+    cache = TokenCache(ttl=12)
+    values = iter(['first', 'second', 'third', 'fourth'])
+
+    assert cache.get(1, lambda key: next(values)) == 'first'
+    assert cache.get(1, lambda key: next(values)) == 'first'
+    clock['now'] += 12
+    assert cache.get(1, lambda key: next(values)) == 'second'
+
+    # An event for the token arrives while its fetch is still running
+    def fetch_during_event(key):
+        cache.invalidate({key})
+        return next(values)
+
+    cache.invalidate({1})
+    assert cache.get(1, fetch_during_event) == 'third'
+    assert cache.get(1, lambda key: next(values)) == 'fourth'
+
+def test_poll_invalidates_tokens_named_in_new_events():
+    cache = TokenCache(ttl=60)
+    eth = SimpleNamespace(block_number=10, get_logs=lambda params: [])
+    invalidator = LogInvalidator(SimpleNamespace(eth=eth), '0xC', cache, interval=0)
+    invalidator.poll()
+    for token_id in (1, 2):
+        cache.get(token_id, lambda key: 'cached')
+
+    eth.block_number = 11
+    eth.get_logs = lambda params: [{'topics': [b'\x00' * 32, (2).to_bytes(32, 'big')]}]
+    invalidator.poll()
+
+    assert cache.get(1, lambda key: 'fresh') == 'cached'
+    assert cache.get(2, lambda key: 'fresh') == 'fresh'
@@ -0,0 +1,39 @@
+from models import chain_state
+from models.database import transaction
+from models.patent_model import Patent
+
+def _event(block_number, log_index, event, token_id, **args):
+    return {'block_number': block_number, 'log_index': log_index, 'block_hash': f'0x{block_number:x}',
+            'tx_hash': f'0xt{block_number}{log_index}', 'event': event, 'token_id': token_id, 'args': args}
+
+def _register(block_number, token_id, owner='0xA'):
+    return _event(block_number, 0, 'PatentRegistered', token_id, owner=owner, cid=f'Qm{token_id}',
+                  timestamp=1000 + token_id)
+
+def _index(events, checkpoint_block):
+    with transaction() as conn:
+        for event in events:
+            chain_state.record_event(conn, event)
+        chain_state.set_checkpoint(conn, checkpoint_block, f'0x{checkpoint_block:x}')
+
+def test_catalogue_version_follows_local_edits_and_reorgs(db):
+    _index([_register(10, 1)], 10)
+    patent = Patent(title='Solar roof tile', description='Tiles', category='energy', token_id=1)
+    patent.save()
+
+    version = chain_state.catalogue_version()
+    assert chain_state.catalogue_version() == version
+
+    # Editing a record in place changes neither the checkpoint nor the row count
+    patent.description = 'Interlocking photovoltaic tiles'
+    patent.save()
+    edited = chain_state.catalogue_version()
+    assert edited != version
+
+    assert chain_state.get_reorg_count() == 0
+    with transaction() as conn:
+        chain_state.rollback(conn, 10)
+        chain_state.set_checkpoint(conn, 10, '0xa')
+    assert chain_state.get_reorg_count() == 1
+    assert chain_state.get_patent(1) is None
+    assert chain_state.catalogue_version() != edited
@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+
+import pytest
+
+from models import chain_state
+from models.patent_model import Patent
+from services import event_indexer, metrics
+
+class FakeChain:
+    """Blocks and already decoded events of a chain that can be reorganised"""
+
+    def __init__(self):
+        self.hashes = {}
+        self.events = []
+        self.block_number = 0
+
+    def mine(self, *events, fork=''):
+        self.block_number += 1
+        self.hashes[self.block_number] = bytes.fromhex(f'{self.block_number:02x}{fork.encode().hex()}')
+        for log_index, (name, token_id, args) in enumerate(events):
+            self.events.append({
+                'block_number': self.block_number, 'log_index': log_index, 'block_hash': '0x',
+                'tx_hash': f'0x{self.block_number}{log_index}', 'event': name, 'token_id': token_id, 'args': args
+            })
+
+    def reorg(self, depth):
+        """Drop the last blocks and their events"""
+        self.block_number -= depth
+        self.events = [event for event in self.events if event['block_number'] <= self.block_number]
+
+    def get_block(self, block_number):
+        return {'hash': self.hashes[block_number]}
+
+    def get_logs(self, params):
+        return [event for event in self.events if params['fromBlock'] <= event['block_number'] <= params['toBlock']]
+
+@pytest.fixture
+def chain(db, monkeypatch):
+    chain = FakeChain()
+    monkeypatch.setattr(event_indexer, 'get_web3', lambda: SimpleNamespace(eth=chain))
+    monkeypatch.setattr(event_indexer, 'get_contract', lambda: SimpleNamespace(address='0xC'))
+    monkeypatch.setattr(event_indexer, '_event_types', lambda: {})
+    monkeypatch.setattr(event_indexer, '_decode_logs', lambda logs, event_types: logs)
+    monkeypatch.setattr(event_indexer, 'INDEXER_START_BLOCK', 1)
+    return chain
+
+def test_reorg_reverts_accepted_bid_in_local_store(chain):
+    chain.mine(('PatentRegistered', 1, {'owner': '0xSeller', 'cid': 'Qm1', 'timestamp': 1000}))
+    Patent(title='Solar roof tile', owner_id='0xSeller', token_id=1).save()
+    chain.mine(('BidAccepted', 1, {'buyer': '0xBuyer'}))
+
+    assert event_indexer.sync_once() == 2
+    assert chain_state.get_patent(1)['owner'] == '0xBuyer'
+    assert Patent.find_by_token_id(1).owner_id == '0xBuyer'
+
+    # The block with the sale is replaced by an empty one
+    chain.reorg(1)
+    chain.mine(fork='b')
+
+    event_indexer.sync_once()
+    assert chain_state.get_patent(1)['owner'] == '0xSeller'
+    assert Patent.find_by_token_id(1).owner_id == '0xSeller'
+    assert chain_state.get_checkpoint()['block_number'] == 2
+
+def test_sync_commits_range_by_range_and_resumes(chain, monkeypatch):
+    monkeypatch.setattr(event_indexer, 'INDEXER_BLOCK_RANGE', 2)
+    for token_id in range(1, 6):
+        chain.mine(('PatentRegistered', token_id, {'owner': '0xA', 'cid': f'Qm{token_id}', 'timestamp': 1000}))
+
+    assert event_indexer.sync_once() == 5
+    assert [patent['token_id'] for patent in chain_state.get_all_patents()] == [1, 2, 3, 4, 5]
+    assert chain_state.get_checkpoint()['block_number'] == 5
+
+    # Nothing new until the next block
+    assert event_indexer.sync_once() == 0
+    chain.mine(('PatentListedForSale', 2, {'minBid': 10, 'endTime': 2000}))
+    assert event_indexer.sync_once() == 1
+    assert chain_state.get_patent(2)['is_for_sale']
+
+class StopLoop(Exception):
+    pass
+
+def test_failed_sync_is_logged_and_counted(monkeypatch, caplog):
+    def fail():
+        raise ConnectionError('node unreachable')
+
+    def stop(seconds):
+        raise StopLoop
+
+    monkeypatch.setattr(event_indexer, 'sync_once', fail)
+    monkeypatch.setattr(event_indexer.time, 'sleep', stop)
+    before = metrics.background_errors._values.get(('event_indexer',), 0)
+
+    with pytest.raises(StopLoop):
+        event_indexer.run_forever()
+
+    assert metrics.background_errors._values[('event_indexer',)] == before + 1
+    assert 'node unreachable' in caplog.text
@@ -0,0 +1,53 @@
+import threading
+from datetime import datetime
+
+from models import ids
+from models.ids import new_id, id_at, id_time, id_range, is_id, legacy_id
+from models.patent_model import Patent
+
+def test_ids_from_one_process_strictly_increase(monkeypatch):
+    # A frozen clock, then one that steps back
+    clock = iter([5_000_000_000] * 100 + [4_000_000_000] * 100)
+    monkeypatch.setattr(ids.time, 'time_ns', lambda: next(clock))
+    monkeypatch.setattr(ids, '_last_ms', -1)
+
+    generated = [new_id() for _ in range(200)]
+    assert generated == sorted(generated)
+    assert len(set(generated)) == 200
+    assert all(is_id(value) for value in generated)
+
+def test_ids_are_unique_across_threads():
+    generated = []
+
+    def generate():
+        generated.extend(new_id() for _ in range(1000))
+
+    threads = [threading.Thread(target=generate) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(generated)) == 4000
+
+def test_string_order_is_creation_order():
+    earlier, later = datetime(2020, 1, 1, 12, 0, 0), datetime(2020, 1, 1, 12, 0, 0, 1000)
+    assert id_at(earlier) < id_at(later)
+    assert id_time(id_at(later)) == later
+
+    assert legacy_id('2020-01-01T12:00:00') < legacy_id('2021-06-30T00:00:00')
+    assert is_id(legacy_id('not a date')) and not is_id('1585324892.123') and not is_id(None)
+
+def test_time_ranges_scan_by_id(db):
+    patents = {}
+    for day in (1, 2, 3):
+        patent = Patent(id=id_at(datetime(2024, 3, day, 9)), title=f'Patent {day}', owner_id='u1')
+        patent.save()
+        patents[day] = patent.id
+
+    low, high = id_range(datetime(2024, 3, 2), datetime(2024, 3, 3))
+    assert low < patents[2] < high <= patents[3]
+    found = Patent.find_created_between(datetime(2024, 3, 2), datetime(2024, 3, 4))
+    assert [patent.id for patent in found] == [patents[2], patents[3]]
+
+    assert [patent.id for patent in Patent.find_newest(limit=2)] == [patents[3], patents[2]]
+    assert [patent.id for patent in Patent.find_newest(limit=2, before_id=patents[2])] == [patents[1]]
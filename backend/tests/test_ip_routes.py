@@ -0,0 +1,170 @@
+import json
+
+import pytest
+from flask import Flask
+from flask_login import LoginManager, UserMixin
+
+from models import chain_state
+from models.database import transaction
+from models.patent_model import Patent
+from routes import ip_routes
+
+JSON = {'Accept': 'application/json'}
+
+class FakeUser(UserMixin):
+    id = 'u1'
+    wallet_address = '0xW'
+
+@pytest.fixture
+def client(db, tmp_path):
+    db.init_db()
+    app = Flask(__name__)
+    app.config.update(UPLOAD_FOLDER=str(tmp_path), MAX_CONTENT_LENGTH=None)
+    app.register_blueprint(ip_routes.ip_bp)
+
+    # Every request is made by the same logged-in user
+    login_manager = LoginManager(app)
+    login_manager.request_loader(lambda request: FakeUser())
+    return app.test_client()
+
+@pytest.fixture
+def submitted(monkeypatch):
+    registrations = []
+    monkeypatch.setattr(ip_routes, 'submit_registration', lambda **kwargs: registrations.append(kwargs) or 'j1')
+    return registrations
+
+def test_unknown_patent_is_not_found(client, monkeypatch):
+    monkeypatch.setattr(ip_routes, 'get_patent_details', lambda token_id: None)
+
+    response = client.get('/api/ip/patent/7', headers=JSON)
+    assert response.status_code == 404
+    assert response.get_json() == {'error': 'Patent not found'}
+    assert client.get('/api/ip/patent/7').status_code == 404
+
+def test_patent_id_must_be_a_number(client):
+    assert client.get('/api/ip/patent/abc', headers=JSON).status_code == 404
+
+def test_export_etag_changes_when_a_local_record_is_edited(client):
+    with transaction() as conn:
+        chain_state.record_event(conn, {
+            'block_number': 10, 'log_index': 0, 'block_hash': '0xa', 'tx_hash': '0x1', 'event': 'PatentRegistered',
+            'token_id': 1, 'args': {'owner': '0xA', 'cid': 'Qm1', 'timestamp': 1000}
+        })
+        chain_state.set_checkpoint(conn, 10, '0xa')
+    patent = Patent(title='Solar roof tile', description='Tiles', category='energy', token_id=1)
+    patent.save()
+
+    response = client.get('/api/ip/patents/export')
+    assert response.status_code == 200
+    assert 'Solar roof tile' in response.get_data(as_text=True)
+    assert response.headers['X-Catalogue-Block'] == '10'
+    assert response.headers['X-Catalogue-Reorgs'] == '0'
+    etag = response.headers['ETag']
+    assert client.get('/api/ip/patents/export', headers={'If-None-Match': etag}).status_code == 304
+
+    patent.title = 'Solar shingle'
+    patent.save()
+    response = client.get('/api/ip/patents/export', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert 'Solar shingle' in response.get_data(as_text=True)
+
+REGISTRATION = {'title': 'Solar roof tile', 'description': 'Tiles', 'category': 'energy', 'duration': '20'}
+
+@pytest.mark.parametrize('duration', ['ten', '-1', '0', '1.5', ''])
+def test_register_rejects_bad_duration(client, submitted, duration):
+    response = client.post('/api/ip/register', data=dict(REGISTRATION, duration=duration), headers=JSON)
+    assert response.status_code == 400
+    assert not submitted
+
+def test_register_accepts_only_cids_uploaded_here(client, submitted, monkeypatch):
+    response = client.post('/api/ip/register', data=dict(REGISTRATION, file_cid='QmNotOurs', file_sha256='00'),
+                           headers=JSON)
+    assert response.status_code == 400
+    assert not submitted
+
+    monkeypatch.setattr(ip_routes, 'upload_stream_to_ipfs', lambda stream, filename, mimetype: ('QmOurs', 'ab' * 32))
+    assert client.post('/api/ip/upload?filename=drawing.pdf', data=b'%PDF').get_json()['cid'] == 'QmOurs'
+
+    response = client.post('/api/ip/register', data=dict(REGISTRATION, file_cid='QmOurs', file_sha256='00'),
+                           headers=JSON)
+    assert response.status_code == 202
+    registration = submitted[0]
+    assert (registration['file_cid'], registration['file_sha256'], registration['duration']) == ('QmOurs', 'ab' * 32, 20)
+
+def _index_patents(count, sale_end_time=None):
+    """Index patents 1..count, listing every one for sale when sale_end_time is given"""
+    with transaction() as conn:
+        for token_id in range(1, count + 1):
+            chain_state.record_event(conn, {
+                'block_number': token_id, 'log_index': 0, 'block_hash': '0x', 'tx_hash': f'0x{token_id}',
+                'event': 'PatentRegistered', 'token_id': token_id,
+                'args': {'owner': '0xA', 'cid': f'Qm{token_id}', 'timestamp': 1000 + token_id}
+            })
+            if sale_end_time:
+                chain_state.record_event(conn, {
+                    'block_number': token_id, 'log_index': 1, 'block_hash': '0x', 'tx_hash': f'0x{token_id}s',
+                    'event': 'PatentListedForSale', 'token_id': token_id,
+                    'args': {'minBid': 1, 'endTime': sale_end_time - token_id % 2}
+                })
+        chain_state.set_checkpoint(conn, count, '0x')
+
+def _all_pages(client, **params):
+    token_ids, pages, cursor = [], 0, None
+    while True:
+        query = dict(params, cursor=cursor) if cursor else params
+        page = client.get('/api/ip/patents', query_string=query, headers=JSON).get_json()
+        token_ids.extend(patent['token_id'] for patent in page['patents'])
+        pages += 1
+        cursor = page['next_cursor']
+        if not cursor:
+            return token_ids, pages
+
+def test_cursor_pages_cover_every_patent_once(client):
+    _index_patents(7)
+
+    assert _all_pages(client, per_page=3) == ([7, 6, 5, 4, 3, 2, 1], 3)
+    assert _all_pages(client, per_page=3, sort='oldest') == ([1, 2, 3, 4, 5, 6, 7], 3)
+
+def test_ending_soon_pages_by_end_time_then_token(client):
+    _index_patents(5, sale_end_time=4102444800)
+
+    # Odd tokens end one second earlier
+    assert _all_pages(client, per_page=2, sort='ending_soon') == ([1, 3, 5, 2, 4], 3)
+
+def test_cursor_is_tied_to_its_sort_order(client):
+    _index_patents(3)
+    cursor = client.get('/api/ip/patents?per_page=1', headers=JSON).get_json()['next_cursor']
+
+    assert client.get(f'/api/ip/patents?sort=oldest&cursor={cursor}', headers=JSON).status_code == 400
+    assert client.get('/api/ip/patents?cursor=not-a-cursor', headers=JSON).status_code == 400
+
+def test_ending_soon_rejects_patents_not_for_sale(client):
+    _index_patents(1)
+
+    response = client.get('/api/ip/patents?sort=ending_soon&for_sale=false', headers=JSON)
+    assert response.status_code == 400
+    assert 'for sale' in response.get_json()['error']
+    assert client.get('/api/ip/patents?sort=ending_soon&for_sale=true', headers=JSON).status_code == 200
+
+def test_export_streams_csv_and_incremental_ndjson(client):
+    with transaction() as conn:
+        for block_number, token_id in ((10, 1), (11, 2)):
+            chain_state.record_event(conn, {
+                'block_number': block_number, 'log_index': 0, 'block_hash': '0x', 'tx_hash': f'0x{token_id}',
+                'event': 'PatentRegistered', 'token_id': token_id,
+                'args': {'owner': '0xA', 'cid': f'Qm{token_id}', 'timestamp': 1000}
+            })
+        chain_state.set_checkpoint(conn, 11, '0xb')
+
+    response = client.get('/api/ip/patents/export?format=csv')
+    assert response.mimetype == 'text/csv'
+    lines = response.get_data(as_text=True).splitlines()
+    assert lines[0] == ','.join(ip_routes.EXPORT_FIELDS)
+    assert [line.split(',')[0] for line in lines[1:]] == ['1', '2']
+
+    response = client.get('/api/ip/patents/export?since=10')
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [row['token_id'] for row in rows] == [2]
+
+    assert client.get('/api/ip/patents/export?format=xml').status_code == 400
+    assert client.get('/api/ip/patents/export?since=latest').status_code == 400
@@ -0,0 +1,89 @@
+import base64
+import hashlib
+import logging
+import os
+
+import pytest
+
+from services import ipfs_cache
+from services.ipfs_cache import CIDMismatchError, verify_cid
+
+HELLO = b'hello world\n'
+# What `ipfs add` returns for HELLO, as Filebase does
+HELLO_CIDV0 = 'QmT78zSuBmuS4z925WZfrqQ1qHaJ56DQaTfyMUF7F8ff5o'
+
+def _raw_cid(content):
+    multihash = b'\x12\x20' + hashlib.sha256(content).digest()
+    return 'b' + base64.b32encode(b'\x01\x55' + multihash).decode().lower().rstrip('=')
+
+def test_verify_cid_checks_cidv0_and_raw_cids():
+    assert verify_cid(HELLO_CIDV0, HELLO) is True
+    assert verify_cid(HELLO_CIDV0, b'hello world?') is False
+    assert verify_cid('QmbFMke1KXqnYyBBWxB74N4c5SBnJMVAiMNRcGu6x1AwQH', b'') is True
+
+    assert verify_cid(_raw_cid(HELLO), HELLO) is True
+    assert verify_cid(_raw_cid(HELLO), b'other') is False
+
+def test_verify_cid_reports_what_it_cannot_check():
+    # A dag-pb file over one chunk is a tree whose root depends on the chunker
+    assert verify_cid(HELLO_CIDV0, b'x' * (ipfs_cache.UNIXFS_CHUNK_SIZE + 1)) is None
+    assert verify_cid('zdj7WWeQ43G6JJvLWQWZpyHuAMq6uYWRjkBXFad11vE2LHhQ7', HELLO) is None
+
+def test_fetched_content_is_verified_once_enabled(monkeypatch, caplog):
+    monkeypatch.setattr(ipfs_cache, 'IPFS_VERIFY_CIDS', True)
+    monkeypatch.setattr(ipfs_cache, '_unverifiable_logged', ipfs_cache.threading.Event())
+    monkeypatch.setattr(ipfs_cache, 'store', lambda cid, content: None)
+
+    with pytest.raises(CIDMismatchError):
+        ipfs_cache.get_or_fetch(HELLO_CIDV0, lambda cid: b'tampered')
+    assert ipfs_cache.get_or_fetch(HELLO_CIDV0, lambda cid: HELLO) == HELLO
+
+    large = b'x' * (ipfs_cache.UNIXFS_CHUNK_SIZE + 1)
+    with caplog.at_level(logging.WARNING, logger=ipfs_cache.__name__):
+        ipfs_cache.get_or_fetch('QmYwAPJzv5CZsnA625s3Xf2nemtYgPpHdWEz79ojWnPbdG', lambda cid: large)
+        ipfs_cache.get_or_fetch('QmYwAPJzv5CZsnA625s3Xf2nemtYgPpHdWEz79ojWnPbdH', lambda cid: large)
+    assert len(caplog.records) == 1
+    assert 'cannot be verified' in caplog.text
+
+def test_memory_cache_evicts_least_recently_used_content():
+    cache = ipfs_cache.MemoryCache(max_bytes=10)
+    cache.put('a', b'1234')
+    cache.put('b', b'1234')
+    cache.get('a')
+    cache.put('c', b'1234')
+
+    assert (cache.get('a'), cache.get('b'), cache.get('c')) == (b'1234', None, b'1234')
+    assert cache.size == 8
+
+    # Content bigger than the whole budget is never cached
+    cache.put('d', b'x' * 11)
+    assert cache.get('d') is None and cache.size == 8
+
+def test_disk_cache_evicts_least_recently_read_files(tmp_path):
+    cache = ipfs_cache.DiskCache(str(tmp_path), max_bytes=100)
+    for index, cid in enumerate(('QmOldest', 'QmMiddle', 'QmNewest')):
+        cache.put(cid, b'x' * 40)
+        os.utime(cache._path(cid), (1000 + index, 1000 + index))
+
+    # The third file took the cache over budget, so the oldest one went
+    assert cache.get('QmOldest') is None
+    assert cache.get('QmMiddle') == b'x' * 40
+    assert cache.size <= 90
+
+def test_misses_fill_both_tiers(tmp_path, monkeypatch):
+    monkeypatch.setattr(ipfs_cache, 'memory_cache', ipfs_cache.MemoryCache(1024))
+    monkeypatch.setattr(ipfs_cache, 'disk_cache', ipfs_cache.DiskCache(str(tmp_path), 1024))
+    fetches = []
+
+    def fetch(cid):
+        fetches.append(cid)
+        return HELLO
+
+    assert ipfs_cache.get_or_fetch(HELLO_CIDV0, fetch) == HELLO
+    assert ipfs_cache.get_or_fetch(HELLO_CIDV0, fetch) == HELLO
+    assert fetches == [HELLO_CIDV0]
+
+    # A new process starts with an empty memory tier and reads from disk
+    monkeypatch.setattr(ipfs_cache, 'memory_cache', ipfs_cache.MemoryCache(1024))
+    assert ipfs_cache.get_or_fetch(HELLO_CIDV0, fetch) == HELLO
+    assert fetches == [HELLO_CIDV0]
@@ -0,0 +1,47 @@
+import io
+import hashlib
+from types import SimpleNamespace
+
+from werkzeug.formparser import parse_form_data
+
+from services import http_session, ipfs_service
+
+CONTENT = bytes(range(256)) * 40
+
+class FakeStreamSession:
+    """Consumes a streamed request body the way requests would"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def post(self, url, headers, data):
+        self.headers = headers
+        self.chunks = list(data)
+        return SimpleNamespace(status_code=200, json=lambda: {'cid': 'QmUploaded'})
+
+def test_multipart_body_is_streamed_in_chunks_and_hashed():
+    digest = hashlib.sha256()
+    chunks = list(ipfs_service._multipart_stream(io.BytesIO(CONTENT), 'drawing "v2".pdf', 'application/pdf',
+                                                 'b0undary', digest, chunk_size=1000))
+
+    assert max(len(chunk) for chunk in chunks) <= 1000
+    assert digest.hexdigest() == hashlib.sha256(CONTENT).hexdigest()
+
+    # The body is a well-formed form upload
+    body = b''.join(chunks)
+    _, _, files = parse_form_data({
+        'REQUEST_METHOD': 'POST', 'CONTENT_TYPE': 'multipart/form-data; boundary=b0undary',
+        'CONTENT_LENGTH': str(len(body)), 'wsgi.input': io.BytesIO(body)
+    })
+    upload = files['file']
+    assert (upload.filename, upload.mimetype, upload.read()) == ('drawing _v2_.pdf', 'application/pdf', CONTENT)
+
+def test_upload_returns_cid_and_content_hash(monkeypatch):
+    session = FakeStreamSession()
+    monkeypatch.setattr(http_session, 'get_stream_session', lambda: session)
+
+    cid, sha256 = ipfs_service.upload_stream_to_ipfs(io.BytesIO(CONTENT), 'drawing.pdf', chunk_size=4096)
+
+    assert (cid, sha256) == ('QmUploaded', hashlib.sha256(CONTENT).hexdigest())
+    assert session.headers['Content-Type'].startswith('multipart/form-data; boundary=')
+    assert len(session.chunks) > 2
@@ -0,0 +1,157 @@
+import os
+import time
+
+import pytest
+
+from services import job_queue, metrics, registration_service
+from services.job_queue import LeaseLostError
+
+@pytest.fixture
+def queue(db, monkeypatch):
+    monkeypatch.setattr(job_queue, '_handlers', {})
+    monkeypatch.setattr(job_queue, '_failure_handlers', {})
+    monkeypatch.setattr(job_queue, 'JOB_MAX_ATTEMPTS', 3)
+    monkeypatch.setattr(job_queue, 'JOB_RETRY_DELAY', 10)
+    return job_queue
+
+def _expire_lease(db, job_id):
+    db.get_connection().execute('UPDATE jobs SET lease_expires = ? WHERE id = ?', (time.time() - 1, job_id))
+
+def test_claim_takes_queued_job_once(queue):
+    job_id = queue.enqueue('noop', {'n': 1})
+
+    job = queue.claim()
+    assert (job.id, job.payload, job.attempts) == (job_id, {'n': 1}, 1)
+    assert queue.get_job(job_id)['status'] == 'running'
+    assert queue.claim() is None
+
+def test_expired_lease_is_reclaimed_and_stale_worker_fenced(queue, db):
+    job_id = queue.enqueue('noop', {})
+    first = queue.claim()
+    _expire_lease(db, job_id)
+
+    second = queue.claim()
+    assert second.id == job_id
+    assert second.attempts == 2
+    assert second.lease_owner != first.lease_owner
+
+    with pytest.raises(LeaseLostError):
+        first.checkpoint('upload', file_cid='stale')
+    with pytest.raises(LeaseLostError):
+        first.renew()
+
+    second.checkpoint('upload', file_cid='fresh')
+    assert queue.get_job(job_id)['payload'] == {'file_cid': 'fresh'}
+
+def test_checkpoint_and_renew_extend_the_lease(queue, db, monkeypatch):
+    monkeypatch.setattr(job_queue, 'JOB_LEASE_SECONDS', 60)
+    queue.enqueue('noop', {})
+    job = queue.claim()
+
+    _expire_lease(db, job.id)
+    job.renew()
+    assert queue.claim() is None
+
+    _expire_lease(db, job.id)
+    job.checkpoint('upload')
+    assert queue.claim() is None
+    assert queue.get_job(job.id)['stage'] == 'upload'
+
+def test_stale_worker_does_not_finish_reclaimed_job(queue, db):
+    results = []
+
+    def handler(job):
+        if not results:
+            # Lose the lease mid-run, as a slow upload would
+            _expire_lease(db, job.id)
+            results.append(queue.claim())
+        return {'done': True}
+
+    queue.register_handler('slow', handler)
+    job_id = queue.enqueue('slow', {})
+
+    assert queue.run_next()
+    job = queue.get_job(job_id)
+    assert job['status'] == 'running'
+    assert job['lease_owner'] == results[0].lease_owner
+
+def test_failed_job_backs_off_exponentially(queue, db):
+    def handler(job):
+        raise RuntimeError('gateway down')
+
+    queue.register_handler('flaky', handler)
+    job_id = queue.enqueue('flaky', {})
+
+    for attempt in (1, 2):
+        before = time.time()
+        assert queue.run_next()
+        job = queue.get_job(job_id)
+        assert job['status'] == 'queued'
+        assert job['error'] == 'gateway down'
+        assert job['run_after'] - before == pytest.approx(10 * 2 ** (attempt - 1), abs=1)
+        # Not runnable until the delay has passed
+        assert queue.claim() is None
+        db.get_connection().execute('UPDATE jobs SET run_after = 0 WHERE id = ?', (job_id,))
+
+    assert queue.run_next()
+    assert queue.get_job(job_id)['status'] == 'failed'
+    assert queue.claim() is None
+
+def test_failure_handler_runs_once_job_fails_for_good(queue, monkeypatch):
+    monkeypatch.setattr(job_queue, 'JOB_MAX_ATTEMPTS', 1)
+    failed = []
+
+    def handler(job):
+        raise RuntimeError('bad input')
+
+    queue.register_handler('doomed', handler, on_failed=lambda job: failed.append(job.id))
+    job_id = queue.enqueue('doomed', {})
+
+    assert queue.run_next()
+    assert failed == [job_id]
+    assert queue.get_job(job_id)['status'] == 'failed'
+
+def test_successful_job_records_result(queue):
+    queue.register_handler('echo', lambda job: {'echo': job.payload['value']})
+    job_id = queue.enqueue('echo', {'value': 42})
+
+    assert queue.run_next()
+    job = queue.get_job(job_id)
+    assert (job['status'], job['result'], job['lease_expires']) == ('succeeded', {'echo': 42}, None)
+    assert not queue.run_next()
+
+def test_spool_sweep_keeps_files_of_pending_registrations(queue, tmp_path):
+    spool = tmp_path / 'uploads'
+    spool.mkdir()
+    orphaned, pending, recent = (str(spool / name) for name in ('orphaned', 'pending', 'recent'))
+    for path in (orphaned, pending, recent):
+        with open(path, 'w') as f:
+            f.write('x')
+    old = time.time() - 2 * registration_service.SPOOL_SWEEP_MIN_AGE
+    os.utime(orphaned, (old, old))
+    os.utime(pending, (old, old))
+    queue.enqueue(registration_service.JOB_KIND, {'file_path': pending})
+
+    assert registration_service.sweep_spool_files(str(spool)) == 1
+    assert sorted(os.listdir(spool)) == ['pending', 'recent']
+
+    registration_service.discard_registration(queue.claim())
+    assert sorted(os.listdir(spool)) == ['recent']
+
+def test_failures_are_logged_and_counted(queue, db, caplog):
+    def handler(job):
+        # Lose the lease, then fail
+        _expire_lease(db, job.id)
+        queue.claim()
+        raise RuntimeError('gateway down')
+
+    queue.register_handler('doomed', handler)
+    queue.enqueue('doomed', {})
+    counts = metrics.background_errors._values
+    before = {component: counts.get((component,), 0) for component in ('job_handler', 'job_lease_lost')}
+
+    assert queue.run_next()
+    assert counts[('job_handler',)] == before['job_handler'] + 1
+    assert counts[('job_lease_lost',)] == before['job_lease_lost'] + 1
+    assert 'gateway down' in caplog.text
+    assert 'lost its lease' in caplog.text
@@ -0,0 +1,77 @@
+import os
+import json
+
+from models.json_store import JournaledJSONStore
+
+def _store(tmp_path, **kwargs):
+    return JournaledJSONStore(str(tmp_path / 'users.json'), **kwargs)
+
+def test_put_then_load(tmp_path):
+    store = _store(tmp_path)
+    store.put({'id': 'a', 'name': 'Ada'})
+    store.put({'id': 'b', 'name': 'Bob'})
+    store.put({'id': 'a', 'name': 'Ada L.'})
+
+    records, _, offset = store.load()
+
+    assert records == {'a': {'id': 'a', 'name': 'Ada L.'}, 'b': {'id': 'b', 'name': 'Bob'}}
+    assert offset == store.journal_size()
+
+def test_load_skips_append_torn_by_crash(tmp_path):
+    store = _store(tmp_path)
+    store.put({'id': 'a', 'name': 'Ada'})
+    with open(store.journal_path, 'ab') as f:
+        f.write(b'{"id": "b", "na')
+
+    records, _, _ = store.load()
+    assert records == {'a': {'id': 'a', 'name': 'Ada'}}
+
+    # The next append starts on a fresh line, so it is not lost with the torn one
+    store.put({'id': 'c', 'name': 'Cy'})
+    records, _, _ = _store(tmp_path).load()
+    assert records == {'a': {'id': 'a', 'name': 'Ada'}, 'c': {'id': 'c', 'name': 'Cy'}}
+
+def test_replay_after_crash_between_snapshot_and_truncate(tmp_path):
+    store = _store(tmp_path)
+    store.put({'id': 'a', 'name': 'Ada'})
+    store.put({'id': 'b', 'name': 'Bob'})
+    with open(store.journal_path, 'rb') as f:
+        journal = f.read()
+
+    store.compact()
+    # Put the journal back as if the process died before truncating it
+    with open(store.journal_path, 'wb') as f:
+        f.write(journal)
+
+    records, _, _ = store.load()
+    assert records == {'a': {'id': 'a', 'name': 'Ada'}, 'b': {'id': 'b', 'name': 'Bob'}}
+
+def test_compaction_folds_journal_into_snapshot(tmp_path):
+    store = _store(tmp_path, compact_bytes=200)
+    for index in range(20):
+        store.put({'id': str(index % 5), 'value': index})
+
+    # The journal is folded in once it outgrows both the threshold and the snapshot
+    assert os.path.exists(store.path)
+    assert store.journal_size() <= max(200, os.path.getsize(store.path))
+    with open(store.path) as f:
+        snapshot = json.load(f)
+    assert set(snapshot) <= {str(index) for index in range(5)}
+
+    records, _, _ = store.load()
+    assert records == {str(index): {'id': str(index), 'value': 15 + index} for index in range(5)}
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+def test_read_changes_follows_journal_until_compaction(tmp_path):
+    store = _store(tmp_path)
+    store.put({'id': 'a', 'name': 'Ada'})
+    _, stamp, offset = store.load()
+
+    assert store.read_changes(stamp, offset) == ([], offset)
+
+    store.put({'id': 'b', 'name': 'Bob'})
+    changes, offset = store.read_changes(stamp, offset)
+    assert changes == [{'id': 'b', 'name': 'Bob'}]
+
+    store.compact()
+    assert store.read_changes(stamp, offset) is None
@@ -0,0 +1,20 @@
+import sys
+
+from flask import Flask
+
+import services
+from services import metrics
+
+def test_http_pool_metrics_are_listed_before_the_first_outbound_call(monkeypatch):
+    # Start from a process that has not imported the HTTP client yet
+    monkeypatch.setattr(metrics, '_registry', [metrics.http_request_seconds, metrics.operation_seconds,
+                                              metrics.operation_errors, metrics.background_errors])
+    monkeypatch.delitem(sys.modules, 'services.http_session', raising=False)
+    monkeypatch.delattr(services, 'http_session', raising=False)
+    assert 'http_pool_size' not in metrics.render()
+
+    metrics.init_app(Flask(__name__))
+
+    output = metrics.render()
+    assert f'# TYPE {metrics.METRICS_PREFIX}_http_pool_size gauge' in output
+    assert f'# TYPE {metrics.METRICS_PREFIX}_http_errors_total counter' in output
@@ -0,0 +1,124 @@
+import json
+import sqlite3
+
+from models.ids import is_id, id_time
+from models.migrate import migrate_patents_json
+from models.patent_model import Patent
+
+LEGACY_PATENTS = {
+    '20230101120000': {
+        'title': 'Solar roof tile', 'description': 'Interlocking photovoltaic tiles', 'category': 'energy',
+        'owner_id': 'u1', 'token_id': 1, 'cid': 'QmTile', 'created_at': '2023-01-01T12:00:00'
+    },
+    '6f1c1a9e-2f44-4b5e-9a53-3f0e2c8d7b10': {
+        'title': 'Bicycle gearbox', 'description': 'Sealed planetary hub gears', 'category': 'transport',
+        'owner_id': 'u2', 'token_id': 2, 'cid': 'QmGear', 'created_at': '2023-02-01T08:30:00'
+    }
+}
+
+def _open_at_version(db, version):
+    """Create the database as an older release would have left it"""
+    conn = sqlite3.connect(db.DATABASE_PATH, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.create_function('legacy_id', 1, db.legacy_id)
+    for migration in db.MIGRATIONS[:version]:
+        for statement in db._split_statements(migration):
+            conn.execute(statement)
+    conn.execute(f'PRAGMA user_version = {version}')
+    return conn
+
+def _user_version(db):
+    return db.get_connection().execute('PRAGMA user_version').fetchone()[0]
+
+def _columns(db, table):
+    return {row['name'] for row in db.get_connection().execute(f'PRAGMA table_info({table})')}
+
+def test_new_database_gets_every_migration(db):
+    db.init_db()
+
+    assert _user_version(db) == len(db.MIGRATIONS)
+    assert {'lease_owner'} <= _columns(db, 'jobs')
+    assert {'updated_block', 'category'} <= _columns(db, 'chain_patents')
+
+def test_first_release_database_is_upgraded_in_place(db):
+    conn = _open_at_version(db, 1)
+    for patent_id, patent in LEGACY_PATENTS.items():
+        conn.execute(
+            'INSERT INTO patents (id, title, description, category, owner_id, token_id, cid, created_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (patent_id, patent['title'], patent['description'], patent['category'], patent['owner_id'],
+             patent['token_id'], patent['cid'], patent['created_at'])
+        )
+    conn.close()
+
+    db.init_db()
+
+    assert _user_version(db) == len(db.MIGRATIONS)
+    patents = Patent.get_all_patents()
+    assert {patent['title'] for patent in patents.values()} == {'Solar roof tile', 'Bicycle gearbox'}
+    for patent_id, patent in patents.items():
+        # Re-keyed to time-ordered IDs that keep the creation time
+        assert is_id(patent_id)
+        assert id_time(patent_id).isoformat().startswith(patent['created_at'])
+
+    # The full-text index was built over rows that predate it
+    assert [summary.title for summary in Patent.search('planetary')] == ['Bicycle gearbox']
+    assert Patent.find_by_cid('QmTile').token_id == 1
+
+def test_old_patent_ids_still_resolve_after_rekeying(db, tmp_path):
+    conn = _open_at_version(db, 1)
+    conn.execute(
+        "INSERT INTO patents (id, title, token_id, created_at) "
+        "VALUES ('20230101120000', 'Solar roof tile', 1, '2023-01-01T12:00:00')"
+    )
+    conn.close()
+    db.init_db()
+
+    patent = Patent.find_by_id('20230101120000')
+    assert patent.title == 'Solar roof tile'
+    assert is_id(patent.id) and Patent.resolve_id('20230101120000') == patent.id
+    assert Patent.find_by_id(patent.id).title == 'Solar roof tile'
+
+    uuid_id = '6f1c1a9e-2f44-4b5e-9a53-3f0e2c8d7b10'
+    json_path = tmp_path / 'patents.json'
+    json_path.write_text(json.dumps({uuid_id: LEGACY_PATENTS[uuid_id]}))
+    migrate_patents_json(str(json_path))
+    assert Patent.find_by_id(uuid_id).title == 'Bicycle gearbox'
+
+def test_indexed_chain_state_is_carried_forward(db):
+    conn = _open_at_version(db, 7)
+    conn.execute(
+        "INSERT INTO patents (id, title, category, token_id, created_at) "
+        "VALUES ('20230101120000', 'Solar roof tile', 'energy', 1, '2023-01-01T12:00:00')"
+    )
+    conn.execute("INSERT INTO chain_patents (token_id, owner, cid, registration_time) VALUES (1, '0xa', 'c', 1)")
+    conn.execute(
+        "INSERT INTO jobs (id, kind, status, payload, run_after, lease_expires, created_at, updated_at) "
+        "VALUES ('j1', 'register_patent', 'running', '{}', 0, 0, '', '')"
+    )
+    conn.close()
+
+    db.init_db()
+
+    conn = db.get_connection()
+    assert conn.execute('SELECT category FROM chain_patents WHERE token_id = 1').fetchone()[0] == 'energy'
+    assert conn.execute("SELECT lease_owner FROM jobs WHERE id = 'j1'").fetchone()[0] is None
+
+    # Later category edits reach the indexed copy
+    conn.execute("UPDATE patents SET category = 'solar' WHERE token_id = 1")
+    assert conn.execute('SELECT category FROM chain_patents WHERE token_id = 1').fetchone()[0] == 'solar'
+
+def test_patents_json_is_imported_once(db, tmp_path):
+    json_path = tmp_path / 'patents.json'
+    json_path.write_text(json.dumps(LEGACY_PATENTS))
+
+    assert migrate_patents_json(str(json_path)) == 2
+    assert not json_path.exists()
+    assert (tmp_path / 'patents.json.migrated').exists()
+    assert migrate_patents_json(str(json_path)) == 0
+
+    patent = Patent.find_by_token_id(2)
+    assert patent.title == 'Bicycle gearbox'
+    assert patent.description == 'Sealed planetary hub gears'
+    assert is_id(patent.id)
+    assert len(Patent.get_all_patents()) == 2
@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+
+from services import metrics, multicall
+
+class FakeEth:
+    block_number = 7
+
+    def __init__(self, code=b''):
+        self.code = code
+
+    def get_code(self, address):
+        return self.code
+
+class FakeWeb3:
+    def __init__(self, code=b''):
+        self.eth = FakeEth(code)
+
+    def to_checksum_address(self, address):
+        return address
+
+class FakeFunctionCall:
+    def __init__(self, fn_name, result=None, error=None):
+        self.fn_name = fn_name
+        self.result = result
+        self.error = error
+        self.blocks = []
+
+    def call(self, block_identifier):
+        self.blocks.append(block_identifier)
+        if self.error:
+            raise self.error
+        return self.result
+
+def test_falls_back_to_single_calls_without_multicall3(monkeypatch):
+    monkeypatch.setattr(multicall, '_multicall_available', {})
+    calls = [FakeFunctionCall('getPatent', result=(1, 'Qm1')), FakeFunctionCall('ownerOf', result='0xA')]
+
+    assert multicall.batch_call(FakeWeb3(), calls) == [(1, 'Qm1'), '0xA']
+    assert [call.blocks for call in calls] == [['latest'], ['latest']]
+
+def test_fallback_pins_every_call_to_one_block_across_chunks(monkeypatch):
+    monkeypatch.setattr(multicall, '_multicall_available', {})
+    calls = [FakeFunctionCall('getPatent', result=index) for index in range(3)]
+
+    assert multicall.batch_call(FakeWeb3(), calls, chunk_size=2) == [0, 1, 2]
+    assert {call.blocks[0] for call in calls} == {7}
+
+def test_failed_fallback_call_is_logged_and_counted(monkeypatch, caplog):
+    monkeypatch.setattr(multicall, '_multicall_available', {})
+    calls = [FakeFunctionCall('getPatent', error=ValueError('execution reverted')), FakeFunctionCall('ownerOf', result='0xA')]
+    before = metrics.background_errors._values.get(('multicall',), 0)
+
+    assert multicall.batch_call(FakeWeb3(), calls) == [None, '0xA']
+    assert metrics.background_errors._values[('multicall',)] == before + 1
+    assert 'execution reverted' in caplog.text
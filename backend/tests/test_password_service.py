@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+from flask import Flask
+from flask_login import LoginManager
+
+from models import user_model
+from models.user_model import User, UserRepository
+from routes import auth_routes
+from services import password_service
+from services.password_service import HashingBusyError
+
+@pytest.fixture
+def cheap_hashing(monkeypatch):
+    monkeypatch.setattr(password_service, 'PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000')
+
+@pytest.fixture
+def client(tmp_path, monkeypatch, cheap_hashing):
+    monkeypatch.setattr(user_model, 'user_repository', UserRepository(str(tmp_path / 'users.json')))
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    app.register_blueprint(auth_routes.auth_bp)
+    LoginManager(app).user_loader(User.find_by_id)
+    return app.test_client()
+
+@pytest.fixture
+def saturated(monkeypatch):
+    """A hashing pool whose every slot is taken"""
+    slots = threading.BoundedSemaphore(1)
+    slots.acquire()
+    monkeypatch.setattr(password_service, '_slots', slots)
+
+def _signup(client):
+    return client.post('/api/auth/signup', json={'name': 'Ada', 'email': 'ada@example.com',
+                                                 'wallet_address': '0xA', 'password': 'correct horse'})
+
+def test_saturated_pool_turns_requests_away_with_429(client, saturated):
+    response = client.post('/api/auth/login', json={'email': 'ada@example.com', 'password': 'x'})
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == str(auth_routes.HASHING_RETRY_AFTER)
+
+    assert _signup(client).status_code == 429
+    assert User.find_by_email('ada@example.com') is None
+
+def test_slots_are_released_after_each_hash(cheap_hashing, monkeypatch):
+    monkeypatch.setattr(password_service, '_slots', threading.BoundedSemaphore(1))
+    password_hash = password_service.hash_password('pw')
+    assert password_service.verify_password(password_hash, 'pw')
+    assert not password_service.verify_password(password_hash, 'wrong')
+    assert not password_service.verify_password(None, 'pw')
+
+def test_login_upgrades_hashes_made_with_old_parameters(client, monkeypatch):
+    assert _signup(client).status_code == 201
+    old_hash = User.find_by_email('ada@example.com').password_hash
+    assert old_hash.startswith('pbkdf2:sha256:1000$')
+
+    monkeypatch.setattr(password_service, 'PASSWORD_HASH_METHOD', 'pbkdf2:sha256:2000')
+    assert client.post('/api/auth/login', json={'email': 'ada@example.com', 'password': 'wrong'}).status_code == 401
+    assert User.find_by_email('ada@example.com').password_hash == old_hash
+
+    assert client.post('/api/auth/login', json={'email': 'ada@example.com', 'password': 'correct horse'}).status_code == 200
+    assert User.find_by_email('ada@example.com').password_hash.startswith('pbkdf2:sha256:2000$')
+
+def test_busy_pool_skips_the_upgrade_but_not_the_login(cheap_hashing, monkeypatch):
+    user = User(name='Ada', email='ada@example.com', wallet_address='0xA',
+                password_hash=password_service.hash_password('pw'))
+    saves = []
+    monkeypatch.setattr(User, 'save', lambda self: saves.append(self))
+    monkeypatch.setattr(password_service, 'PASSWORD_HASH_METHOD', 'pbkdf2:sha256:2000')
+
+    def busy(password):
+        raise HashingBusyError()
+
+    monkeypatch.setattr(password_service, 'hash_password', busy)
+    assert password_service.verify_and_upgrade(user, 'pw')
+    assert not saves
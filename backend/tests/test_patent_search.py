@@ -0,0 +1,42 @@
+from models.patent_model import Patent
+
+def _patent(title, description, category='energy'):
+    patent = Patent(title=title, description=description, category=category)
+    patent.save()
+    return patent
+
+def test_title_matches_rank_above_description_matches(db):
+    in_description = _patent('Roof tile', 'A tile with a built-in solar cell')
+    in_title = _patent('Solar roof tile', 'Interlocking tiles')
+    _patent('Wind turbine blade', 'Serrated trailing edge')
+
+    assert [patent.id for patent in Patent.search('solar')] == [in_title.id, in_description.id]
+    assert Patent.count_search('solar') == 2
+
+def test_every_word_matches_as_a_prefix(db):
+    solar = _patent('Solar roof tile', 'Interlocking photovoltaic tiles')
+    _patent('Solar water heater', 'Evacuated tubes')
+
+    assert [patent.id for patent in Patent.search('sol photo')] == [solar.id]
+    assert Patent.count_search('SOLA') == 2
+    assert Patent.search('olar') == []
+    assert Patent.search('  ?! ') == [] and Patent.count_search('') == 0
+
+def test_results_page_through_in_rank_order(db):
+    for index in range(5):
+        _patent(f'Battery cell {index}', 'Solid electrolyte')
+
+    ranked = [patent.id for patent in Patent.search('battery')]
+    paged = [patent.id for offset in (0, 2, 4) for patent in Patent.search('battery', limit=2, offset=offset)]
+    assert paged == ranked
+    assert len(ranked) == 5
+
+def test_edits_are_searchable_and_snippets_come_from_the_description(db):
+    patent = _patent('Heat pump', 'Uses a refrigerant loop')
+    patent.description = 'Uses carbon dioxide as the refrigerant'
+    patent.save()
+
+    results = Patent.search('carbon')
+    assert [result.id for result in results] == [patent.id]
+    assert 'carbon' in results[0].snippet
+    assert Patent.search('loop') == []
@@ -0,0 +1,105 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from services import provider_pool
+from services.provider_pool import ProviderPool
+
+FAST, SLOW = 'https://fast.example/rpc', 'https://slow.example/rpc'
+
+class FakeSession:
+    """Answers JSON-RPC posts per URL, or raises for nodes that are down"""
+
+    def __init__(self):
+        self.down = set()
+        self.heads = {}
+        self.calls = []
+
+    def post(self, url, data, headers):
+        self.calls.append(url)
+        if url in self.down:
+            raise ConnectionError(f'{url} is down')
+        request = json.loads(data)
+        result = hex(self.heads.get(url, 100)) if request['method'] == 'eth_blockNumber' else url
+        body = json.dumps({'jsonrpc': '2.0', 'id': request['id'], 'result': result}).encode()
+        return SimpleNamespace(content=body, raise_for_status=lambda: None)
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = {'now': 1000.0}
+    monkeypatch.setattr(provider_pool.time, 'monotonic', lambda: clock['now'])
+    return clock
+
+@pytest.fixture
+def pool(clock):
+    pool = ProviderPool([SLOW, FAST], session=FakeSession(), health_interval=float('inf'))
+    pool._next_health_check = float('inf')
+    pool.endpoints[0].latency, pool.endpoints[1].latency = 0.5, 0.05
+    return pool
+
+def _served_by(pool, method='eth_call'):
+    return pool.make_request(method, [])['result']
+
+def test_reads_go_to_the_fastest_node_and_fail_over(pool):
+    assert _served_by(pool) == FAST
+
+    pool.session.down.add(FAST)
+    assert _served_by(pool) == SLOW
+    assert pool.session.calls[-2:] == [FAST, SLOW]
+
+def test_circuit_opens_after_repeated_failures_and_half_opens_after_cooldown(pool, clock):
+    pool.session.down.add(FAST)
+    for _ in range(provider_pool.RPC_FAILURE_THRESHOLD):
+        assert _served_by(pool) == SLOW
+
+    # The open circuit is skipped instead of costing a timeout on every call
+    pool.session.calls.clear()
+    assert _served_by(pool) == SLOW
+    assert pool.session.calls == [SLOW]
+    assert pool.stats()[1]['circuit_open']
+
+    # After the cooldown one trial request goes through, and a failure reopens it at once
+    clock['now'] += provider_pool.RPC_COOLDOWN
+    pool.session.calls.clear()
+    assert _served_by(pool) == SLOW
+    assert pool.session.calls == [FAST, SLOW]
+    assert pool.stats()[1]['circuit_open']
+
+    clock['now'] += provider_pool.RPC_COOLDOWN
+    pool.session.down.clear()
+    assert _served_by(pool) == FAST
+    assert not pool.stats()[1]['circuit_open']
+
+def test_nodes_are_still_tried_when_every_circuit_is_open(pool):
+    pool.session.down.update({FAST, SLOW})
+    for _ in range(provider_pool.RPC_FAILURE_THRESHOLD):
+        with pytest.raises(ConnectionError):
+            _served_by(pool)
+
+    pool.session.down.clear()
+    assert _served_by(pool) in (FAST, SLOW)
+
+def test_transactions_and_nonces_stay_on_one_node(pool):
+    pinned = _served_by(pool, 'eth_getTransactionCount')
+    pool.endpoints[0].latency, pool.endpoints[1].latency = pool.endpoints[1].latency, pool.endpoints[0].latency
+    assert _served_by(pool, 'eth_sendRawTransaction') == pinned
+
+    pool.session.down.add(pinned)
+    moved = _served_by(pool, 'eth_sendRawTransaction')
+    assert moved != pinned
+    pool.session.down.clear()
+    assert _served_by(pool, 'eth_getTransactionCount') == moved
+
+def test_health_check_takes_lagging_nodes_out_of_rotation(pool):
+    pool.session.heads = {FAST: 100, SLOW: 100 - provider_pool.RPC_MAX_BLOCK_LAG - 1}
+    pool.check_health()
+    assert [endpoint['lagging'] for endpoint in pool.stats()] == [True, False]
+
+    # Even a faster lagging node is only tried after the others
+    pool.endpoints[0].latency = 0.001
+    assert [endpoint.url for endpoint in pool._candidates('eth_call')] == [FAST, SLOW]
+
+    # A lagging node is still the last resort
+    pool.session.down.add(FAST)
+    assert _served_by(pool) == SLOW
@@ -0,0 +1,100 @@
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask, session
+
+from services import session_store
+from services.session_store import MemorySessionStore, SQLiteSessionStore, ServerSideSessionInterface
+
+TTL = 100
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def client(request, monkeypatch):
+    if request.param == 'sqlite':
+        request.getfixturevalue('db')
+        store = SQLiteSessionStore()
+    else:
+        store = MemorySessionStore()
+
+    # A clock the tests can move
+    clock = {'now': 1_000_000.0}
+    monkeypatch.setattr(session_store, 'time', SimpleNamespace(time=lambda: clock['now']))
+
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    app.session_interface = ServerSideSessionInterface(store, ttl=TTL)
+
+    @app.route('/login/<user_id>')
+    def login(user_id):
+        session['_user_id'] = user_id
+        return ''
+
+    @app.route('/logout')
+    def logout():
+        session.pop('_user_id', None)
+        return ''
+
+    @app.route('/set/<value>')
+    def set_value(value):
+        session['value'] = value
+        return ''
+
+    @app.route('/get')
+    def get_value():
+        return session.get('value', '') + '|' + session.get('_user_id', '')
+
+    client = app.test_client()
+    client.clock = clock
+    client.store = store
+    return client
+
+def _sid(client):
+    return next((cookie.value for cookie in client.cookie_jar if cookie.name == 'session'), None)
+
+def test_cookie_carries_only_session_id(client):
+    client.get('/set/secret')
+
+    sid = _sid(client)
+    assert 'secret' not in sid
+    assert client.store.get(sid) is not None
+    assert client.get('/get').get_data(as_text=True) == 'secret|'
+
+def test_login_rotates_session_id(client):
+    client.get('/set/cart')
+    before_login = _sid(client)
+
+    client.get('/login/u1')
+    after_login = _sid(client)
+
+    assert after_login != before_login
+    assert client.store.get(before_login) is None
+    assert client.get('/get').get_data(as_text=True) == 'cart|u1'
+
+    client.get('/logout')
+    assert _sid(client) != after_login
+    assert client.store.get(after_login) is None
+
+def test_unchanged_session_keeps_its_id(client):
+    client.get('/login/u1')
+    sid = _sid(client)
+
+    client.get('/get')
+    client.get('/get')
+    assert _sid(client) == sid
+
+def test_session_expires_after_ttl_of_inactivity(client):
+    client.get('/login/u1')
+    sid = _sid(client)
+
+    client.clock['now'] += TTL + 1
+    assert client.get('/get').get_data(as_text=True) == '|'
+    assert client.store.get(sid) is None
+
+def test_activity_pushes_expiry_forward(client):
+    client.get('/login/u1')
+
+    # Past half the TTL a request renews the session
+    client.clock['now'] += TTL * 0.75
+    client.get('/get')
+    client.clock['now'] += TTL * 0.75
+    assert client.get('/get').get_data(as_text=True) == '|u1'
@@ -0,0 +1,70 @@
+import pytest
+from eth_account import Account
+from eth_account.messages import encode_defunct
+from flask import Flask
+
+from routes import blockchain_routes
+from services import signature_service, signature_worker
+from services.signature_service import RecoveredAddressCache, verify_batch
+
+ALICE, BOB = Account.create(), Account.create()
+
+def _sign(account, message):
+    return account.sign_message(encode_defunct(text=message)).signature.hex()
+
+@pytest.fixture
+def recoveries(monkeypatch):
+    """Fresh cache, in-process recovery, and a count of the signatures actually recovered"""
+    monkeypatch.setattr(signature_service, 'recovered_addresses', RecoveredAddressCache())
+    monkeypatch.setattr(signature_service, '_executor', None)
+    recovered = []
+    recover_many = signature_worker.recover_many
+
+    def counting_recover_many(pairs):
+        recovered.extend(pairs)
+        return recover_many(pairs)
+
+    monkeypatch.setattr(signature_worker, 'recover_many', counting_recover_many)
+    return recovered
+
+def test_batch_checks_each_signature_against_its_address(recoveries):
+    signature = _sign(ALICE, 'login 1')
+    items = [
+        ('login 1', signature, ALICE.address),
+        ('login 1', signature, BOB.address),
+        ('login 1', signature.upper().replace('0X', ''), ALICE.address.lower()),
+        ('login 2', signature, ALICE.address),
+        ('login 1', '0xdeadbeef', ALICE.address)
+    ]
+
+    assert verify_batch(items) == [True, False, True, False, False]
+    # The first three share one recovery
+    assert len(recoveries) == 3
+
+def test_recovered_addresses_are_cached(recoveries):
+    items = [(f'login {index}', _sign(BOB, f'login {index}'), BOB.address) for index in range(3)]
+    assert verify_batch(items) == [True] * 3
+    assert verify_batch(items) == [True] * 3
+    assert len(recoveries) == 3
+    assert signature_service.recover_signer('login 0', items[0][1]) == BOB.address
+    assert len(recoveries) == 3
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(blockchain_routes.blockchain_bp)
+    return app.test_client()
+
+def test_batch_endpoint_validates_and_answers_in_order(client, recoveries, monkeypatch):
+    signature = _sign(ALICE, 'hello')
+    response = client.post('/api/blockchain/verify-signatures', json={'signatures': [
+        {'message': 'hello', 'signature': signature, 'address': ALICE.address},
+        {'message': 'hello', 'signature': signature, 'address': BOB.address}
+    ]})
+    assert response.get_json() == {'results': [{'valid': True}, {'valid': False}]}
+
+    assert client.post('/api/blockchain/verify-signatures', json={'signatures': 'x'}).status_code == 400
+    assert client.post('/api/blockchain/verify-signatures', json={'signatures': [{'message': 'hello'}]}).status_code == 400
+    monkeypatch.setattr(signature_service, 'SIGNATURE_BATCH_MAX', 1)
+    too_many = [{'message': 'a', 'signature': signature, 'address': ALICE.address}] * 2
+    assert client.post('/api/blockchain/verify-signatures', json={'signatures': too_many}).status_code == 413
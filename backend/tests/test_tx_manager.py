@@ -0,0 +1,128 @@
+from types import SimpleNamespace
+
+import pytest
+
+from services import blockchain_service
+from services.tx_manager import NonceManager, GasOracle, GasEstimator
+
+WALLET = '0xAbC0000000000000000000000000000000000001'
+
+class FakeEth:
+    """Node stand-in that counts nonce lookups and rejects every broadcast"""
+
+    def __init__(self, pending):
+        self.pending = pending
+        self.count_calls = 0
+
+    def get_transaction_count(self, address, block_identifier):
+        self.count_calls += 1
+        return self.pending
+
+    def send_raw_transaction(self, raw_transaction):
+        raise ValueError('nonce too low')
+
+@pytest.fixture
+def eth(monkeypatch):
+    eth = FakeEth(pending=7)
+    w3 = SimpleNamespace(eth=eth)
+    monkeypatch.setattr(blockchain_service, '_chain', SimpleNamespace(w3=w3, nonce_manager=NonceManager(w3)))
+    return eth
+
+def test_failed_send_reads_nonce_from_node_again(eth):
+    nonce_manager = blockchain_service.nonce_manager
+    assert nonce_manager.allocate(WALLET) == 7
+    assert nonce_manager.allocate(WALLET) == 8
+    assert eth.count_calls == 1
+
+    with pytest.raises(ValueError):
+        blockchain_service.send_transaction(WALLET, b'signed')
+
+    # The node has since mined other transactions from the wallet
+    eth.pending = 12
+    assert nonce_manager.allocate(WALLET) == 12
+    assert eth.count_calls == 2
+
+def test_periodic_sync_keeps_nonces_handed_out_but_not_sent():
+    eth = FakeEth(pending=3)
+    nonce_manager = NonceManager(SimpleNamespace(eth=eth), sync_ttl=0)
+
+    assert [nonce_manager.allocate(WALLET) for _ in range(4)] == [3, 4, 5, 6]
+    nonce_manager.release(WALLET, 4)
+
+    # 3 and 4 reached the node, 4 from another client; 5 and 6 are still being signed
+    eth.pending = 5
+    assert nonce_manager.allocate(WALLET) == 7
+    assert eth.count_calls == 5
+
+def test_released_nonces_are_reused_lowest_first():
+    nonce_manager = NonceManager(SimpleNamespace(eth=FakeEth(pending=0)))
+
+    assert [nonce_manager.allocate(WALLET) for _ in range(4)] == [0, 1, 2, 3]
+    nonce_manager.release(WALLET, 2)
+    nonce_manager.release(WALLET, 1)
+    assert nonce_manager.allocate(WALLET) == 1
+
+    # Releasing the top nonce shrinks the counter past released ones below it
+    nonce_manager.release(WALLET, 3)
+    assert nonce_manager.allocate(WALLET) == 2
+    assert nonce_manager.allocate(WALLET) == 3
+    assert nonce_manager.allocate(WALLET) == 4
+
+class FakeFunctionCall:
+    def __init__(self, fn_name, *args, gas=50000):
+        self.fn_name = fn_name
+        self.args = args
+        self.gas = gas
+        self.estimates = 0
+
+    def estimate_gas(self, params):
+        self.estimates += 1
+        return self.gas
+
+def test_gas_estimate_is_reused_only_for_the_same_call_shape():
+    estimator = GasEstimator(buffer=1.25)
+
+    assert estimator.estimate(FakeFunctionCall('registerPatent', 'Qm' + 'a' * 44), WALLET) == 62500
+    same_length = FakeFunctionCall('registerPatent', 'Qm' + 'b' * 44, gas=1)
+    assert estimator.estimate(same_length, WALLET) == 62500
+    assert same_length.estimates == 0
+
+    longer = FakeFunctionCall('registerPatent', 'bafy' + 'c' * 100, gas=80000)
+    assert estimator.estimate(longer, WALLET) == 100000
+    assert longer.estimates == 1
+
+    bid = FakeFunctionCall('placeBid', 1, gas=40000)
+    assert estimator.estimate(bid, WALLET, value=10) == 50000
+    other_value = FakeFunctionCall('placeBid', 1, gas=60000)
+    assert estimator.estimate(other_value, WALLET, value=20) == 75000
+
+class FeeEth:
+    def __init__(self, eip1559=True):
+        self.eip1559 = eip1559
+        self.calls = 0
+
+    def fee_history(self, block_count, newest_block, percentiles):
+        self.calls += 1
+        if not self.eip1559:
+            raise ValueError('the method eth_feeHistory does not exist')
+        return {'baseFeePerGas': [90, 100], 'reward': [[3]]}
+
+    @property
+    def gas_price(self):
+        return 50
+
+def test_fee_params_are_fetched_once_per_ttl():
+    eth = FeeEth()
+    oracle = GasOracle(SimpleNamespace(eth=eth), ttl=60)
+
+    assert oracle.fee_params() == {'maxFeePerGas': 203, 'maxPriorityFeePerGas': 3}
+    oracle.fee_params()
+    assert eth.calls == 1
+
+    oracle.invalidate()
+    oracle.fee_params()
+    assert eth.calls == 2
+
+def test_legacy_chains_get_a_gas_price():
+    oracle = GasOracle(SimpleNamespace(eth=FeeEth(eip1559=False)))
+    assert oracle.fee_params() == {'gasPrice': 50}
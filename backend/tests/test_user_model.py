@@ -0,0 +1,85 @@
+import pytest
+from flask import session
+
+from models import user_model
+from models.user_model import User, UserRepository
+
+@pytest.fixture
+def users(tmp_path, monkeypatch):
+    repository = UserRepository(str(tmp_path / 'users.json'))
+    monkeypatch.setattr(user_model, 'user_repository', repository)
+    return repository
+
+def _user(**fields):
+    user = User(**dict({'name': 'Ada', 'email': 'ada@example.com', 'wallet_address': '0xA',
+                        'password_hash': 'scrypt:32768:8:1$salt$hash'}, **fields))
+    user.save()
+    return user
+
+def test_stamp_changes_with_any_edit_and_matches_across_processes(users, tmp_path):
+    user = _user()
+    stamp = users.stamp(user.id)
+    assert users.get(user.id).stamp == stamp
+    assert users.stamp('nobody') is None
+
+    # Another process reading the same file agrees
+    assert UserRepository(users.path).stamp(user.id) == stamp
+
+    user.wallet_address = '0xB'
+    user.save()
+    assert users.stamp(user.id) != stamp
+    assert users.get(user.id).wallet_address == '0xB'
+
+def test_session_principal_is_dropped_when_the_user_changes(db, users):
+    import app as app_module
+
+    user = _user()
+    with app_module.app.test_request_context():
+        assert app_module.load_user(user.id).wallet_address == '0xA'
+        assert session['_principal']['stamp'] == users.stamp(user.id)
+
+        # Served from the session while the record is unchanged
+        assert app_module.load_user(user.id).password_hash is None
+
+        # A change made by any process, e.g. a new wallet, is picked up at once
+        user.wallet_address = '0xB'
+        user.save()
+        assert app_module.load_user(user.id).wallet_address == '0xB'
+        assert session['_principal']['wallet_address'] == '0xB'
+
+def test_lookups_by_email_and_wallet_follow_edits(users):
+    user = _user()
+    assert User.find_by_email('ada@example.com').id == user.id
+    assert User.find_by_wallet('0xA').id == user.id
+
+    user.email = 'ada@lovelace.org'
+    user.save()
+    assert User.find_by_email('ada@example.com') is None
+    assert User.find_by_email('ada@lovelace.org').id == user.id
+
+def test_hydrated_users_are_kept_in_a_bounded_lru(tmp_path, monkeypatch):
+    users = UserRepository(str(tmp_path / 'users.json'), cache_size=2)
+    monkeypatch.setattr(user_model, 'user_repository', users)
+    first, second, third = (_user(email=f'{name}@example.com', wallet_address=f'0x{name}')
+                             for name in ('a', 'b', 'c'))
+
+    assert users.get(first.id) is users.get(first.id)
+    users.get(second.id)
+    users.get(third.id)
+    assert list(users._cache) == [second.id, third.id]
+
+    # A save drops the cached copy
+    cached = users.get(third.id)
+    third.name = 'Charles'
+    third.save()
+    assert users.get(third.id) is not cached
+    assert users.get(third.id).name == 'Charles'
+
+def test_records_saved_by_another_process_are_visible(users):
+    user = _user()
+    other_process = UserRepository(users.path)
+    assert other_process.get(user.id).name == 'Ada'
+
+    user.name = 'Augusta'
+    user.save()
+    assert other_process.get(user.id).name == 'Augusta'